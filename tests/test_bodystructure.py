@@ -0,0 +1,139 @@
+from workspace_secretary.engine.bodystructure import (
+    attachment_info,
+    attachment_parts,
+    decode_text_part,
+    text_parts,
+    walk_bodystructure,
+)
+
+TEXT_PLAIN = (
+    b"text",
+    b"plain",
+    (b"charset", b"utf-8"),
+    None,
+    None,
+    b"quoted-printable",
+    120,
+    4,
+    None,
+    None,
+)
+TEXT_HTML = (
+    b"text",
+    b"html",
+    (b"charset", b"utf-8"),
+    None,
+    None,
+    b"base64",
+    800,
+    11,
+    None,
+    None,
+)
+PDF = (
+    b"application",
+    b"pdf",
+    (b"name", b"invoice.pdf"),
+    None,
+    None,
+    b"base64",
+    52000,
+    None,
+    (b"attachment", (b"filename", b"invoice.pdf")),
+)
+
+
+def test_single_part_message_is_part_one():
+    parts = walk_bodystructure(TEXT_PLAIN)
+
+    assert [(p.part, p.content_type, p.charset) for p in parts] == [
+        ("1", "text/plain", "utf-8")
+    ]
+    assert parts[0].encoding == "quoted-printable"
+    assert attachment_parts(parts) == []
+
+
+def test_nested_multipart_numbers_sections():
+    alternative = ([TEXT_PLAIN, TEXT_HTML], b"alternative")
+    mixed = ([alternative, PDF], b"mixed")
+
+    parts = walk_bodystructure(mixed)
+
+    assert [(p.part, p.content_type) for p in parts] == [
+        ("1.1", "text/plain"),
+        ("1.2", "text/html"),
+        ("2", "application/pdf"),
+    ]
+
+
+def test_attachment_filename_and_size_from_disposition():
+    mixed = ([TEXT_PLAIN, PDF], b"mixed")
+
+    attachments = attachment_parts(walk_bodystructure(mixed))
+
+    assert [(a.filename, a.size) for a in attachments] == [("invoice.pdf", 52000)]
+
+
+def test_encoded_filenames_are_decoded():
+    rfc2231 = PDF[:8] + (
+        (b"attachment", (b"filename*", b"utf-8''R%C3%A9sum%C3%A9.pdf")),
+    )
+    mime_word = PDF[:8] + (
+        (b"attachment", (b"filename", b"=?utf-8?q?caf=C3=A9.pdf?=")),
+    )
+
+    assert walk_bodystructure(rfc2231)[0].filename == "Résumé.pdf"
+    assert walk_bodystructure(mime_word)[0].filename == "café.pdf"
+
+
+def test_empty_structure_has_no_parts():
+    assert walk_bodystructure(None) == []
+
+
+def test_text_parts_pick_plain_and_html_sections():
+    alternative = ([TEXT_PLAIN, TEXT_HTML], b"alternative")
+    parts = walk_bodystructure(([alternative, PDF], b"mixed"))
+
+    chosen = text_parts(parts)
+
+    assert {k: v.part for k, v in chosen.items()} == {"plain": "1.1", "html": "1.2"}
+
+
+def test_attached_text_file_is_not_a_body_section():
+    notes = TEXT_PLAIN[:9] + ((b"attachment", (b"filename", b"notes.txt")),)
+    parts = walk_bodystructure(([TEXT_HTML, notes], b"mixed"))
+
+    assert {k: v.part for k, v in text_parts(parts).items()} == {"html": "1"}
+
+
+def test_attachment_info_records_metadata_without_content():
+    parts = walk_bodystructure(([TEXT_PLAIN, PDF], b"mixed"))
+
+    assert attachment_info(parts) == [
+        {
+            "filename": "invoice.pdf",
+            "content_type": "application/pdf",
+            "size": 52000,
+            "part": "2",
+            "encoding": "base64",
+        }
+    ]
+
+
+def test_decode_text_part_handles_transfer_encoding_and_charset():
+    qp_latin1 = walk_bodystructure(
+        (
+            b"text",
+            b"plain",
+            (b"charset", b"iso-8859-1"),
+            None,
+            None,
+            b"quoted-printable",
+            9,
+            1,
+        )
+    )[0]
+    b64_utf8 = walk_bodystructure(TEXT_HTML)[0]
+
+    assert decode_text_part(b"caf=E9 ok", qp_latin1) == "café ok"
+    assert decode_text_part(b"PHA+Y2Fmw6k8L3A+", b64_utf8) == "<p>café</p>"
@@ -0,0 +1,116 @@
+import pytest
+
+from workspace_secretary.engine.catchup import CatchupSchedule, count_changes
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _state(**overrides):
+    folder_state = {
+        "uidvalidity": 1,
+        "uidnext": 101,
+        "highestmodseq": 500,
+        "backfill_lo": None,
+        "backfill_hi": None,
+    }
+    folder_state.update(overrides)
+    return folder_state
+
+
+def _status(**overrides):
+    status = {"uidvalidity": 1, "uidnext": 101, "highestmodseq": 500, "messages": 100}
+    status.update(overrides)
+    return status
+
+
+def _schedule(clock, folders=("INBOX", "Archive"), rates=None):
+    return CatchupSchedule(
+        folders,
+        default_interval=1800,
+        min_interval=60,
+        max_interval=21600,
+        rates=rates,
+        clock=clock,
+    )
+
+
+def test_unchanged_status_counts_no_changes():
+    assert count_changes(_state(), _status(), cached_count=100) == 0
+
+
+@pytest.mark.parametrize(
+    "status, expected",
+    [
+        (_status(uidnext=104, messages=103), 3),
+        (_status(highestmodseq=501), 1),
+        (_status(messages=99), 1),
+        (_status(uidvalidity=2), 1),
+    ],
+)
+def test_status_changes_are_counted(status, expected):
+    assert count_changes(_state(), status, cached_count=100) == expected
+
+
+def test_new_or_unfinished_folders_always_need_a_sync():
+    assert count_changes(None, _status(), cached_count=0) == 1
+    open_window = _state(backfill_lo=1, backfill_hi=40)
+    assert count_changes(open_window, _status(), cached_count=60) == 1
+
+
+def test_folders_without_history_use_default_interval():
+    clock = FakeClock()
+    schedule = _schedule(clock)
+
+    assert schedule.due() == []
+    clock.now += 1800
+    assert schedule.due() == ["INBOX", "Archive"]
+
+
+def test_busy_folder_is_polled_more_often_than_quiet_one():
+    clock = FakeClock()
+    schedule = _schedule(clock)
+    clock.now += 1800
+
+    schedule.observe("INBOX", 6)
+    schedule.observe("Archive", 0)
+
+    intervals = {entry["folder"]: entry["interval"] for entry in schedule.status()}
+    assert intervals == {"INBOX": 300, "Archive": 21600}
+
+
+def test_rate_decays_over_quiet_polls():
+    clock = FakeClock()
+    schedule = _schedule(clock, rates={"INBOX": 12.0})
+    rates = []
+    for _ in range(5):
+        clock.now += schedule.seconds_until_due()
+        rates.append(schedule.observe("INBOX", 0))
+
+    assert rates == sorted(rates, reverse=True)
+    assert rates[-1] < 12.0
+
+
+def test_pushed_folders_are_not_polled_below_default_interval():
+    clock = FakeClock()
+    schedule = _schedule(clock, rates={"INBOX": 60.0, "Archive": 60.0})
+    schedule.set_pushed(["INBOX"])
+
+    status = {entry["folder"]: entry for entry in schedule.status()}
+    assert status["INBOX"]["interval"] == 1800
+    assert status["INBOX"]["pushed"]
+    assert status["Archive"]["interval"] == 60
+
+
+def test_failed_probe_reschedules_without_learning():
+    clock = FakeClock()
+    schedule = _schedule(clock, rates={"INBOX": 4.0})
+    clock.now += 900
+
+    assert schedule.observe("INBOX", None) == 4.0
+    assert schedule.seconds_until_due() == 900
@@ -0,0 +1,67 @@
+import socket
+import zlib
+
+import pytest
+
+from workspace_secretary.engine.compress import DeflateTransport
+
+
+class FakeImap:
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile("rb")
+
+
+@pytest.fixture
+def sockets():
+    client, server = socket.socketpair()
+    yield client, server
+    client.close()
+    server.close()
+
+
+def _deflate(data):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def test_reads_lines_and_literals_from_the_compressed_stream(sockets):
+    client, server = sockets
+    imap = FakeImap(client)
+    transport = DeflateTransport(imap)
+    body = b"Hello world. " * 200
+    response = b"* 1 FETCH (BODY[] {%d}\r\n" % len(body) + body + b")\r\nA1 OK\r\n"
+    server.sendall(_deflate(response))
+
+    assert imap.readline() == b"* 1 FETCH (BODY[] {2600}\r\n"
+    assert imap.read(len(body)) == body
+    assert imap.readline() == b")\r\n"
+    assert imap.readline() == b"A1 OK\r\n"
+    stats = transport.stats()
+    assert stats["bytes_received"] == len(response)
+    assert stats["bytes_received_wire"] < stats["bytes_received"] / 10
+
+
+def test_sent_commands_are_flushed_deflate(sockets):
+    client, server = sockets
+    imap = FakeImap(client)
+    transport = DeflateTransport(imap)
+
+    imap.send(b"A2 NOOP\r\n")
+
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    wire = server.recv(4096)
+    assert decompressor.decompress(wire) == b"A2 NOOP\r\n"
+    assert transport.bytes_sent == 9
+    assert transport.bytes_sent_wire == len(wire)
+
+
+def test_eof_returns_what_is_left(sockets):
+    client, server = sockets
+    imap = FakeImap(client)
+    DeflateTransport(imap)
+    server.sendall(_deflate(b"* BYE"))
+    server.shutdown(socket.SHUT_WR)
+
+    assert imap.readline() == b"* BYE"
+    assert imap.readline() == b""
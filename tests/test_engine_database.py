@@ -0,0 +1,526 @@
+import os
+import threading
+from datetime import datetime
+
+import pytest
+
+from workspace_secretary.engine.database import (
+    PostgresDatabase,
+    SqliteDatabase,
+    fts5_query,
+)
+
+
+def _email(uid: int, folder: str = "INBOX", **overrides):
+    row = {
+        "uid": uid,
+        "folder": folder,
+        "message_id": f"<{uid}@example.com>",
+        "subject": f"Subject {uid}",
+        "from_addr": "Alice <alice@example.com>",
+        "to_addr": "bob@example.com",
+        "cc_addr": "",
+        "bcc_addr": "",
+        "date": "2026-01-01T10:00:00",
+        "internal_date": "2026-01-01T10:00:00",
+        "body_text": f"Body {uid}",
+        "body_html": "",
+        "flags": "",
+        "is_unread": True,
+        "is_important": False,
+        "size": 100,
+        "modseq": 1,
+        "in_reply_to": "",
+        "references_header": "",
+        "gmail_thread_id": None,
+        "gmail_msgid": None,
+        "gmail_labels": ["\\Inbox"],
+        "has_attachments": False,
+        "attachment_filenames": None,
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SqliteDatabase(db_path=str(tmp_path / "secretary.db"))
+    database.initialize()
+    return database
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def any_db(request, tmp_path):
+    if request.param == "sqlite":
+        database = SqliteDatabase(db_path=str(tmp_path / "secretary.db"))
+        database.initialize()
+        yield database
+        return
+
+    if not os.environ.get("POSTGRES_TEST_HOST"):
+        pytest.skip("POSTGRES_TEST_HOST not set")
+    pytest.importorskip("psycopg_pool")
+    database = PostgresDatabase(
+        host=os.environ["POSTGRES_TEST_HOST"],
+        port=int(os.environ.get("POSTGRES_TEST_PORT", "5432")),
+        database=os.environ.get("POSTGRES_TEST_DATABASE", "secretary_test"),
+        user=os.environ.get("POSTGRES_TEST_USER", "secretary"),
+        password=os.environ.get("POSTGRES_TEST_PASSWORD", ""),
+    )
+    database.initialize()
+    with database.connection() as conn:
+        conn.execute("TRUNCATE emails CASCADE")
+        conn.commit()
+    yield database
+    database.close()
+
+
+def test_upsert_emails_batch_inserts_all_rows(db):
+    written = db.upsert_emails_batch([_email(uid) for uid in range(1, 101)])
+
+    assert written == 100
+    assert db.count_emails("INBOX") == 100
+    assert db.get_email_by_uid(42, "INBOX")["subject"] == "Subject 42"
+
+
+def test_upsert_emails_batch_replaces_existing_rows(db):
+    db.upsert_emails_batch([_email(1), _email(2)])
+    db.upsert_emails_batch([_email(1, subject="Updated")])
+
+    assert db.count_emails("INBOX") == 2
+    assert db.get_email_by_uid(1, "INBOX")["subject"] == "Updated"
+
+
+def test_upsert_emails_batch_keeps_fts_in_sync(db):
+    db.upsert_emails_batch([_email(1, body_text="quarterly invoice attached")])
+
+    results = db.search_emails(folder="INBOX", body_contains="invoice")
+
+    assert [r["uid"] for r in results] == [1]
+
+
+def test_fts5_query_supports_web_search_syntax():
+    assert fts5_query("invoice march") == '"invoice"* "march"*'
+    assert fts5_query('"quarterly report" OR budget') == (
+        '"quarterly report" OR "budget"*'
+    )
+    assert fts5_query("invoice -paid") == '("invoice"*) NOT "paid"*'
+    assert fts5_query('-paid OR " - "') == ""
+
+
+def test_full_text_search_ranks_by_relevance_with_snippets(db):
+    db.upsert_emails_batch(
+        [
+            _email(1, subject="Lunch", body_text="the invoice is in the drawer"),
+            _email(2, subject="Invoice 42", body_text="please pay invoice 42"),
+            _email(3, subject="Hello", body_text="nothing to see here"),
+        ]
+    )
+
+    results = db.full_text_search("invoi", folder="INBOX")
+
+    assert [r["uid"] for r in results] == [2, 1]
+    assert "**Invoice**" in results[0]["snippet"]
+    assert results[0]["rank"] > results[1]["rank"] > 0
+
+
+def test_full_text_search_boosts_recent_mail(db):
+    today = datetime.now().isoformat()
+    db.upsert_emails_batch(
+        [
+            _email(1, body_text="budget review", internal_date="2020-01-01T10:00:00"),
+            _email(2, body_text="budget review", internal_date=today),
+        ]
+    )
+
+    results = db.full_text_search('"budget review" -draft')
+
+    assert [r["uid"] for r in results] == [2, 1]
+
+
+def test_substring_filters_use_the_trigram_index(db):
+    db.upsert_emails_batch(
+        [
+            _email(1, from_addr="ACME Billing <billing@acme.com>"),
+            _email(2, from_addr="first_last@example.com", subject="50% off"),
+            _email(3, from_addr="firstXlast@example.com", subject="500 off"),
+        ]
+    )
+
+    def uids(**filters):
+        return sorted(e["uid"] for e in db.search_emails(folder="INBOX", **filters))
+
+    assert uids(from_addr="acme") == [1]
+    assert uids(from_addr="first_last") == [2]
+    assert uids(subject_contains="50%") == [2]
+    assert uids(from_addr="bi") == [1]
+
+    db.upsert_emails_batch([_email(1, from_addr="billing@initech.com")])
+    assert uids(from_addr="acme") == []
+    assert uids(from_addr="initech") == [1]
+
+    with db._get_read_connection() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT rowid FROM emails_trigram "
+            "WHERE from_addr LIKE '%acme%'"
+        ).fetchall()
+    assert "VIRTUAL TABLE INDEX 0:L" in plan[0][3]
+
+
+def test_participants_are_indexed_at_upsert(db):
+    db.upsert_emails_batch(
+        [
+            _email(
+                1,
+                to_addr="Me <me@example.com>,carol@acme.com",
+                cc_addr="Dave <dave@acme.com>",
+            ),
+            _email(2, to_addr="team@example.com", cc_addr="me@example.com"),
+        ]
+    )
+
+    stats = db.get_recipient_stats("INBOX", [1, 2], ["me@example.com"])
+
+    assert stats == {
+        1: {"recipients": 3, "to_me": True, "cc_me": False},
+        2: {"recipients": 2, "to_me": False, "cc_me": True},
+    }
+
+    def uids(**filters):
+        return sorted(e["uid"] for e in db.search_emails(folder="INBOX", **filters))
+
+    assert uids(to_addr="ME@example.com") == [1]
+    assert uids(to_addr="@acme.com") == [1]
+    assert uids(from_addr="alice@example.com") == [1, 2]
+
+
+def test_participants_follow_moves_copies_and_deletes(db):
+    db.upsert_emails_batch([_email(1, to_addr="me@example.com")])
+    db.relocate_emails([(1, "INBOX", 7, "Archive")])
+    db.copy_emails_batch(
+        [
+            {
+                "uid": 3,
+                "folder": "Later",
+                "source_uid": 7,
+                "source_folder": "Archive",
+                "flags": "",
+                "is_unread": True,
+                "is_important": False,
+                "modseq": 2,
+                "gmail_labels": None,
+            }
+        ]
+    )
+
+    assert db.get_recipient_stats("Archive", [7], ["me@example.com"])[7]["to_me"]
+    assert db.get_recipient_stats("Later", [3], ["me@example.com"])[3]["to_me"]
+
+    db.delete_emails_batch("Archive", [7])
+    with db._get_read_connection() as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM participants").fetchone()[0]
+    assert rows == 2  # the copy's sender and recipient
+
+
+def test_participants_are_backfilled_once(tmp_path):
+    path = str(tmp_path / "secretary.db")
+    database = SqliteDatabase(db_path=path)
+    database.initialize()
+    database.upsert_emails_batch([_email(1, to_addr="me@example.com")])
+    with database._get_email_connection() as conn:
+        conn.execute("DROP TABLE participants")
+        conn.commit()
+    database.close()
+
+    reopened = SqliteDatabase(db_path=path)
+    reopened.initialize()
+
+    stats = reopened.get_recipient_stats("INBOX", [1], ["me@example.com"])
+    assert stats[1]["to_me"]
+
+
+def _changes(db, write):
+    with db._get_email_connection() as conn:
+        before = conn.total_changes
+        write()
+        return conn.total_changes - before
+
+
+def test_unchanged_upsert_writes_nothing(db):
+    db.upsert_emails_batch([_email(1)])
+
+    assert _changes(db, lambda: db.upsert_emails_batch([_email(1)])) == 0
+    seen = _email(1, flags="\\Seen")
+    assert _changes(db, lambda: db.upsert_emails_batch([seen])) == 1
+
+
+def test_flag_updates_do_not_touch_the_fts_index(db):
+    db.upsert_emails_batch([_email(1, body_text="quarterly invoice attached")])
+
+    changed = _changes(db, lambda: db.mark_email_read(1, "INBOX", True))
+
+    assert changed == 1
+    results = db.search_emails(folder="INBOX", body_contains="invoice")
+    assert [r["uid"] for r in results] == [1]
+
+
+def test_changed_body_is_reindexed(db):
+    db.upsert_emails_batch([_email(1, body_text="quarterly invoice attached")])
+    db.upsert_emails_batch([_email(1, body_text="meeting moved to friday")])
+
+    assert db.search_emails(folder="INBOX", body_contains="invoice") == []
+    results = db.search_emails(folder="INBOX", body_contains="friday")
+    assert [r["uid"] for r in results] == [1]
+
+
+def test_update_flags_batch(db):
+    db.upsert_emails_batch([_email(1), _email(2), _email(3)])
+
+    updated = db.update_flags_batch(
+        [
+            {
+                "uid": uid,
+                "folder": "INBOX",
+                "flags": "\\Seen",
+                "is_unread": False,
+                "modseq": 7,
+                "gmail_labels": None,
+            }
+            for uid in (1, 2)
+        ]
+    )
+
+    assert updated == 2
+    assert db.get_email_by_uid(1, "INBOX")["is_unread"] == 0
+    assert db.get_email_by_uid(2, "INBOX")["modseq"] == 7
+    assert db.get_email_by_uid(2, "INBOX")["gmail_labels"] == "\\Inbox"
+    assert db.get_email_by_uid(3, "INBOX")["is_unread"] == 1
+
+
+def test_hydrating_one_copy_fills_other_gmail_folders(db):
+    db.upsert_emails_batch(
+        [
+            _email(1, body_text="", body_hydrated=False, gmail_msgid=77),
+            _email(
+                9,
+                "[Gmail]/All Mail",
+                body_text="",
+                body_hydrated=False,
+                gmail_msgid=77,
+            ),
+            _email(2, body_text="", body_hydrated=False),
+        ]
+    )
+
+    db.update_email_bodies_batch(
+        [{"uid": 1, "folder": "INBOX", "body_text": "Hello", "body_html": ""}]
+    )
+
+    assert db.get_email_by_uid(9, "[Gmail]/All Mail")["body_text"] == "Hello"
+    assert [row["uid"] for row in db.get_unhydrated_emails()] == [2]
+
+
+def test_unfetched_copy_does_not_hydrate_other_gmail_folders(any_db):
+    any_db.upsert_emails_batch(
+        [
+            _email(5, body_text="", body_hydrated=False, gmail_msgid=777),
+            _email(
+                90,
+                "[Gmail]/All Mail",
+                body_text="",
+                body_hydrated=False,
+                gmail_msgid=777,
+                has_attachments=True,
+                attachment_filenames=["report.pdf"],
+            ),
+            _email(6, body_text="", body_hydrated=False),
+        ]
+    )
+
+    # INBOX/5 was archived before hydration, so the fetch only returns 6.
+    any_db.update_email_bodies_batch(
+        [{"uid": 6, "folder": "INBOX", "body_text": "Hello", "body_html": ""}]
+    )
+
+    pending = {(row["folder"], row["uid"]) for row in any_db.get_unhydrated_emails()}
+    assert ("[Gmail]/All Mail", 90) in pending
+    archived = any_db.get_email_by_uid(90, "[Gmail]/All Mail")
+    assert archived["has_attachments"]
+
+    any_db.update_email_bodies_batch(
+        [
+            {
+                "uid": 90,
+                "folder": "[Gmail]/All Mail",
+                "subject": "Subject 90",
+                "body_text": "archived body",
+                "body_html": "",
+                "has_attachments": True,
+                "attachment_filenames": ["report.pdf"],
+            }
+        ]
+    )
+
+    archived = any_db.get_email_by_uid(90, "[Gmail]/All Mail")
+    assert archived["body_text"] == "archived body"
+    assert any_db.get_email_by_uid(5, "INBOX")["body_text"] == "archived body"
+    assert any_db.get_unhydrated_emails() == []
+
+
+def test_delete_emails_batch_only_touches_given_folder(db):
+    db.upsert_emails_batch(
+        [_email(1, body_text="expunged"), _email(2), _email(3), _email(1, "Sent")]
+    )
+
+    deleted = db.delete_emails_batch("INBOX", [1, 3, 99])
+
+    assert deleted == 2
+    assert db.get_synced_uids("INBOX") == [2]
+    assert db.get_synced_uids("Sent") == [1]
+    assert db.search_emails(folder="INBOX", body_contains="expunged") == []
+
+
+def test_apply_email_changes_updates_flags_labels_and_moves(db):
+    db.upsert_emails_batch(
+        [_email(1), _email(2), _email(3), _email(1, "Sent", gmail_labels=["\\Sent"])]
+    )
+
+    changed = db.apply_email_changes(
+        [
+            {
+                "folder": "INBOX",
+                "uids": [1, 2],
+                "is_read": True,
+                "labels": ["Secretary/Auto-Cleaned"],
+                "label_action": "add",
+            },
+            {"folder": "Sent", "uids": [1], "delete": True},
+        ]
+    )
+
+    assert changed == 3
+    first = db.get_email_by_uid(1, "INBOX")
+    assert not first["is_unread"]
+    assert "\\Seen" in first["flags"]
+    assert first["gmail_labels"] == "\\Inbox,Secretary/Auto-Cleaned"
+    assert db.get_email_by_uid(3, "INBOX")["is_unread"]
+    assert db.get_email_by_uid(3, "INBOX")["gmail_labels"] == "\\Inbox"
+    assert db.get_synced_uids("Sent") == []
+
+
+def test_change_rate_is_persisted_in_folder_state(db):
+    db.save_folder_state("INBOX", uidvalidity=1, uidnext=10)
+    assert db.get_folder_state("INBOX")["change_rate"] is None
+
+    db.save_change_rate("INBOX", 2.5)
+    db.save_folder_state("INBOX", uidvalidity=1, uidnext=12)
+
+    assert db.get_folder_state("INBOX")["change_rate"] == 2.5
+
+
+def test_empty_batches_are_noops(db):
+    assert db.upsert_emails_batch([]) == 0
+    assert db.update_flags_batch([]) == 0
+    assert db.delete_emails_batch("INBOX", []) == 0
+
+
+def test_header_only_rows_are_hydrated_newest_first(db):
+    db.upsert_emails_batch(
+        [
+            _email(1, body_text="", body_hydrated=False),
+            _email(
+                2,
+                body_text="",
+                internal_date="2026-02-01T10:00:00",
+                body_hydrated=False,
+            ),
+            _email(3),
+        ]
+    )
+
+    pending = db.get_unhydrated_emails(limit=10)
+    assert [row["uid"] for row in pending] == [2, 1]
+
+    db.update_email_bodies_batch(
+        [
+            {
+                "uid": 2,
+                "folder": "INBOX",
+                "subject": "Subject 2",
+                "body_text": "quarterly invoice",
+                "body_html": "",
+                "has_attachments": True,
+                "attachment_filenames": ["invoice.pdf"],
+            }
+        ]
+    )
+
+    assert [row["uid"] for row in db.get_unhydrated_emails(limit=10)] == [1]
+    assert db.get_email_by_uid(2, "INBOX")["body_text"] == "quarterly invoice"
+    results = db.search_emails(folder="INBOX", body_contains="invoice")
+    assert [r["uid"] for r in results] == [2]
+
+
+def test_failed_hydration_attempts_stop_blocking_the_queue(db):
+    db.upsert_emails_batch(
+        [
+            _email(
+                1,
+                body_text="",
+                internal_date="2026-03-01T10:00:00",
+                body_hydrated=False,
+            ),
+            _email(2, body_text="", body_hydrated=False),
+            _email(3, "Old", body_text="", body_hydrated=False),
+        ]
+    )
+
+    def pending():
+        rows = db.get_unhydrated_emails(limit=1, folders=["INBOX"], max_attempts=2)
+        return [row["uid"] for row in rows]
+
+    assert pending() == [1]
+    assert db.record_hydration_failures("INBOX", [1]) == 1
+    assert pending() == [1]
+    db.record_hydration_failures("INBOX", [1])
+
+    assert pending() == [2]
+    assert db.get_email_by_uid(1, "INBOX")["body_hydrated"] == 0
+    assert [row["uid"] for row in db.get_unhydrated_emails(folders=["Old"])] == [3]
+
+
+def test_sqlite_runs_in_wal_mode_with_persistent_connections(db):
+    with db._get_email_connection() as writer:
+        assert writer.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    with db._get_email_connection() as again:
+        assert again is writer
+    with db._get_read_connection() as reader:
+        assert reader is not writer
+
+
+def test_reads_do_not_wait_for_the_writer(db):
+    db.upsert_emails_batch([_email(1)])
+    seen = []
+
+    with db._get_email_connection() as conn:
+        conn.execute("UPDATE emails SET subject = 'Changed' WHERE uid = 1")
+        reader = threading.Thread(
+            target=lambda: seen.append(db.get_email_by_uid(1, "INBOX")["subject"])
+        )
+        reader.start()
+        reader.join(timeout=5)
+        conn.commit()
+
+    assert seen == ["Subject 1"]
+    assert db.get_email_by_uid(1, "INBOX")["subject"] == "Changed"
+
+
+def test_uncommitted_writes_are_rolled_back(db):
+    db.upsert_emails_batch([_email(1)])
+
+    with pytest.raises(RuntimeError):
+        with db._get_email_connection() as conn:
+            conn.execute("DELETE FROM emails")
+            raise RuntimeError("boom")
+
+    assert db.count_emails("INBOX") == 1
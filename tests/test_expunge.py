@@ -0,0 +1,75 @@
+from workspace_secretary.engine.expunge import (
+    compact_uid_set,
+    find_expunged_uids,
+    parse_uid_set,
+)
+
+
+class FakeImapClient:
+    def __init__(self, uids):
+        self.uids = sorted(uids)
+        self.probes = []
+        self.searches = []
+
+    def uids_at_sequence(self, folder, seqs):
+        self.probes.append(list(seqs))
+        return {seq: self.uids[seq - 1] for seq in seqs if seq <= len(self.uids)}
+
+    def search(self, criteria, folder="INBOX"):
+        self.searches.append(criteria)
+        lo, hi = criteria.split(" ")[1].split(":")
+        return [uid for uid in self.uids if int(lo) <= uid <= int(hi)]
+
+
+def _find(client, local, **kwargs):
+    return find_expunged_uids(
+        client, "INBOX", sorted(local), len(client.uids), chunk_size=10, **kwargs
+    )
+
+
+def test_parse_uid_set():
+    assert parse_uid_set("41,43:45, 50") == [41, 43, 44, 45, 50]
+    assert parse_uid_set("9:7") == [7, 8, 9]
+
+
+def test_compact_uid_set_collapses_runs():
+    assert compact_uid_set([45, 41, 43, 44, 50, 43]) == "41,43:45,50"
+    assert parse_uid_set(compact_uid_set(range(1, 1001))) == list(range(1, 1001))
+    assert compact_uid_set([]) == ""
+
+
+def test_nothing_expunged_needs_one_probe_and_no_search():
+    client = FakeImapClient(range(1, 51))
+
+    assert _find(client, range(1, 51)) == []
+    assert client.probes == [[10, 20, 30, 40, 50]]
+    assert client.searches == []
+
+
+def test_only_chunks_with_expunges_are_searched():
+    server = [uid for uid in range(1, 51) if uid not in (15, 16)]
+    client = FakeImapClient(server)
+
+    assert _find(client, range(1, 51)) == [15, 16]
+    assert client.searches == ["UID 11:20"]
+
+
+def test_expunge_hidden_by_uncached_mail_needs_limit():
+    client = FakeImapClient([uid for uid in range(1, 61) if uid != 33])
+    cached = [uid for uid in range(1, 51) if uid % 7]
+
+    assert _find(client, cached) == []
+    assert _find(client, cached, limit=1) == [33]
+
+
+def test_limit_stops_the_scan():
+    client = FakeImapClient([uid for uid in range(1, 51) if uid not in (5, 45)])
+
+    assert _find(client, range(1, 51), limit=1) == [5]
+    assert client.searches == ["UID 1:10"]
+
+
+def test_empty_folder_expunges_everything():
+    client = FakeImapClient([])
+
+    assert _find(client, [1, 2]) == [1, 2]
@@ -0,0 +1,36 @@
+from unittest.mock import MagicMock
+
+from workspace_secretary.engine.imap_sync import ImapClient
+
+SELECTED = b"(selected (MessageNew (UID) MessageExpunge FlagChange))"
+EVENTS = b"(MessageNew MessageExpunge FlagChange)"
+
+
+def _notify_args(folders):
+    client = ImapClient.__new__(ImapClient)
+    raw = MagicMock()
+    raw._raw_command.return_value = ("OK", [b"NOTIFY completed"])
+    client._get_client = lambda: raw
+
+    client.notify_set(folders)
+
+    raw._raw_command.assert_called_once()
+    command, args = raw._raw_command.call_args.args
+    assert command == b"NOTIFY"
+    return args
+
+
+def test_notify_set_sends_single_mailbox_unparenthesized():
+    assert _notify_args(["Work"]) == [
+        b"SET",
+        SELECTED,
+        b'(mailboxes "Work" ' + EVENTS + b")",
+    ]
+
+
+def test_notify_set_sends_several_mailboxes_as_a_list():
+    assert _notify_args(["Work", "Sent", "[Gmail]/All Mail"]) == [
+        b"SET",
+        SELECTED,
+        b'(mailboxes ("Work" "Sent" "[Gmail]/All Mail") ' + EVENTS + b")",
+    ]
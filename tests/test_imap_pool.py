@@ -0,0 +1,143 @@
+import threading
+import time
+from queue import Empty
+
+import pytest
+
+from workspace_secretary.engine.imap_pool import ImapConnectionPool
+
+
+class FakeImapClient:
+    def __init__(self, name):
+        self.name = name
+        self.auth_expiry = None
+        self.alive = True
+        self.reachable = True
+        self.noops = 0
+        self.connects = 0
+
+    def noop(self, timeout=None):
+        self.noops += 1
+        if not self.alive:
+            raise ConnectionError("connection reset")
+
+    def connect(self):
+        if not self.reachable:
+            raise ConnectionError("server unreachable")
+        self.connects += 1
+        self.alive = True
+
+    def disconnect(self):
+        self.alive = False
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def make_pool(opened):
+    pools = []
+
+    def _make(min_size=1, max_size=2, **kwargs):
+        def _connect():
+            client = FakeImapClient(f"conn-{len(opened) + 1}")
+            opened.append(client)
+            return client
+
+        pool = ImapConnectionPool(_connect, min_size, max_size, **kwargs)
+        pool.start()
+        pools.append(pool)
+        return pool
+
+    yield _make
+    for pool in pools:
+        pool.close()
+
+
+def test_pool_grows_to_max_then_times_out(make_pool, opened):
+    pool = make_pool(min_size=1, max_size=2)
+    assert pool.size == 1
+
+    first = pool.get(timeout=1)
+    second = pool.get(timeout=1)
+    assert {first.name, second.name} == {"conn-1", "conn-2"}
+
+    with pytest.raises(Empty):
+        pool.get(timeout=0.05)
+    stats = pool.stats()
+    assert stats["in_use"] == 2
+    assert stats["timeouts"] == 1
+
+
+def test_waiter_gets_returned_connection_and_wait_is_measured(make_pool):
+    pool = make_pool(min_size=1, max_size=1)
+    client = pool.get(timeout=1)
+    threading.Timer(0.1, pool.put, args=(client,)).start()
+
+    assert pool.get(timeout=2) is client
+    assert pool.stats()["wait_seconds_max"] >= 0.05
+
+
+def test_connection_that_raised_is_checked_and_reconnected(make_pool):
+    pool = make_pool(min_size=1, max_size=1)
+
+    with pytest.raises(ConnectionError):
+        with pool.connection(timeout=1) as client:
+            client.alive = False
+            raise ConnectionError("connection reset")
+
+    assert pool.get(timeout=1) is client
+    assert client.noops == 1
+    assert client.connects == 1
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_unreachable_connection_is_replaced(make_pool, opened):
+    pool = make_pool(min_size=1, max_size=1)
+    dead = opened[0]
+    dead.alive = False
+    dead.reachable = False
+    pool.put(pool.get(timeout=1), suspect=True)
+
+    client = pool.get(timeout=3)
+
+    assert client is not dead
+    assert pool.size == 1
+
+
+def test_expiring_token_reconnects_before_checkout(make_pool, opened):
+    pool = make_pool(min_size=1, max_size=1)
+    opened[0].auth_expiry = int(time.time()) + 60
+
+    client = pool.get(timeout=1)
+
+    assert client.connects == 1
+    assert client.noops == 0
+
+
+def test_maintenance_closes_surplus_and_keeps_the_rest_alive(make_pool, opened):
+    clock = FakeClock()
+    pool = make_pool(
+        min_size=1, max_size=3, keepalive_interval=300, idle_timeout=600, clock=clock
+    )
+    clients = [pool.get(timeout=1) for _ in range(3)]
+    for client in clients:
+        pool.put(client)
+
+    clock.now = 700
+    pool.maintain()
+
+    assert pool.size == 1
+    kept = [client for client in clients if client.alive]
+    assert len(kept) == 1
+    assert kept[0].noops == 1
@@ -0,0 +1,226 @@
+from contextlib import contextmanager
+
+import pytest
+
+from workspace_secretary.engine.database import SqliteDatabase, pending_move_folder
+from workspace_secretary.engine.mutations import MAX_ATTEMPTS, MutationDrain
+
+
+class FakeImapClient:
+    def __init__(self):
+        self.commands = []
+        self.fail = None
+        self.copyuid = True
+
+    def _record(self, *command):
+        if self.fail:
+            raise self.fail
+        self.commands.append(command)
+
+    def store_flags(self, folder, uids, flag, value):
+        self._record("store", folder, sorted(uids), flag, value)
+
+    def modify_gmail_labels(self, folder, uids, labels, action):
+        self._record("labels", folder, sorted(uids), list(labels), action)
+
+    def move_emails(self, folder, uids, target_folder):
+        self._record("move", folder, sorted(uids), target_folder)
+        return {uid: uid + 1000 for uid in uids} if self.copyuid else {}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _email(uid, folder="INBOX", is_unread=True, labels=("\\Inbox",)):
+    return {
+        "uid": uid,
+        "folder": folder,
+        "message_id": f"<{uid}@example.com>",
+        "subject": f"Subject {uid}",
+        "from_addr": "alice@example.com",
+        "to_addr": "bob@example.com",
+        "cc_addr": "",
+        "bcc_addr": "",
+        "date": "2026-01-01T10:00:00",
+        "internal_date": "2026-01-01T10:00:00",
+        "body_text": "",
+        "body_html": "",
+        "flags": "" if is_unread else "\\Seen",
+        "is_unread": is_unread,
+        "is_important": False,
+        "size": 100,
+        "modseq": 1,
+        "in_reply_to": "",
+        "references_header": "",
+        "gmail_thread_id": None,
+        "gmail_msgid": None,
+        "gmail_labels": list(labels),
+        "has_attachments": False,
+        "attachment_filenames": None,
+    }
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SqliteDatabase(db_path=str(tmp_path / "secretary.db"))
+    database.initialize()
+    return database
+
+
+@pytest.fixture
+def client():
+    return FakeImapClient()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def moved():
+    return []
+
+
+@pytest.fixture
+def drain(db, client, clock, moved):
+    @contextmanager
+    def _connection():
+        yield client
+
+    return MutationDrain(db, _connection, on_moved=moved.append, clock=clock)
+
+
+def _statuses(db):
+    with db._get_email_connection() as conn:
+        rows = conn.execute("SELECT status FROM mutation_journal ORDER BY id")
+        return [row[0] for row in rows.fetchall()]
+
+
+def _mutation(uid, action, folder="INBOX", **params):
+    return {"uid": uid, "folder": folder, "action": action, "params": params}
+
+
+def test_enqueue_applies_mutations_to_cache_at_once(db):
+    db.upsert_emails_batch([_email(1), _email(2)])
+
+    db.enqueue_mutations(
+        [
+            _mutation(1, "mark_read"),
+            _mutation(1, "labels", labels=["Later"], label_action="add"),
+            _mutation(2, "move", destination="[Gmail]/All Mail"),
+        ]
+    )
+
+    email = db.get_email_by_uid(1, "INBOX")
+    assert not email["is_unread"]
+    assert email["gmail_labels"] == "\\Inbox,Later"
+    assert db.get_email_by_uid(2, "INBOX") is None
+    assert _statuses(db) == ["PENDING"] * 3
+
+
+def test_archiving_a_folder_is_one_move(db, client, drain, moved):
+    db.upsert_emails_batch([_email(uid) for uid in range(1, 501)])
+    db.enqueue_mutations(
+        [
+            _mutation(uid, "move", destination="[Gmail]/All Mail")
+            for uid in range(1, 501)
+        ]
+    )
+
+    assert drain.drain() == 500
+    assert client.commands == [
+        ("move", "INBOX", list(range(1, 501)), "[Gmail]/All Mail")
+    ]
+    assert moved == []
+    assert set(_statuses(db)) == {"COMPLETED"}
+
+
+def test_moved_email_takes_its_copyuid_in_place(db, drain, moved):
+    db.upsert_emails_batch([_email(7, labels=("\\Inbox", "Later"))])
+    db.enqueue_mutations([_mutation(7, "move", destination="Receipts")])
+
+    assert db.get_email_by_uid(7, "INBOX") is None
+    drain.drain()
+
+    email = db.get_email_by_uid(1007, "Receipts")
+    assert email["subject"] == "Subject 7"
+    assert email["gmail_labels"] == "Later,Receipts"
+    assert db.get_email_by_uid(7, pending_move_folder("INBOX")) is None
+    assert moved == []
+
+
+def test_move_without_copyuid_syncs_destination(db, client, drain, moved):
+    db.upsert_emails_batch([_email(7)])
+    db.enqueue_mutations([_mutation(7, "move", destination="Receipts")])
+    client.copyuid = False
+
+    drain.drain()
+
+    assert db.get_email_by_uid(7, pending_move_folder("INBOX")) is None
+    assert moved == ["Receipts"]
+
+
+def test_toggling_back_to_the_original_state_sends_nothing(db, client, drain):
+    db.upsert_emails_batch([_email(1, is_unread=False), _email(2)])
+    db.enqueue_mutations([_mutation(1, "mark_unread"), _mutation(2, "mark_read")])
+    db.enqueue_mutations([_mutation(1, "mark_read"), _mutation(2, "mark_unread")])
+    db.enqueue_mutations([_mutation(2, "mark_read")])
+
+    assert drain.drain() == 5
+    assert client.commands == [("store", "INBOX", [2], "\\Seen", True)]
+    assert set(_statuses(db)) == {"COMPLETED"}
+
+
+def test_label_changes_are_coalesced(db, client, drain):
+    db.upsert_emails_batch([_email(1), _email(2)])
+    for uid in (1, 2):
+        db.enqueue_mutations(
+            [
+                _mutation(uid, "labels", labels=["A", "B"], label_action="add"),
+                _mutation(uid, "labels", labels=["B"], label_action="remove"),
+            ]
+        )
+
+    drain.drain()
+
+    assert client.commands == [("labels", "INBOX", [1, 2], ["A"], "add")]
+
+
+def test_failures_are_retried_then_failed_and_reverted(db, client, clock, drain):
+    db.upsert_emails_batch([_email(1), _email(2, is_unread=False)])
+    db.enqueue_mutations([_mutation(1, "mark_read"), _mutation(2, "mark_unread")])
+    client.fail = RuntimeError("NO [CANNOT] try later")
+
+    for _ in range(1, MAX_ATTEMPTS):
+        drain.drain()
+        assert _statuses(db) == ["PENDING", "PENDING"]
+        assert drain.drain() == 0  # backing off
+        clock.now += 3600
+
+    drain.drain()
+
+    assert _statuses(db) == ["FAILED", "FAILED"]
+    assert db.get_email_by_uid(1, "INBOX")["is_unread"]
+    assert not db.get_email_by_uid(2, "INBOX")["is_unread"]
+
+
+def test_failed_move_puts_email_back(db, client, clock, drain):
+    db.upsert_emails_batch([_email(7)])
+    db.enqueue_mutations(
+        [_mutation(7, "mark_read"), _mutation(7, "move", destination="Archive")]
+    )
+    client.fail = RuntimeError("NO [TRYCREATE] no such mailbox")
+
+    for _ in range(MAX_ATTEMPTS):
+        drain.drain()
+        clock.now += 3600
+
+    email = db.get_email_by_uid(7, "INBOX")
+    assert email["is_unread"]
+    assert db.get_email_by_uid(7, pending_move_folder("INBOX")) is None
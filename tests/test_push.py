@@ -0,0 +1,167 @@
+import imaplib
+import threading
+import time
+
+from workspace_secretary.engine.push import (
+    PushMonitor,
+    dispatch_events,
+    parse_idle_responses,
+)
+
+
+class FakeImapClient:
+    def __init__(self, uids_by_seq):
+        self.uids_by_seq = uids_by_seq
+        self.lookups = []
+
+    def uids_at_sequence(self, folder, seqs):
+        self.lookups.append(list(seqs))
+        return {seq: self.uids_by_seq[seq] for seq in seqs if seq in self.uids_by_seq}
+
+
+def _dispatch(client, responses):
+    changed, flags = [], []
+    events = parse_idle_responses("INBOX", responses)
+    dispatch_events(
+        client,
+        "INBOX",
+        events,
+        changed.append,
+        lambda folder, rows: flags.append((folder, rows)),
+    )
+    return changed, flags
+
+
+def test_new_mail_syncs_only_its_folder():
+    changed, flags = _dispatch(FakeImapClient({}), [(12, b"EXISTS"), (1, b"RECENT")])
+
+    assert changed == ["INBOX"]
+    assert flags == []
+
+
+def test_flag_change_is_applied_without_sync():
+    responses = [
+        (3, b"FETCH", (b"FLAGS", (b"\\Seen",), b"UID", 42, b"MODSEQ", (900,))),
+    ]
+
+    changed, flags = _dispatch(FakeImapClient({}), responses)
+
+    assert changed == []
+    assert flags == [
+        (
+            "INBOX",
+            [
+                {
+                    "uid": 42,
+                    "folder": "INBOX",
+                    "flags": "\\Seen",
+                    "is_unread": False,
+                    "modseq": 900,
+                    "gmail_labels": None,
+                }
+            ],
+        )
+    ]
+
+
+def test_sequence_only_flag_change_is_mapped_to_uid():
+    client = FakeImapClient({3: 42})
+
+    changed, flags = _dispatch(client, [(3, b"FETCH", (b"FLAGS", ()))])
+
+    assert client.lookups == [[3]]
+    assert flags[0][1][0]["uid"] == 42
+    assert flags[0][1][0]["is_unread"]
+    assert changed == []
+
+
+def test_sequence_only_flag_change_after_expunge_falls_back_to_sync():
+    client = FakeImapClient({3: 42})
+
+    changed, flags = _dispatch(
+        client, [(2, b"EXPUNGE"), (3, b"FETCH", (b"FLAGS", (b"\\Seen",)))]
+    )
+
+    assert client.lookups == []
+    assert flags == []
+    assert changed == ["INBOX"]
+
+
+def test_notify_status_marks_other_folder_changed():
+    changed, _ = _dispatch(
+        FakeImapClient({}), [(b"STATUS", b"Work", (b"MESSAGES", 4, b"UIDNEXT", 9))]
+    )
+
+    assert changed == ["Work"]
+
+
+class IdleClient:
+    """Connected client that idles without ever reporting an event."""
+
+    def __init__(self, notify_error=None):
+        self.notify_error = notify_error
+        self.selected = []
+        self.notify_calls = 0
+        self.reconnects = 0
+
+    def has_notify_capability(self):
+        return self.notify_error is not None
+
+    def select_folder(self, folder, readonly=False):
+        self.selected.append(folder)
+
+    def notify_set(self, folders):
+        self.notify_calls += 1
+        raise self.notify_error
+
+    def idle_start(self):
+        pass
+
+    def idle_check(self, timeout):
+        time.sleep(0.01)
+        return []
+
+    def idle_done(self):
+        return []
+
+    def decode_folder_name(self, name):
+        return name
+
+    def connect(self):
+        self.reconnects += 1
+
+    def disconnect(self):
+        pass
+
+
+def test_rejected_notify_falls_back_to_idle_per_folder():
+    first = IdleClient(notify_error=imaplib.IMAP4.error("NOTIFY failed"))
+    opened = {}
+    ready = threading.Event()
+
+    def connect(folder):
+        opened[folder] = IdleClient()
+        if len(opened) == 2:
+            ready.set()
+        return opened[folder]
+
+    monitor = PushMonitor(
+        connect,
+        ["INBOX", "Work", "Sent", "Archive"],
+        max_connections=3,
+        on_change=lambda folder: None,
+        on_flags=lambda folder, rows: None,
+        client=first,
+    )
+    monitor.start()
+    try:
+        assert ready.wait(5)
+        assert monitor.status() == {
+            "mode": "idle",
+            "folders": ["INBOX", "Work", "Sent"],
+        }
+        assert sorted(opened) == ["Sent", "Work"]
+        assert first.notify_calls == 1
+        assert first.reconnects == 0
+    finally:
+        monitor.stop()
@@ -0,0 +1,259 @@
+import pickle
+import threading
+
+import pytest
+
+from workspace_secretary.engine.database import SqliteDatabase
+from workspace_secretary.engine.imap_pool import ImapConnectionPool
+from workspace_secretary.engine.ingest import parse_fetch_batch
+from workspace_secretary.engine.sync_pipeline import SyncJob, SyncPipeline
+from workspace_secretary.engine.sync_planner import FolderSyncPlan
+
+
+def _message_data(uid):
+    header = (
+        f"Message-ID: <{uid}@example.com>\r\n"
+        f"Subject: Subject {uid}\r\n"
+        "From: Alice <alice@example.com>\r\n"
+        "To: bob@example.com\r\n"
+        "Date: Thu, 01 Jan 2026 10:00:00 +0000\r\n\r\n"
+    ).encode()
+    return {
+        b"BODY[HEADER]": header,
+        b"BODYSTRUCTURE": (
+            b"text",
+            b"plain",
+            (b"charset", b"utf-8"),
+            None,
+            None,
+            b"7bit",
+            10,
+            1,
+        ),
+        b"BODY[1]": f"Body {uid}".encode(),
+        b"FLAGS": (b"\\Seen",),
+        b"RFC822.SIZE": 200,
+    }
+
+
+class FakeImapClient:
+    auth_expiry = None
+
+    def __init__(self, fail_folder=None, msgids=None):
+        self.fail_folder = fail_folder
+        self.msgids = msgids or {}
+        self.calls = []
+
+    def noop(self, timeout=None):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def fetch_message_data(self, uids, folder, bodies=True):
+        self.calls.append((folder, list(uids), bodies))
+        if folder == self.fail_folder:
+            raise ConnectionError("connection reset")
+        fetched = {uid: _message_data(uid) for uid in uids}
+        for uid in uids:
+            if uid in self.msgids:
+                fetched[uid][b"X-GM-MSGID"] = self.msgids[uid]
+        return fetched
+
+    def fetch_gmail_metadata(self, uids, folder):
+        return {
+            uid: {
+                b"X-GM-MSGID": self.msgids[uid],
+                b"X-GM-LABELS": (b"\\Important",),
+                b"FLAGS": (),
+            }
+            for uid in uids
+            if uid in self.msgids
+        }
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SqliteDatabase(db_path=str(tmp_path / "secretary.db"))
+    database.initialize()
+    return database
+
+
+def _pool(client):
+    pool = ImapConnectionPool(lambda: client, min_size=1, max_size=1)
+    pool.start()
+    return pool
+
+
+@pytest.fixture
+def pipeline_factory(db):
+    pipelines = []
+
+    def _make(client, **kwargs):
+        pool = _pool(client)
+        pipeline = SyncPipeline(db, pool, fetch_workers=1, **kwargs)
+        pipeline.start()
+        pipelines.append((pipeline, pool))
+        return pipeline
+
+    yield _make
+    for pipeline, pool in pipelines:
+        pipeline.stop()
+        pool.close()
+
+
+def test_jobs_are_fetched_parsed_and_stored(db, pipeline_factory):
+    pipeline = pipeline_factory(FakeImapClient())
+    stored = []
+
+    futures = [
+        pipeline.submit(
+            SyncJob("INBOX", list(range(start, start + 10)), on_stored=stored.append)
+        )
+        for start in (1, 11, 21)
+    ]
+
+    assert sorted(uid for f in futures for uid in f.result(timeout=5)) == list(
+        range(1, 31)
+    )
+    assert len(stored) == 3
+    assert db.count_emails("INBOX") == 30
+    row = db.get_email_by_uid(7, "INBOX")
+    assert row["subject"] == "Subject 7"
+    assert row["body_text"] == "Body 7"
+    assert row["is_unread"] == 0
+
+    stats = pipeline.stats()
+    assert stats["fetch"]["emails"] == 30
+    assert stats["store"]["batches"] == 3
+
+
+def test_header_only_jobs_are_stored_unhydrated(db, pipeline_factory):
+    client = FakeImapClient()
+    pipeline = pipeline_factory(client)
+
+    pipeline.submit(SyncJob("INBOX", [1, 2], bodies=False)).result(timeout=5)
+
+    assert client.calls == [("INBOX", [1, 2], False)]
+    assert sorted(row["uid"] for row in db.get_unhydrated_emails()) == [1, 2]
+
+
+def test_gmail_dedupe_copies_messages_cached_in_another_folder(
+    db, pipeline_factory
+):
+    client = FakeImapClient(msgids={1: 5001, 2: 5002, 101: 5001, 102: 5002, 103: 5003})
+    pipeline = pipeline_factory(client, gmail_dedupe=True)
+    pipeline.submit(SyncJob("INBOX", [1, 2])).result(timeout=5)
+
+    job = SyncJob("[Gmail]/All Mail", [101, 102, 103])
+    stored = pipeline.submit(job).result(timeout=5)
+
+    assert sorted(stored) == [101, 102, 103]
+    assert client.calls[-1] == ("[Gmail]/All Mail", [103], True)
+    assert job.copied_uids == [101, 102]
+    copy = db.get_email_by_uid(101, "[Gmail]/All Mail")
+    assert copy["body_text"] == "Body 1"
+    assert copy["gmail_msgid"] == 5001
+    assert copy["gmail_labels"] == "\\Important"
+    assert copy["is_unread"] == 1
+
+
+def test_fetch_failure_resolves_future_with_error(db, pipeline_factory):
+    pipeline = pipeline_factory(FakeImapClient(fail_folder="Work"))
+
+    failed = pipeline.submit(SyncJob("Work", [1]))
+    ok = pipeline.submit(SyncJob("INBOX", [1]))
+
+    with pytest.raises(ConnectionError):
+        failed.result(timeout=5)
+    assert ok.result(timeout=5) == [1]
+    assert pipeline.stats()["fetch"]["errors"] == 1
+
+
+def test_on_stored_failure_after_complete_does_not_break_release(
+    db, pipeline_factory
+):
+    pipeline = pipeline_factory(FakeImapClient())
+    plan = FolderSyncPlan("INBOX", uidvalidity=1, lo=1, hi=4, missing=[1, 2, 3, 4])
+    unit = plan.next_unit(2)
+
+    def on_stored(uids):
+        plan.complete(unit)
+        raise OSError("disk I/O error")
+
+    failed = pipeline.submit(SyncJob("INBOX", unit.uids, on_stored=on_stored))
+    with pytest.raises(OSError):
+        failed.result(timeout=5)
+
+    plan.release(unit)
+
+    assert plan.missing == [1, 2]
+    assert plan.in_flight == 0
+    assert pipeline.submit(SyncJob("INBOX", [1, 2])).result(timeout=5) == [1, 2]
+
+
+def test_prefetched_batches_skip_the_fetch_stage(db, pipeline_factory):
+    client = FakeImapClient()
+    pipeline = pipeline_factory(client)
+
+    future = pipeline.submit_fetched(SyncJob("INBOX", [5]), {5: _message_data(5)})
+
+    assert future.result(timeout=5) == [5]
+    assert client.calls == []
+
+
+def test_slow_store_applies_backpressure(db):
+    release = threading.Event()
+    original = db.upsert_emails_batch
+
+    def slow_upsert(rows):
+        release.wait(5)
+        return original(rows)
+
+    db.upsert_emails_batch = slow_upsert
+    pool = _pool(FakeImapClient())
+    pipeline = SyncPipeline(db, pool, fetch_workers=1, depth=1)
+    pipeline.start()
+    try:
+        submitted = []
+
+        def _submit_many():
+            for uid in range(1, 11):
+                pipeline.submit(SyncJob("INBOX", [uid]))
+                submitted.append(uid)
+
+        producer = threading.Thread(target=_submit_many, daemon=True)
+        producer.start()
+        producer.join(timeout=1)
+
+        # store holds 1 batch, each queue 1 more, fetch worker 1: the producer
+        # is blocked well before submitting all ten.
+        assert producer.is_alive()
+        assert len(submitted) < 10
+
+        release.set()
+        producer.join(timeout=5)
+        assert len(submitted) == 10
+    finally:
+        release.set()
+        pipeline.stop()
+        pool.close()
+
+
+def test_small_batches_are_parsed_in_thread(db, pipeline_factory):
+    pipeline = pipeline_factory(
+        FakeImapClient(), parse_processes=2, parse_min_batch=50
+    )
+
+    stored = pipeline.submit(SyncJob("INBOX", [1, 2, 3])).result(timeout=5)
+
+    assert stored == [1, 2, 3]
+
+
+def test_parse_input_and_output_survive_pickling():
+    fetched = {uid: _message_data(uid) for uid in (1, 2)}
+
+    rows = parse_fetch_batch("INBOX", pickle.loads(pickle.dumps(fetched)))
+
+    assert pickle.loads(pickle.dumps(rows)) == rows
+    assert [row["body_text"] for row in rows] == ["Body 1", "Body 2"]
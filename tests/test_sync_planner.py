@@ -0,0 +1,258 @@
+from datetime import datetime
+
+import pytest
+
+from workspace_secretary.engine.database import SqliteDatabase
+from workspace_secretary.engine.sync_planner import (
+    SyncScheduler,
+    extend_window_for_new_mail,
+    order_folders,
+    plan_folder_sync,
+)
+
+
+class FakeImapClient:
+    def __init__(self, uids, uidvalidity=1, recent_uids=()):
+        self.uids = sorted(uids)
+        self.uidvalidity = uidvalidity
+        self.recent_uids = list(recent_uids)
+        self.searches = []
+        self.message_ids = {}
+
+    def select_folder(self, folder, readonly=False):
+        return {
+            "exists": len(self.uids),
+            "uidvalidity": self.uidvalidity,
+            "uidnext": (self.uids[-1] + 1) if self.uids else 1,
+            "highestmodseq": 10,
+        }
+
+    def search(self, criteria, folder="INBOX"):
+        if isinstance(criteria, dict):
+            assert datetime.strptime(criteria["since"], "%Y-%m-%d")
+            return self.recent_uids
+        self.searches.append(criteria)
+        lo, hi = criteria.split(" ")[1].split(":")
+        return [uid for uid in self.uids if int(lo) <= uid <= int(hi)]
+
+    def fetch_message_ids(self, folder):
+        return {
+            uid: {
+                "message_id": self.message_ids.get(uid),
+                "gmail_msgid": None,
+                "flags": ["\\Seen"],
+                "modseq": 0,
+                "gmail_labels": None,
+            }
+            for uid in self.uids
+        }
+
+
+def _store(db, folder, uids):
+    db.upsert_emails_batch(
+        [
+            {
+                "uid": uid,
+                "folder": folder,
+                "message_id": f"<{uid}@example.com>",
+                "subject": f"Subject {uid}",
+                "body_text": "",
+                "from_addr": "a@example.com",
+                "to_addr": "b@example.com",
+                "flags": "",
+                "is_unread": True,
+            }
+            for uid in uids
+        ]
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SqliteDatabase(db_path=str(tmp_path / "secretary.db"))
+    database.initialize()
+    return database
+
+
+def test_new_folder_plans_every_uid_once(db):
+    client = FakeImapClient(range(1, 121))
+
+    plan = plan_folder_sync(client, db, "INBOX")
+
+    assert plan.total == 120
+    assert client.searches == ["UID 1:120"]
+    state = db.get_folder_state("INBOX")
+    assert state["uidnext"] == 121
+    assert (state["backfill_lo"], state["backfill_hi"]) == (1, 120)
+
+
+def test_units_are_handed_out_newest_first(db):
+    client = FakeImapClient(range(1, 121))
+    plan = plan_folder_sync(client, db, "INBOX")
+
+    unit = plan.next_unit(50)
+    _store(db, "INBOX", unit.uids)
+    plan.complete(unit)
+    db.save_sync_cursor("INBOX", plan.lo, plan.hi)
+
+    assert (unit.lo, unit.hi) == (71, 120)
+    assert (plan.lo, plan.hi) == (1, 70)
+    assert db.get_folder_state("INBOX")["backfill_hi"] == 70
+
+
+def test_out_of_order_completion_keeps_window_at_pending_unit(db):
+    plan = plan_folder_sync(FakeImapClient(range(1, 31)), db, "INBOX")
+
+    first = plan.next_unit(10)
+    second = plan.next_unit(10)
+    plan.complete(second)
+    assert plan.hi == 30
+
+    plan.complete(first)
+    assert plan.hi == 10
+
+
+def test_restart_resumes_from_window_without_full_rescan(db):
+    client = FakeImapClient(range(1, 121))
+    plan = plan_folder_sync(client, db, "INBOX")
+    unit = plan.next_unit(50)
+    _store(db, "INBOX", unit.uids)
+    plan.complete(unit)
+    db.save_sync_cursor("INBOX", plan.lo, plan.hi)
+
+    restarted_client = FakeImapClient(range(1, 121))
+    resumed = plan_folder_sync(restarted_client, db, "INBOX")
+
+    assert restarted_client.searches == ["UID 1:70"]
+    assert resumed.total == 70
+    assert resumed.next_unit(50).hi == 70
+
+
+def test_already_synced_uids_are_skipped_on_first_plan(db):
+    _store(db, "INBOX", range(11, 21))
+
+    plan = plan_folder_sync(FakeImapClient(range(1, 21)), db, "INBOX")
+
+    assert plan.total == 10
+    assert (plan.lo, plan.hi) == (1, 10)
+
+
+def test_released_unit_is_handed_out_again(db):
+    plan = plan_folder_sync(FakeImapClient(range(1, 21)), db, "INBOX")
+
+    unit = plan.next_unit(10)
+    plan.release(unit)
+
+    assert plan.next_unit(10).uids == list(range(11, 21))
+
+
+def test_completed_folder_needs_no_search(db):
+    client = FakeImapClient(range(1, 11))
+    plan = plan_folder_sync(client, db, "INBOX")
+    unit = plan.next_unit(50)
+    _store(db, "INBOX", unit.uids)
+    plan.complete(unit)
+    db.save_sync_cursor("INBOX", plan.lo, plan.hi)
+
+    client.searches.clear()
+    again = plan_folder_sync(client, db, "INBOX")
+
+    assert again.done
+    assert client.searches == []
+
+
+def test_recent_only_units_stop_at_cutoff(db):
+    client = FakeImapClient(range(1, 101), recent_uids=range(91, 101))
+    plan = plan_folder_sync(client, db, "INBOX", recent_days=30)
+
+    assert plan.recent_floor == 91
+    first = plan.next_unit(50, recent_only=True)
+    assert first.uids == list(range(91, 101))
+    assert not plan.has_recent
+    assert plan.next_unit(50, recent_only=True) is None
+    assert plan.next_unit(50).uids == list(range(41, 91))
+
+
+def test_no_recent_mail_means_nothing_recent(db):
+    client = FakeImapClient(range(1, 11), recent_uids=[])
+    plan = plan_folder_sync(client, db, "INBOX", recent_days=30)
+
+    assert not plan.has_recent
+
+
+def test_order_folders_puts_inbox_first_and_archives_last():
+    folders = ["[Gmail]/All Mail", "Work", "INBOX", "[Gmail]/Sent Mail"]
+
+    assert order_folders(folders) == [
+        "INBOX",
+        "Work",
+        "[Gmail]/Sent Mail",
+        "[Gmail]/All Mail",
+    ]
+
+
+def test_scheduler_spreads_one_folder_over_consecutive_units(db):
+    inbox = plan_folder_sync(FakeImapClient(range(1, 21)), db, "INBOX")
+    archive = plan_folder_sync(FakeImapClient(range(1, 301)), db, "[Gmail]/All Mail")
+    scheduler = SyncScheduler([archive, inbox])
+
+    taken = [scheduler.next_unit(50) for _ in range(4)]
+
+    assert [(plan.folder, unit.hi) for plan, unit in taken] == [
+        ("INBOX", 20),
+        ("[Gmail]/All Mail", 300),
+        ("[Gmail]/All Mail", 250),
+        ("[Gmail]/All Mail", 200),
+    ]
+    assert inbox.in_flight == 1
+
+
+def test_scheduler_is_done_when_every_plan_is(db):
+    plan = plan_folder_sync(FakeImapClient(range(1, 11)), db, "INBOX")
+    scheduler = SyncScheduler([plan])
+
+    _, unit = scheduler.next_unit(50)
+    assert scheduler.next_unit(50) is None
+    assert not scheduler.done
+
+    plan.complete(unit)
+    assert scheduler.done
+
+
+def test_new_mail_extends_completed_window(db):
+    client = FakeImapClient(range(1, 11))
+    plan = plan_folder_sync(client, db, "INBOX")
+    unit = plan.next_unit(50)
+    _store(db, "INBOX", unit.uids)
+    db.save_sync_cursor("INBOX", *plan.complete(unit))
+
+    extend_window_for_new_mail(db, "INBOX", stored_uidnext=11, uidnext=16)
+
+    state = db.get_folder_state("INBOX")
+    assert (state["backfill_lo"], state["backfill_hi"]) == (11, 15)
+    resumed = plan_folder_sync(FakeImapClient(range(1, 16)), db, "INBOX")
+    assert resumed.total == 5
+
+
+def test_new_mail_keeps_unfinished_backfill(db):
+    plan_folder_sync(FakeImapClient(range(1, 101)), db, "INBOX")
+    db.save_sync_cursor("INBOX", 1, 40)
+
+    extend_window_for_new_mail(db, "INBOX", stored_uidnext=101, uidnext=121)
+
+    state = db.get_folder_state("INBOX")
+    assert (state["backfill_lo"], state["backfill_hi"]) == (1, 120)
+
+
+def test_uidvalidity_change_remaps_cached_emails(db):
+    _store(db, "INBOX", [1, 2, 3])
+    plan_folder_sync(FakeImapClient([1, 2, 3]), db, "INBOX")
+    client = FakeImapClient([11, 12, 13, 14], uidvalidity=2)
+    client.message_ids = {11: "<2@example.com>", 12: "<1@example.com>"}
+
+    plan = plan_folder_sync(client, db, "INBOX")
+
+    assert plan.missing == [13, 14]
+    assert db.get_email_by_uid(11, "INBOX")["subject"] == "Subject 2"
+    assert not db.get_email_by_uid(12, "INBOX")["is_unread"]
+    assert sorted(db.get_synced_uids("INBOX")) == [11, 12]
@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from workspace_secretary.config import OAuth2Config
+from workspace_secretary.engine.oauth2 import TokenProvider
+
+
+def _config(**overrides):
+    values = {
+        "client_id": "client-id",
+        "client_secret": "client-secret",
+        "refresh_token": "refresh-1",
+        "access_token": "stale",
+        "token_expiry": int(time.time()) - 10,
+    }
+    values.update(overrides)
+    return OAuth2Config(**values)
+
+
+def _response(access_token="fresh", delay=0.0):
+    def _post(*args, **kwargs):
+        time.sleep(delay)
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {"access_token": access_token, "expires_in": 3600}
+        return response
+
+    return _post
+
+
+@pytest.fixture
+def post():
+    with mock.patch("workspace_secretary.engine.oauth2.requests.post") as post:
+        post.side_effect = _response()
+        yield post
+
+
+def test_valid_token_is_not_refreshed(post):
+    provider = TokenProvider(_config(token_expiry=int(time.time()) + 3600))
+
+    assert provider.get_access_token()[0] == "stale"
+    post.assert_not_called()
+
+
+def test_concurrent_callers_share_one_refresh(post):
+    post.side_effect = _response(delay=0.2)
+    provider = TokenProvider(_config())
+    tokens = []
+
+    threads = [
+        threading.Thread(target=lambda: tokens.append(provider.get_access_token()[0]))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tokens == ["fresh"] * 5
+    assert post.call_count == 1
+    assert provider.refreshes == 1
+
+
+def test_refreshed_token_is_saved_to_token_file(post, tmp_path):
+    token_path = tmp_path / "token.json"
+    token_path.write_text(
+        json.dumps({"imap": {"oauth2": {"refresh_token": "refresh-1"}}, "other": 1})
+    )
+    token_path.chmod(0o600)
+
+    TokenProvider(_config(), token_path).get_access_token()
+
+    saved = json.loads(token_path.read_text())
+    assert saved["imap"]["oauth2"]["access_token"] == "fresh"
+    assert saved["imap"]["oauth2"]["token_expiry"] > time.time()
+    assert saved["other"] == 1
+    assert token_path.stat().st_mode & 0o777 == 0o600
+
+
+def test_token_file_of_another_account_is_left_alone(post, tmp_path):
+    token_path = tmp_path / "token.json"
+    token_path.write_text(json.dumps({"refresh_token": "someone-else"}))
+
+    TokenProvider(_config(), token_path).get_access_token()
+
+    assert json.loads(token_path.read_text()) == {"refresh_token": "someone-else"}
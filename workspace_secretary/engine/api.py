@@ -1,20 +1,19 @@
 import asyncio
+import functools
+import json
 import logging
 import os
 import smtplib
-import threading
+import time
+import weakref
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-import re
-from email.utils import parseaddr
-
-import idna
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from pathlib import Path
-from queue import Queue, Empty
-from typing import Any, Optional, TYPE_CHECKING, cast
+from queue import Empty
+from typing import Any, Optional, cast
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Query, UploadFile, File, Form
@@ -25,16 +24,69 @@ import io
 from workspace_secretary.config import load_config, ServerConfig, ImapConfig
 from workspace_secretary.engine.imap_sync import ImapClient
 from workspace_secretary.engine.calendar_sync import CalendarClient
+from workspace_secretary.engine.catchup import CatchupSchedule, count_changes
 from workspace_secretary.engine.database import DatabaseInterface, create_database
-
-if TYPE_CHECKING:
-    from workspace_secretary.models import Email
+from workspace_secretary.engine.expunge import find_expunged_uids
+from workspace_secretary.engine.imap_pool import ImapConnectionPool
+from workspace_secretary.engine.mutations import MutationDrain
+from workspace_secretary.engine.oauth2 import token_provider
+from workspace_secretary.engine.push import PushMonitor
+from workspace_secretary.engine.sync_planner import (
+    FolderSyncPlan,
+    SyncScheduler,
+    WorkUnit,
+    extend_window_for_new_mail,
+    order_folders,
+    plan_folder_sync,
+)
+from workspace_secretary.engine.sync_pipeline import SyncJob, SyncPipeline
 
 logger = logging.getLogger(__name__)
 
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
 MAX_SYNC_CONNECTIONS = int(os.environ.get("MAX_SYNC_CONNECTIONS", "5"))
+# The sync pool keeps this many connections open when idle and opens more, up
+# to MAX_SYNC_CONNECTIONS, while work is waiting for one. Idle connections get
+# a NOOP every IMAP_POOL_KEEPALIVE seconds; those above the minimum are closed
+# after IMAP_POOL_IDLE_TIMEOUT seconds.
+IMAP_POOL_MIN_CONNECTIONS = int(os.environ.get("IMAP_POOL_MIN_CONNECTIONS", "1"))
+IMAP_POOL_KEEPALIVE = float(os.environ.get("IMAP_POOL_KEEPALIVE", "300"))
+IMAP_POOL_IDLE_TIMEOUT = float(os.environ.get("IMAP_POOL_IDLE_TIMEOUT", "600"))
+# Ask for COMPRESS=DEFLATE (RFC 4978) on sync pool and IDLE connections when
+# the server offers it. Saves bandwidth at the cost of some CPU.
+IMAP_COMPRESS = os.environ.get("IMAP_COMPRESS", "false").lower() == "true"
+SYNC_BATCH_SIZE = 50
+# Initial sync fetches mail newer than this many days in every folder before
+# backfilling older mail. 0 disables the split.
+SYNC_RECENT_DAYS = int(os.environ.get("SYNC_RECENT_DAYS", "30"))
+# Initial sync stores headers, flags and BODYSTRUCTURE only; bodies are
+# downloaded afterwards by the hydration loop (or on demand when opened).
+SYNC_HEADERS_FIRST = os.environ.get("SYNC_HEADERS_FIRST", "true").lower() == "true"
+BODY_HYDRATION_BATCH = int(os.environ.get("BODY_HYDRATION_BATCH", "25"))
+BODY_HYDRATION_DELAY = float(os.environ.get("BODY_HYDRATION_DELAY", "2.0"))
+# Failed body fetches after which a row is left header-only (it can still be
+# hydrated on demand), so unfetchable rows do not block the rest of the queue.
+BODY_HYDRATION_ATTEMPTS = int(os.environ.get("BODY_HYDRATION_ATTEMPTS", "3"))
+# Batches each sync pipeline queue holds before the stage feeding it blocks.
+SYNC_PIPELINE_DEPTH = int(os.environ.get("SYNC_PIPELINE_DEPTH", "4"))
+# Processes used to parse fetched mail; 0 parses on the pipeline thread.
+# Batches smaller than SYNC_PARSE_MIN_BATCH are always parsed in-thread.
+SYNC_PARSE_PROCESSES = int(os.environ.get("SYNC_PARSE_PROCESSES", "0"))
+SYNC_PARSE_MIN_BATCH = int(os.environ.get("SYNC_PARSE_MIN_BATCH", "20"))
+# On Gmail, messages already cached from another folder (same X-GM-MSGID) are
+# copied locally instead of being downloaded, parsed and embedded again.
+SYNC_GMAIL_DEDUPE = os.environ.get("SYNC_GMAIL_DEDUPE", "true").lower() == "true"
+# IDLE connections opened to watch folders beyond INBOX when the server has no
+# NOTIFY; folders past this count wait for catch-up sync.
+PUSH_IDLE_CONNECTIONS = int(os.environ.get("PUSH_IDLE_CONNECTIONS", "3"))
+# Catch-up polls each folder about once per expected change, learned from its
+# history, within these bounds. SYNC_CATCHUP_INTERVAL applies to folders with
+# no history yet and is the shortest interval for folders the push monitor
+# already watches.
+SYNC_CATCHUP_INTERVAL = int(os.environ.get("SYNC_CATCHUP_INTERVAL", "1800"))
+SYNC_CATCHUP_MIN_INTERVAL = int(os.environ.get("SYNC_CATCHUP_MIN_INTERVAL", "60"))
+SYNC_CATCHUP_MAX_INTERVAL = int(os.environ.get("SYNC_CATCHUP_MAX_INTERVAL", "21600"))
 
 SOCKET_PATH = os.environ.get("ENGINE_SOCKET", "/tmp/secretary-engine.sock")
 
@@ -61,21 +113,36 @@ class EngineState:
         self.database: Optional[DatabaseInterface] = None
         self.sync_task: Optional[asyncio.Task] = None
         self.idle_task: Optional[asyncio.Task] = None
+        self.push_monitor: Optional[PushMonitor] = None
+        self.mutation_drain: Optional[MutationDrain] = None
+        self.mutation_task: Optional[asyncio.Task] = None
+        self.catchup: Optional[CatchupSchedule] = None
         self.embeddings_task: Optional[asyncio.Task] = None
+        self.hydration_task: Optional[asyncio.Task] = None
         self.enrollment_task: Optional[asyncio.Task] = None
         self.running = False
         self.enrolled = False
         self.enrollment_error: Optional[str] = None
-        self._sync_debounce_task: Optional[asyncio.Task] = None
+        # Pending debounced syncs, keyed by folder (None for every folder).
+        self._sync_debounce_tasks: dict[Optional[str], asyncio.Task] = {}
         self._sync_debounce_delay: float = 2.0
         self._embeddings_consecutive_failures: int = 0
         self._embeddings_cooldown_until: Optional[datetime] = None
         self._sync_executor: Optional[ThreadPoolExecutor] = None
-        self._imap_pool: Queue[ImapClient] = Queue()
-        self._imap_pool_size: int = 0
+        self._imap_pool: Optional[ImapConnectionPool] = None
+        # Connections opened with IMAP_COMPRESS, by role, for /api/status.
+        self._compressed_clients: weakref.WeakKeyDictionary = (
+            weakref.WeakKeyDictionary()
+        )
+        self.sync_pipeline: Optional[SyncPipeline] = None
         self._pool_init_lock: Optional[asyncio.Lock] = (
             None  # Initialized lazily per event loop
         )
+        # Held while folders are planned and synced, so a catch-up triggered
+        # by IDLE never plans a backfill window the initial sync is working on.
+        self._plan_run_lock: Optional[asyncio.Lock] = None
+        self.initial_sync_started: Optional[float] = None
+        self.inbox_ready_seconds: Optional[float] = None
 
 
 state = EngineState()
@@ -88,6 +155,11 @@ class EmailMoveRequest(BaseModel):
     destination: str
 
 
+class EmailHydrateRequest(BaseModel):
+    uid: int
+    folder: str
+
+
 class EmailMarkRequest(BaseModel):
     uid: int
     folder: str
@@ -100,6 +172,23 @@ class EmailLabelsRequest(BaseModel):
     action: str  # "add", "remove", "set"
 
 
+class EmailRef(BaseModel):
+    uid: int
+    folder: str
+
+
+class EmailBatchOperation(BaseModel):
+    action: str  # "mark_read", "mark_unread", "move", "labels"
+    destination: Optional[str] = None
+    labels: Optional[list[str]] = None
+    label_action: str = "add"  # "add", "remove", "set"
+
+
+class EmailBatchRequest(BaseModel):
+    emails: list[EmailRef]
+    operations: list[EmailBatchOperation]
+
+
 class CalendarEventRequest(BaseModel):
     summary: str
     start_time: str
@@ -228,8 +317,10 @@ async def try_enroll() -> bool:
             state.idle_client = ImapClient(
                 state.config.imap,
                 allowed_folders=["INBOX"],
+                compress=IMAP_COMPRESS,
             )
             state.idle_client.connect()
+            _track_compression(state.idle_client, "idle:INBOX")
             logger.info("IDLE client connected for push notifications")
 
         # Connect Calendar if enabled
@@ -365,8 +456,22 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down secretary-engine...")
     state.running = False
 
+    if state.mutation_task:
+        state.mutation_task.cancel()
+        try:
+            await state.mutation_task
+        except asyncio.CancelledError:
+            pass
+
     _shutdown_connection_pool()
 
+    if state.hydration_task:
+        state.hydration_task.cancel()
+        try:
+            await state.hydration_task
+        except asyncio.CancelledError:
+            pass
+
     if state.sync_task:
         state.sync_task.cancel()
         try:
@@ -440,18 +545,23 @@ async def sync_loop():
     """Background sync loop for email and calendar.
 
     - Initial sync: lockstep batch sync+embed (50 emails at a time)
-    - After initial: IDLE handles INBOX push, periodic sync catches missed updates
+    - After initial: the push monitor syncs folders as they change, adaptive
+      catch-up polls every folder at its own rate for missed updates and
+      folders without push
     - Embeddings loop starts after initial sync for steady-state
     """
-    catchup_interval = int(
-        os.environ.get("SYNC_CATCHUP_INTERVAL", "1800")
-    )  # 30 min default
     logger.info("Sync loop started")
 
     if state.idle_client and state.idle_client.has_idle_capability():
         logger.info("Starting IDLE monitor for push notifications")
         state.idle_task = asyncio.create_task(idle_monitor())
 
+    if SYNC_HEADERS_FIRST and not state.hydration_task:
+        state.hydration_task = asyncio.create_task(hydration_loop())
+
+    if not state.mutation_task:
+        state.mutation_task = asyncio.create_task(mutation_drain_loop())
+
     initial_sync_done = False
 
     while state.running:
@@ -468,276 +578,401 @@ async def sync_loop():
                         )
                         state.embeddings_task = asyncio.create_task(embeddings_loop())
 
+                    state.catchup = _build_catchup_schedule()
                     logger.info(
-                        f"Initial sync complete. Catch-up every {catchup_interval}s"
+                        "Initial sync complete. Catch-up every "
+                        f"{SYNC_CATCHUP_MIN_INTERVAL}-{SYNC_CATCHUP_MAX_INTERVAL}s "
+                        "depending on folder activity"
                     )
                 else:
-                    logger.debug("Running periodic catch-up sync...")
-                    await sync_emails_parallel()
+                    await catchup_sync()
         except Exception as e:
             logger.error(f"Sync error: {e}")
 
-        if initial_sync_done:
-            await asyncio.sleep(catchup_interval)
+        if state.catchup:
+            await asyncio.sleep(max(1.0, state.catchup.seconds_until_due()))
         else:
             await asyncio.sleep(5)
 
 
+def _build_catchup_schedule() -> CatchupSchedule:
+    """Create the catch-up schedule, seeded with persisted change rates."""
+    folders = order_folders(
+        (state.config.allowed_folders if state.config else None) or ["INBOX"]
+    )
+    rates: dict[str, Optional[float]] = {}
+    if state.database:
+        for folder in folders:
+            folder_state = state.database.get_folder_state(folder)
+            rates[folder] = folder_state.get("change_rate") if folder_state else None
+    return CatchupSchedule(
+        folders,
+        default_interval=SYNC_CATCHUP_INTERVAL,
+        min_interval=SYNC_CATCHUP_MIN_INTERVAL,
+        max_interval=SYNC_CATCHUP_MAX_INTERVAL,
+        rates=rates,
+    )
+
+
+async def catchup_sync():
+    """Poll the folders that are due with STATUS and sync the ones that changed."""
+    schedule = state.catchup
+    if not schedule or not state.database:
+        return
+
+    schedule.set_pushed(state.push_monitor.watched if state.push_monitor else [])
+    due = schedule.due()
+    if not due or not await _ensure_connection_pool():
+        return
+
+    loop = asyncio.get_running_loop()
+    changes = await loop.run_in_executor(state._sync_executor, _probe_folders, due)
+
+    changed = []
+    for folder in due:
+        count = changes.get(folder)
+        rate = schedule.observe(folder, count)
+        if count is None or count > 0:
+            changed.append(folder)
+        if count is not None and rate is not None:
+            state.database.save_change_rate(folder, rate)
+
+    logger.debug(
+        f"Catch-up polled {len(due)} folders, {len(changed)} changed: "
+        f"{', '.join(changed) or 'none'}"
+    )
+    if changed:
+        await sync_emails_parallel(changed, probe=False)
+
+
+def _probe_folders(folders: list[str]) -> dict[str, Optional[int]]:
+    """Count changes in every folder with one bulk STATUS probe.
+
+    Uses one pooled connection and a single LIST-STATUS (or pipelined STATUS)
+    exchange. Folders the probe could not answer for map to None.
+    """
+    results: dict[str, Optional[int]] = {folder: None for folder in folders}
+    if not state.database or not state._imap_pool:
+        return results
+
+    try:
+        with state._imap_pool.connection(timeout=60) as client:
+            statuses = client.folders_status(folders)
+    except Empty:
+        logger.warning("No available connection for STATUS probe")
+        return results
+    except Exception as e:
+        logger.warning(f"STATUS probe failed: {e}")
+        return results
+
+    for folder, status in statuses.items():
+        results[folder] = count_changes(
+            state.database.get_folder_state(folder),
+            status,
+            state.database.count_emails(folder),
+        )
+    return results
+
+
+def _track_compression(client: ImapClient, role: str) -> None:
+    if client.compress:
+        state._compressed_clients[client] = role
+
+
+def _compression_status() -> Optional[dict[str, Any]]:
+    """Byte counters of every compressed connection, and their totals."""
+    if not IMAP_COMPRESS:
+        return None
+    connections = [
+        {"role": role, **client.compression.stats()}
+        for client, role in list(state._compressed_clients.items())
+        if client.compression
+    ]
+    totals = {
+        key: sum(connection[key] for connection in connections)
+        for key in (
+            "bytes_received",
+            "bytes_received_wire",
+            "bytes_sent",
+            "bytes_sent_wire",
+        )
+    }
+    return {**totals, "connections": connections}
+
+
 def _init_connection_pool():
     """Initialize the IMAP connection pool for parallel sync."""
     if not state.config:
         return
 
-    pool_size = min(
-        MAX_SYNC_CONNECTIONS, len(state.config.allowed_folders or ["INBOX"])
+    # Work units are not tied to a folder, so a single large folder can keep
+    # every connection busy; the pool only opens them while work is waiting.
+    pool_size = max(1, MAX_SYNC_CONNECTIONS)
+    config = state.config
+
+    def _connect() -> ImapClient:
+        client = ImapClient(
+            config.imap,
+            allowed_folders=config.allowed_folders,
+            compress=IMAP_COMPRESS,
+        )
+        client.connect()
+        _track_compression(client, "sync")
+        return client
+
+    pool = ImapConnectionPool(
+        _connect,
+        min_size=IMAP_POOL_MIN_CONNECTIONS,
+        max_size=pool_size,
+        keepalive_interval=IMAP_POOL_KEEPALIVE,
+        idle_timeout=IMAP_POOL_IDLE_TIMEOUT,
     )
+    opened = pool.start()
+    if not opened and pool.min_size:
+        logger.error("Failed to open any IMAP connection for the sync pool")
+        pool.close()
+        return
+
+    state._imap_pool = pool
     state._sync_executor = ThreadPoolExecutor(
         max_workers=pool_size, thread_name_prefix="imap-sync"
     )
-
-    logger.info(f"Creating {pool_size} IMAP connections for sync pool...")
-
-    for i in range(pool_size):
-        try:
-            logger.debug(f"Connecting sync connection {i + 1}/{pool_size}...")
-            client = ImapClient(
-                state.config.imap,
-                allowed_folders=state.config.allowed_folders,
-            )
-            client.connect()
-            state._imap_pool.put(client)
-            state._imap_pool_size += 1
-            logger.debug(f"Created sync connection {i + 1}/{pool_size}")
-        except Exception as e:
-            logger.error(f"Failed to create sync connection {i + 1}: {e}")
-
     logger.info(
-        f"IMAP connection pool initialized with {state._imap_pool_size} connections"
+        f"IMAP connection pool initialized with {opened} connections "
+        f"(up to {pool_size})"
     )
 
+    if state.database and not state.sync_pipeline:
+        state.sync_pipeline = SyncPipeline(
+            state.database,
+            pool,
+            fetch_workers=pool_size,
+            depth=SYNC_PIPELINE_DEPTH,
+            parse_processes=SYNC_PARSE_PROCESSES,
+            parse_min_batch=SYNC_PARSE_MIN_BATCH,
+            gmail_dedupe=SYNC_GMAIL_DEDUPE,
+        )
+        state.sync_pipeline.start()
+
 
 def _shutdown_connection_pool():
     """Shutdown the IMAP connection pool."""
+    if state.sync_pipeline:
+        state.sync_pipeline.stop()
+        state.sync_pipeline = None
+
     if state._sync_executor:
         state._sync_executor.shutdown(wait=False)
         state._sync_executor = None
 
-    while not state._imap_pool.empty():
-        try:
-            client = state._imap_pool.get_nowait()
-            try:
-                client.disconnect()
-            except Exception:
-                pass
-        except Empty:
-            break
-
-    state._imap_pool_size = 0
+    if state._imap_pool:
+        state._imap_pool.close()
+        state._imap_pool = None
     logger.info("IMAP connection pool shutdown")
 
 
-def _sync_folder_worker(folder: str) -> int:
-    """Sync a single folder using a connection from the pool.
+async def _ensure_connection_pool() -> bool:
+    """Create the sync connection pool if needed; False if it has no connections."""
+    if state._pool_init_lock is None:
+        state._pool_init_lock = asyncio.Lock()
+
+    if state._imap_pool is None:
+        async with state._pool_init_lock:
+            if state._imap_pool is None:
+                logger.info("Initializing IMAP connection pool...")
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, _init_connection_pool)
+
+    if state._imap_pool is None:
+        logger.error("No IMAP connections available after pool init")
+        return False
+    return True
+
+
+def _refresh_folder_worker(folder: str) -> Optional[FolderSyncPlan]:
+    """Refresh a folder using a connection from the pool.
 
-    Returns the number of emails synced.
+    The connection is returned before any mail is fetched; the returned plan
+    is synced by the pipeline on whichever connections are free.
     """
-    if not state.database or not state.config:
-        return 0
+    if not state.database or not state.config or not state._imap_pool:
+        return None
 
     try:
-        client = state._imap_pool.get(timeout=60)
+        with state._imap_pool.connection(timeout=60) as client:
+            return _refresh_folder(client, folder)
     except Empty:
         logger.warning(f"No available connection for folder {folder}")
-        return 0
+        return None
 
-    try:
-        return _sync_single_folder(client, folder)
-    finally:
-        state._imap_pool.put(client)
 
+def _refresh_folder(client: ImapClient, folder: str) -> Optional[FolderSyncPlan]:
+    """Apply flag changes and plan the sync of new mail for one folder.
+
+    New UIDs are added to the folder's persisted backfill window, so they are
+    fetched by the same resumable work units as the initial sync and a crash
+    mid-way only loses the units that were in flight.
 
-def _sync_single_folder(client: ImapClient, folder: str) -> int:
-    """Sync a single folder with the given client. Returns emails synced."""
+    Returns the plan, or None if nothing changed.
+    """
     if not state.database:
-        return 0
+        return None
 
     try:
         folder_state = state.database.get_folder_state(folder)
         folder_info = client.select_folder(folder, readonly=True)
 
         current_uidvalidity = folder_info.get("uidvalidity", 0)
+        current_uidnext = folder_info.get("uidnext", 1)
         current_highestmodseq = folder_info.get("highestmodseq", 0)
 
-        stored_uidvalidity = folder_state.get("uidvalidity", 0) if folder_state else 0
-        stored_highestmodseq = (
-            folder_state.get("highestmodseq", 0) if folder_state else 0
+        if not folder_state or folder_state.get("uidvalidity") != current_uidvalidity:
+            # New folder or UIDVALIDITY change: the planner starts from scratch.
+            return plan_folder_sync(client, state.database, folder)
+
+        stored_highestmodseq = folder_state.get("highestmodseq", 0)
+        stored_uidnext = folder_state.get("uidnext", 1)
+        backfill_lo = folder_state.get("backfill_lo")
+        backfill_hi = folder_state.get("backfill_hi")
+        window_open = (
+            backfill_lo is not None
+            and backfill_hi is not None
+            and backfill_lo <= backfill_hi
         )
-        stored_uidnext = folder_state.get("uidnext", 1) if folder_state else 1
-
-        if stored_uidvalidity != current_uidvalidity and stored_uidvalidity != 0:
-            logger.warning(f"UIDVALIDITY changed for {folder}, clearing cache")
-            state.database.clear_folder(folder)
-            stored_uidnext = 1
-            stored_highestmodseq = 0
 
+        current_exists = folder_info.get("exists", 0)
         has_condstore = client.has_condstore_capability()
 
         if (
             has_condstore
             and stored_highestmodseq > 0
             and current_highestmodseq == stored_highestmodseq
+            and not window_open
+            and (
+                client.qresync_enabled
+                or current_exists == state.database.count_emails(folder)
+            )
         ):
             logger.debug(f"HIGHESTMODSEQ unchanged for {folder}, skipping sync")
-            return 0
+            return None
 
         if has_condstore and stored_highestmodseq > 0:
             changed = client.fetch_changed_since(folder, stored_highestmodseq)
-            for uid, data in changed.items():
-                state.database.update_email_flags(
-                    uid=uid,
-                    folder=folder,
-                    flags=",".join(data["flags"]),
-                    is_unread="\\Seen" not in data["flags"],
-                    modseq=data["modseq"],
-                    gmail_labels=data.get("gmail_labels"),
-                )
+            state.database.update_flags_batch(
+                [
+                    {
+                        "uid": uid,
+                        "folder": folder,
+                        "flags": ",".join(data["flags"]),
+                        "is_unread": "\\Seen" not in data["flags"],
+                        "modseq": data["modseq"],
+                        "gmail_labels": data.get("gmail_labels"),
+                    }
+                    for uid, data in changed.items()
+                ]
+            )
             if changed:
                 logger.info(f"Updated flags for {len(changed)} emails in {folder}")
 
-        uids = client.search(f"UID {stored_uidnext}:*", folder=folder)
-        new_uids = [uid for uid in uids if uid >= stored_uidnext]
-
-        total_synced = 0
-        total_to_sync = len(new_uids) if new_uids else 0
-
-        if new_uids:
-            new_uids_desc = sorted(new_uids, reverse=True)
-            logger.info(f"[{folder}] Starting sync of {total_to_sync} emails")
-
-            for i in range(0, len(new_uids_desc), 50):
-                batch = new_uids_desc[i : i + 50]
-                emails = client.fetch_emails(batch, folder, limit=50)
-                for uid, email_obj in emails.items():
-                    params = _email_to_db_params(email_obj, folder)
-                    state.database.upsert_email(**params)
-                total_synced += len(emails)
-                logger.info(f"[{folder}] {total_synced}/{total_to_sync} emails synced")
-
-            max_uid = max(new_uids)
-        else:
-            max_uid = stored_uidnext - 1
+        if client.qresync_enabled and stored_highestmodseq > 0:
+            _delete_expunged(
+                folder, client.fetch_vanished_since(folder, stored_highestmodseq)
+            )
 
+        extend_window_for_new_mail(
+            state.database, folder, stored_uidnext, current_uidnext
+        )
         state.database.save_folder_state(
             folder=folder,
             uidvalidity=current_uidvalidity,
-            uidnext=max_uid + 1,
+            uidnext=max(current_uidnext, stored_uidnext),
             highestmodseq=current_highestmodseq,
         )
 
-        return total_synced
+        plan = plan_folder_sync(client, state.database, folder)
 
-    except Exception as e:
-        logger.error(f"Error syncing folder {folder}: {e}")
-        return 0
-
-
-def _sync_next_batch(
-    client: ImapClient,
-    folder: str,
-    batch_size: int = 50,
-    synced_uids_set: set[int] | None = None,
-) -> tuple[list[int], bool]:
-    """Sync next batch of emails not yet in DB.
-
-    Returns (synced_uids, has_more).
-    """
-    if not state.database or not state.config:
-        return [], False
-
-    try:
-        folder_info = client.select_folder(folder, readonly=True)
-        current_uidvalidity = folder_info.get("uidvalidity", 0)
-        current_highestmodseq = folder_info.get("highestmodseq", 0)
-
-        all_imap_uids = client.search("ALL", folder=folder)
-
-        if synced_uids_set is None:
-            synced_uids_set = set(state.database.get_synced_uids(folder))
-
-        missing_uids = sorted(
-            [uid for uid in all_imap_uids if uid not in synced_uids_set]
-        )
-
-        if not missing_uids:
-            state.database.save_folder_state(
-                folder=folder,
-                uidvalidity=current_uidvalidity,
-                uidnext=max(all_imap_uids) + 1 if all_imap_uids else 1,
-                highestmodseq=current_highestmodseq,
+        if not client.qresync_enabled:
+            # Every cached UID is either on the server or expunged, and the plan
+            # holds what the server has that the cache lacks, so any excess
+            # over EXISTS is the number of expunged UIDs still cached.
+            expunged_count = (
+                state.database.count_emails(folder) + plan.total - current_exists
             )
-            return [], False
+            if expunged_count > 0:
+                _delete_expunged(
+                    folder,
+                    find_expunged_uids(
+                        client,
+                        folder,
+                        sorted(state.database.get_synced_uids(folder)),
+                        current_exists,
+                        limit=expunged_count,
+                    ),
+                )
 
-        batch_uids = missing_uids[:batch_size]
-        emails = client.fetch_emails(batch_uids, folder, limit=batch_size)
+        return None if plan.done else plan
 
-        synced_uids: list[int] = []
-        for uid, email_obj in emails.items():
-            params = _email_to_db_params(email_obj, folder)
-            state.database.upsert_email(**params)
-            synced_uids.append(uid)
+    except Exception as e:
+        logger.error(f"Error syncing folder {folder}: {e}")
+        return None
 
-        has_more = len(missing_uids) > batch_size
 
-        if not has_more:
-            state.database.save_folder_state(
-                folder=folder,
-                uidvalidity=current_uidvalidity,
-                uidnext=max(all_imap_uids) + 1 if all_imap_uids else 1,
-                highestmodseq=current_highestmodseq,
-            )
-
-        return synced_uids, has_more
+def _delete_expunged(folder: str, uids: list[int]) -> None:
+    """Remove UIDs expunged on the server from the cache."""
+    if not uids or not state.database:
+        return
+    deleted = state.database.delete_emails_batch(folder, uids)
+    if deleted:
+        logger.info(f"Removed {deleted} expunged emails from {folder}")
 
-    except Exception as e:
-        logger.error(f"Error in batch sync for {folder}: {e}")
-        return [], False
 
+async def sync_emails_parallel(
+    folders: Optional[list[str]] = None, probe: bool = True
+):
+    """Sync folders in parallel using the connection pool.
 
-async def sync_emails_parallel():
-    """Sync all folders in parallel using the connection pool."""
+    Args:
+        folders: Folders to sync; defaults to every allowed folder.
+        probe: Check every folder with one bulk STATUS probe first and only
+            refresh the ones that changed, instead of selecting each folder.
+    """
     if not state.database or not state.config:
         return
 
-    if state._pool_init_lock is None:
-        state._pool_init_lock = asyncio.Lock()
-
-    if state._imap_pool_size == 0:
-        async with state._pool_init_lock:
-            if state._imap_pool_size == 0:
-                logger.info("Initializing IMAP connection pool...")
-                loop = asyncio.get_running_loop()
-                await loop.run_in_executor(None, _init_connection_pool)
-
-    if state._imap_pool_size == 0:
-        logger.error("No IMAP connections available after pool init")
+    if not await _ensure_connection_pool():
         return
 
-    folders = state.config.allowed_folders or ["INBOX"]
+    folders = order_folders(folders or state.config.allowed_folders or ["INBOX"])
     loop = asyncio.get_running_loop()
 
-    tasks = [
-        loop.run_in_executor(state._sync_executor, _sync_folder_worker, folder)
-        for folder in folders
-    ]
+    if probe:
+        changes = await loop.run_in_executor(
+            state._sync_executor, _probe_folders, folders
+        )
+        folders = [folder for folder in folders if changes.get(folder) != 0]
+        if not folders:
+            logger.debug("STATUS probe found no changed folders")
+            return
+
+    if state._plan_run_lock is None:
+        state._plan_run_lock = asyncio.Lock()
+
+    async with state._plan_run_lock:
+        tasks = [
+            loop.run_in_executor(state._sync_executor, _refresh_folder_worker, folder)
+            for folder in folders
+        ]
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
 
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+        plans = [r for r in results if isinstance(r, FolderSyncPlan)]
+        errors = [r for r in results if isinstance(r, Exception)]
 
-    total = sum(r for r in results if isinstance(r, int))
-    errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            for e in errors:
+                logger.error(f"Folder sync error: {e}")
 
-    if errors:
-        for e in errors:
-            logger.error(f"Folder sync error: {e}")
+        total, _ = await _run_plans(plans)
 
     if total > 0:
         logger.info(
@@ -745,151 +980,101 @@ async def sync_emails_parallel():
         )
 
 
-def _parse_authentication_results(headers: dict[str, Any]) -> dict[str, Any]:
-    raw_values: list[str] = []
-    for k in ["Authentication-Results", "ARC-Authentication-Results", "Received-SPF"]:
-        v = headers.get(k)
-        if not v:
-            continue
-        if isinstance(v, list):
-            raw_values.extend([str(x) for x in v if x])
-        else:
-            raw_values.append(str(v))
-
-    combined = "\n".join(raw_values)
-    combined_l = combined.lower()
-
-    def _has_result(prefix: str, value: str) -> bool:
-        return bool(
-            re.search(rf"\b{re.escape(prefix)}\s*=\s*{re.escape(value)}\b", combined_l)
-        )
-
-    spf_pass = _has_result("spf", "pass") or _has_result("spf", "bestguesspass")
-    spf_fail = _has_result("spf", "fail") or _has_result("spf", "softfail")
-    dkim_pass = _has_result("dkim", "pass")
-    dkim_fail = _has_result("dkim", "fail")
-    dmarc_pass = _has_result("dmarc", "pass")
-    dmarc_fail = _has_result("dmarc", "fail")
-
-    return {
-        "auth_results_raw": combined or None,
-        "spf": "pass" if spf_pass else "fail" if spf_fail else "unknown",
-        "dkim": "pass" if dkim_pass else "fail" if dkim_fail else "unknown",
-        "dmarc": "pass" if dmarc_pass else "fail" if dmarc_fail else "unknown",
-    }
+def _hydrate_bodies(client: ImapClient, folder: str, uids: list[int]) -> list[int]:
+    """Download full bodies for header-only emails of one folder and store them.
 
+    Returns the UIDs that were hydrated. UIDs the fetch did not return count
+    as a failed attempt.
+    """
+    if not state.database:
+        return []
+
+    emails = client.fetch_email_bodies(uids, folder)
+    bodies = [
+        {
+            "uid": uid,
+            "folder": folder,
+            "subject": email_obj.subject,
+            "body_text": email_obj.content.text or "",
+            "body_html": email_obj.content.html or "",
+            "has_attachments": email_obj.has_attachments,
+            "attachment_filenames": email_obj.attachment_filenames,
+            "attachment_info": email_obj.attachment_info,
+        }
+        for uid, email_obj in emails.items()
+    ]
+    # Messages the fetch did not return stay header-only: catch-up sync or
+    # expunge handling deletes them if they are gone from the server, and a
+    # transient failure is retried until BODY_HYDRATION_ATTEMPTS is reached.
+    state.database.update_email_bodies_batch(bodies)
+    missing = [uid for uid in uids if uid not in emails]
+    if missing:
+        state.database.record_hydration_failures(folder, missing)
+    return list(emails.keys())
+
+
+async def hydration_loop():
+    """Download bodies for header-only emails, newest first, then embed them.
+
+    Runs alongside initial sync when SYNC_HEADERS_FIRST is on. Each round takes
+    BODY_HYDRATION_BATCH rows and sleeps BODY_HYDRATION_DELAY seconds after,
+    so body downloads never starve header sync of pool connections. Rows whose
+    fetch failed BODY_HYDRATION_ATTEMPTS times are skipped.
+    """
+    idle_sleep = 30
+    loop = asyncio.get_running_loop()
 
-def _extract_domain(addr: str) -> str:
-    _, email_addr = parseaddr(addr or "")
-    if "@" not in email_addr:
-        return ""
-    return email_addr.split("@", 1)[1].strip().lower()
-
-
-def _is_punycode_domain(domain: str) -> bool:
-    if not domain:
-        return False
-    try:
-        decoded = idna.decode(domain)
-        return decoded != domain
-    except Exception:
-        return "xn--" in domain
-
-
-def _sender_suspicion_signals(from_addr_raw: str, reply_to_raw: str) -> dict[str, Any]:
-    from_domain = _extract_domain(from_addr_raw)
-    reply_to_domain = _extract_domain(reply_to_raw)
-
-    reply_to_differs = bool(
-        reply_to_domain and from_domain and reply_to_domain != from_domain
-    )
-
-    display_name, parsed_addr = parseaddr(from_addr_raw)
-    display_name_l = (display_name or "").lower()
-    parsed_local = parsed_addr.split("@", 1)[0].lower() if "@" in parsed_addr else ""
-
-    display_name_mismatch = False
-    if display_name_l and parsed_local:
-        token = re.sub(r"[^a-z0-9]+", "", parsed_local)
-        if token and token not in re.sub(r"[^a-z0-9]+", "", display_name_l):
-            display_name_mismatch = True
-
-    punycode_domain = _is_punycode_domain(from_domain) or _is_punycode_domain(
-        reply_to_domain
-    )
-
-    return {
-        "reply_to_differs": reply_to_differs,
-        "display_name_mismatch": display_name_mismatch,
-        "punycode_domain": punycode_domain,
-        "is_suspicious_sender": bool(
-            reply_to_differs or display_name_mismatch or punycode_domain
-        ),
-    }
-
+    logger.info("Body hydration loop started")
 
-def _email_to_db_params(email_obj: "Email", folder: str) -> dict[str, Any]:
-    """Convert Email dataclass to database upsert parameters."""
-    date_str = email_obj.date.isoformat() if email_obj.date else None
-    internal_date_str = (
-        email_obj.internal_date.isoformat() if email_obj.internal_date else None
-    )
-    gmail_thread_id = (
-        int(email_obj.gmail_thread_id) if email_obj.gmail_thread_id else None
-    )
+    while state.running:
+        try:
+            pool = state._imap_pool
+            if not state.database or pool is None:
+                await asyncio.sleep(BODY_HYDRATION_DELAY)
+                continue
 
-    headers = email_obj.headers or {}
-    if not isinstance(headers, dict):
-        headers = {}
+            rows = state.database.get_unhydrated_emails(
+                limit=BODY_HYDRATION_BATCH,
+                folders=(state.config.allowed_folders if state.config else None)
+                or ["INBOX"],
+                max_attempts=BODY_HYDRATION_ATTEMPTS,
+            )
+            if not rows:
+                await asyncio.sleep(idle_sleep)
+                continue
 
-    auth = _parse_authentication_results(headers)
+            by_folder: dict[str, list[int]] = {}
+            for row in rows:
+                by_folder.setdefault(row["folder"], []).append(row["uid"])
 
-    reply_to_raw = ""
-    reply_to_v = headers.get("Reply-To")
-    if reply_to_v:
-        reply_to_raw = str(reply_to_v)
+            for folder, uids in by_folder.items():
 
-    from_addr_raw = str(email_obj.from_)
-    suspicious = _sender_suspicion_signals(from_addr_raw, reply_to_raw)
+                def _hydrate(folder: str = folder, uids: list[int] = uids) -> list[int]:
+                    try:
+                        with pool.connection(timeout=60) as client:
+                            return _hydrate_bodies(client, folder, uids)
+                    except Empty:
+                        return []
+                    except Exception as e:
+                        # e.g. the folder was deleted on the server; the other
+                        # folders of this round still get their bodies.
+                        logger.warning(f"[{folder}] Body hydration failed: {e}")
+                        if state.database:
+                            state.database.record_hydration_failures(folder, uids)
+                        return []
+
+                hydrated = await loop.run_in_executor(state._sync_executor, _hydrate)
+                if hydrated:
+                    logger.debug(f"[{folder}] Hydrated {len(hydrated)} email bodies")
+                    await embed_specific_uids(folder, hydrated)
+
+            await asyncio.sleep(BODY_HYDRATION_DELAY)
 
-    return {
-        "uid": email_obj.uid or 0,
-        "folder": folder,
-        "message_id": email_obj.message_id,
-        "subject": email_obj.subject,
-        "from_addr": str(email_obj.from_),
-        "to_addr": ",".join(str(addr) for addr in email_obj.to),
-        "cc_addr": ",".join(str(addr) for addr in email_obj.cc),
-        "bcc_addr": "",
-        "date": date_str,
-        "internal_date": internal_date_str,
-        "body_text": email_obj.content.text or "",
-        "body_html": email_obj.content.html or "",
-        "flags": ",".join(email_obj.flags),
-        "is_unread": "\\Seen" not in email_obj.flags,
-        "is_important": "\\Flagged" in email_obj.flags,
-        "size": email_obj.size,
-        "modseq": email_obj.modseq,
-        "in_reply_to": email_obj.in_reply_to or "",
-        "references_header": " ".join(email_obj.references)
-        if email_obj.references
-        else "",
-        "gmail_thread_id": gmail_thread_id,
-        "gmail_msgid": email_obj.gmail_msgid,
-        "gmail_labels": email_obj.gmail_labels,
-        "has_attachments": email_obj.has_attachments,
-        "attachment_filenames": email_obj.attachment_filenames,
-        "auth_results_raw": auth["auth_results_raw"],
-        "spf": auth["spf"],
-        "dkim": auth["dkim"],
-        "dmarc": auth["dmarc"],
-        "is_suspicious_sender": suspicious["is_suspicious_sender"],
-        "suspicious_sender_signals": {
-            "reply_to_differs": suspicious["reply_to_differs"],
-            "display_name_mismatch": suspicious["display_name_mismatch"],
-            "punycode_domain": suspicious["punycode_domain"],
-        },
-    }
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Body hydration error: {e}")
+            await asyncio.sleep(idle_sleep)
 
 
 async def generate_embeddings() -> int:
@@ -989,215 +1174,339 @@ async def embed_specific_uids(folder: str, uids: list[int]) -> int:
         return 0
 
 
+async def _run_plans(
+    plans: list[FolderSyncPlan],
+    recent_only: bool = False,
+    bodies: bool = True,
+    embed: bool = False,
+) -> tuple[int, int]:
+    """Sync the work units of several folders through the pipeline.
+
+    A SyncScheduler hands out units INBOX first; the pipeline's fetch workers
+    take them on whichever pooled connection is free, so one large folder is
+    spread over every connection. Each unit is committed on its own, and the
+    folder's backfill window advances as it lands. Units are submitted until
+    the pipeline pushes back. A failed unit is handed back to its plan and
+    stops further submissions; the next sync resumes from the persisted window.
+
+    Args:
+        plans: Folder plans to run.
+        recent_only: Only sync UIDs inside each plan's recent-mail cutoff.
+        bodies: Fetch text bodies; False stores header-only rows.
+        embed: Embed each batch as soon as it is stored.
+
+    Returns:
+        (synced, embedded)
+    """
+    if not state.database or not state.sync_pipeline or not plans:
+        return 0, 0
+
+    loop = asyncio.get_running_loop()
+    pipeline = state.sync_pipeline
+    database = state.database
+    scheduler = SyncScheduler(plans)
+    folder_totals = {plan.folder: plan.total for plan in plans}
+    folder_synced = {plan.folder: 0 for plan in plans}
+    total_embedded = 0
+    failed = False
+    pending: dict[asyncio.Future, tuple[FolderSyncPlan, WorkUnit, SyncJob]] = {}
+
+    def _commit(plan: FolderSyncPlan, unit: WorkUnit, uids: list[int]) -> None:
+        lo, hi = plan.complete(unit)
+        database.save_sync_cursor(plan.folder, lo, hi)
+
+    async def _collect(done: set) -> None:
+        nonlocal total_embedded, failed
+        for future in done:
+            plan, unit, job = pending.pop(future)
+            folder = plan.folder
+            try:
+                synced_uids = future.result()
+            except Exception:
+                plan.release(unit)
+                failed = True
+                continue
+            folder_synced[folder] += len(synced_uids)
+            synced, total = folder_synced[folder], folder_totals[folder]
+            pct = (synced / total * 100) if total > 0 else 0
+            logger.info(f"[{folder}] Synced {synced}/{total} ({pct:.1f}%)")
+            if embed:
+                # Copies already carry the embedding of the row they came from.
+                copied = set(job.copied_uids)
+                total_embedded += await embed_specific_uids(
+                    folder, [uid for uid in synced_uids if uid not in copied]
+                )
+            if folder.upper() == "INBOX" and _inbox_synced(plan, recent_only):
+                _mark_inbox_ready()
+
+    while state.running and not failed:
+        taken = scheduler.next_unit(SYNC_BATCH_SIZE, recent_only=recent_only)
+        if taken is None:
+            break
+        plan, unit = taken
+        job = SyncJob(
+            plan.folder,
+            unit.uids,
+            bodies=bodies,
+            on_stored=functools.partial(_commit, plan, unit),
+        )
+        await loop.run_in_executor(None, pipeline.submit, job)
+        pending[asyncio.wrap_future(job.future)] = (plan, unit, job)
+        await _collect({future for future in pending if future.done()})
+
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        await _collect(done)
+
+    return sum(folder_synced.values()), total_embedded
+
+
+def _inbox_synced(plan: FolderSyncPlan, recent_only: bool) -> bool:
+    """True once the part of INBOX the current phase is after is stored."""
+    if plan.in_flight:
+        return False
+    return plan.done or (recent_only and not plan.has_recent)
+
+
+def _mark_inbox_ready() -> None:
+    if state.inbox_ready_seconds is not None or state.initial_sync_started is None:
+        return
+    state.inbox_ready_seconds = round(time.monotonic() - state.initial_sync_started, 1)
+    logger.info(f"INBOX queryable after {state.inbox_ready_seconds}s")
+
+
 async def initial_lockstep_sync_and_embed():
-    """Initial sync: sync batch → embed batch → repeat until done."""
+    """Initial sync: sync batch → embed batch → repeat until done.
+
+    Folders are synced INBOX first and newest mail first. With a recent-mail
+    cutoff (SYNC_RECENT_DAYS), every folder's recent mail is synced before
+    any folder's older mail is backfilled.
+    """
     if not state.database or not state.config:
         return
 
-    folders = state.config.allowed_folders or ["INBOX"]
+    folders = order_folders(state.config.allowed_folders or ["INBOX"])
     loop = asyncio.get_running_loop()
-    batch_size = 50
-    supports_embeddings = state.database.supports_embeddings()
+
+    if state.initial_sync_started is None:
+        state.initial_sync_started = time.monotonic()
 
     if state._pool_init_lock is None:
         state._pool_init_lock = asyncio.Lock()
 
-    if state._imap_pool_size == 0:
+    if state._imap_pool is None:
         async with state._pool_init_lock:
-            if state._imap_pool_size == 0:
+            if state._imap_pool is None:
                 logger.info("Initializing IMAP connection pool for lockstep sync...")
                 await loop.run_in_executor(None, _init_connection_pool)
 
-    if state._imap_pool_size == 0:
+    if state._imap_pool is None:
         logger.error("No IMAP connections available for lockstep sync")
         return
 
-    total_synced = 0
-    total_embedded = 0
+    if state._plan_run_lock is None:
+        state._plan_run_lock = asyncio.Lock()
 
-    for folder in folders:
-        folder_synced = 0
-        folder_embedded = 0
+    async with state._plan_run_lock:
+        await _initial_sync_folders(folders)
 
-        db_count = state.database.count_emails(folder)
 
-        def _get_folder_count():
-            try:
-                client = state._imap_pool.get(timeout=60)
-            except Empty:
-                return 0
-            try:
-                info = client.select_folder(folder, readonly=True)
-                return info.get("exists", 0)
-            finally:
-                state._imap_pool.put(client)
+async def _initial_sync_folders(folders: list[str]) -> None:
+    """Plan every folder, then sync recent mail and backfill through the pipeline."""
+    pool = state._imap_pool
+    if not state.database or pool is None:
+        return
 
-        folder_total = await loop.run_in_executor(
-            state._sync_executor, _get_folder_count
-        )
+    loop = asyncio.get_running_loop()
 
-        remaining = folder_total - db_count
-        if remaining <= 0:
-            logger.info(
-                f"[{folder}] Already fully synced ({db_count}/{folder_total} emails)"
-            )
-            continue
+    plans: dict[str, FolderSyncPlan] = {}
+    for folder in folders:
 
-        logger.info(
-            f"[{folder}] Resuming lockstep sync+embed ({db_count}/{folder_total} done, {remaining} remaining)..."
-        )
+        def _plan_folder(folder: str = folder) -> Optional[FolderSyncPlan]:
+            try:
+                with pool.connection(timeout=60) as client:
+                    return plan_folder_sync(
+                        client, state.database, folder, recent_days=SYNC_RECENT_DAYS
+                    )
+            except Empty:
+                return None
 
-        while state.running:
+        try:
+            plan = await loop.run_in_executor(state._sync_executor, _plan_folder)
+        except Exception as e:
+            logger.error(f"[{folder}] Failed to plan initial sync: {e}")
+            continue
 
-            def _sync_batch():
-                try:
-                    client = state._imap_pool.get(timeout=60)
-                except Empty:
-                    return [], False
-                try:
-                    return _sync_next_batch(client, folder, batch_size)
-                finally:
-                    state._imap_pool.put(client)
+        if plan is None:
+            logger.warning(f"No available connection to plan {folder}")
+            continue
 
-            synced_uids, has_more = await loop.run_in_executor(
-                state._sync_executor, _sync_batch
+        if plan.done:
+            logger.info(f"[{folder}] Already fully synced")
+        else:
+            logger.info(
+                f"[{folder}] Planned {plan.total} missing emails (UID {plan.lo}:{plan.hi})"
             )
+        plans[folder] = plan
 
-            if not synced_uids:
-                break
+    inbox = next((p for f, p in plans.items() if f.upper() == "INBOX"), None)
+    if inbox is None or _inbox_synced(inbox, recent_only=bool(SYNC_RECENT_DAYS)):
+        _mark_inbox_ready()
 
-            folder_synced += len(synced_uids)
-            total_done = db_count + folder_synced
-            pct = (total_done / folder_total * 100) if folder_total > 0 else 0
-            logger.info(f"[{folder}] Synced {total_done}/{folder_total} ({pct:.1f}%)")
+    # Header-only rows have nothing to embed yet; hydration_loop embeds them
+    # once their bodies arrive.
+    embed = state.database.supports_embeddings() and not SYNC_HEADERS_FIRST
+    pending_plans = [plan for plan in plans.values() if not plan.done]
+    total_synced = 0
+    total_embedded = 0
 
-            if supports_embeddings:
-                embedded = await embed_specific_uids(folder, synced_uids)
-                folder_embedded += embedded
+    if SYNC_RECENT_DAYS:
+        logger.info(f"Syncing last {SYNC_RECENT_DAYS} days of every folder first...")
+        synced, embedded = await _run_plans(
+            pending_plans,
+            recent_only=True,
+            bodies=not SYNC_HEADERS_FIRST,
+            embed=embed,
+        )
+        total_synced += synced
+        total_embedded += embedded
 
-            if not has_more:
-                break
+    synced, embedded = await _run_plans(
+        pending_plans, bodies=not SYNC_HEADERS_FIRST, embed=embed
+    )
+    total_synced += synced
+    total_embedded += embedded
 
-        total_synced += folder_synced
-        total_embedded += folder_embedded
-        logger.info(
-            f"[{folder}] Complete: {folder_synced} synced, {folder_embedded} embedded"
-        )
+    for folder, plan in plans.items():
+        if plan.done:
+            logger.info(f"[{folder}] Complete")
 
     logger.info(
         f"Lockstep sync complete: {total_synced} synced, {total_embedded} embedded across {len(folders)} folders"
     )
 
 
-def _idle_worker(
-    client: ImapClient,
-    loop: asyncio.AbstractEventLoop,
-    stop_event: threading.Event,
-):
-    """Dedicated thread worker for IMAP IDLE operations.
-
-    Runs the entire IDLE loop on a separate thread to avoid blocking
-    the asyncio event loop. Communicates back via thread-safe event loop
-    scheduling when a sync is needed.
-    """
-    idle_timeout = 25 * 60  # 25 minutes (Gmail requires re-IDLE every 29 min)
-    logger.info("IDLE worker thread started")
-
-    while not stop_event.is_set():
-        try:
-            client.select_folder("INBOX", readonly=True)
-            client.idle_start()
-
-            try:
-                # This blocks for up to idle_timeout seconds
-                responses = client.idle_check(timeout=idle_timeout)
-
-                if responses:
-                    for response in responses:
-                        if len(response) >= 2 and response[1] in (
-                            b"EXISTS",
-                            b"EXPUNGE",
-                        ):
-                            logger.debug(f"IDLE notification: {response}")
-                            # Schedule sync on the main event loop (thread-safe)
-                            loop.call_soon_threadsafe(
-                                lambda: asyncio.create_task(debounced_sync())
-                            )
-                            break
-            finally:
-                client.idle_done()
+def _connect_push_client(folder: str) -> ImapClient:
+    if not state.config:
+        raise RuntimeError("Engine not configured")
+    client = ImapClient(
+        state.config.imap, allowed_folders=[folder], compress=IMAP_COMPRESS
+    )
+    client.connect()
+    _track_compression(client, f"idle:{folder}")
+    return client
 
-        except Exception as e:
-            logger.error(f"IDLE worker error: {e}")
-            # Sleep before retry, but check stop_event periodically
-            for _ in range(30):
-                if stop_event.is_set():
-                    break
-                stop_event.wait(1.0)
 
-    logger.info("IDLE worker thread stopped")
+def _apply_push_flags(folder: str, updates: list[dict[str, Any]]) -> None:
+    """Write flag changes pushed by the server straight to the cache."""
+    if not state.database:
+        return
+    state.database.update_flags_batch(updates)
+    logger.debug(f"[{folder}] Applied {len(updates)} pushed flag changes")
 
 
 async def idle_monitor():
-    """Background task that manages the IDLE worker thread.
+    """Background task that owns the push monitor.
 
-    Monitors INBOX for changes and triggers sync when new mail arrives.
-    Uses a dedicated IMAP connection and runs on a separate thread
-    to avoid blocking the asyncio event loop.
+    The monitor watches folders with NOTIFY, or with one IDLE connection per
+    folder (INBOX first, up to PUSH_IDLE_CONNECTIONS), on its own threads so
+    the event loop never blocks. Each change schedules a sync of just that
+    folder.
     """
     if not state.config or not state.idle_client:
         return
 
-    client = state.idle_client
-
-    if not client.has_idle_capability():
+    if not state.idle_client.has_idle_capability():
         logger.info("Server does not support IDLE, skipping idle monitor")
         return
 
-    logger.info("Starting IDLE monitor for push notifications")
+    loop = asyncio.get_running_loop()
 
-    loop = asyncio.get_event_loop()
-    stop_event = threading.Event()
+    def _on_change(folder: str) -> None:
+        logger.debug(f"[{folder}] Push notification")
+        loop.call_soon_threadsafe(
+            lambda: asyncio.create_task(debounced_sync(folder))
+        )
 
-    # Start the IDLE worker on a dedicated thread
-    idle_thread = threading.Thread(
-        target=_idle_worker,
-        args=(client, loop, stop_event),
-        name="idle-worker",
-        daemon=True,
+    folders = order_folders(state.config.allowed_folders or ["INBOX"])
+    monitor = PushMonitor(
+        connect=_connect_push_client,
+        folders=folders,
+        max_connections=PUSH_IDLE_CONNECTIONS,
+        on_change=_on_change,
+        on_flags=_apply_push_flags,
+        # The enrolled IDLE client may only select INBOX.
+        client=state.idle_client if folders[0] == "INBOX" else None,
     )
-    idle_thread.start()
+    await loop.run_in_executor(None, monitor.start)
+    state.push_monitor = monitor
 
     # Wait until we should stop
     try:
         while state.running and state.enrolled:
             await asyncio.sleep(1.0)
     finally:
-        # Signal the worker thread to stop
-        logger.info("Stopping IDLE worker thread...")
-        stop_event.set()
-        idle_thread.join(timeout=5.0)
-        if idle_thread.is_alive():
-            logger.warning("IDLE worker thread did not stop cleanly")
+        logger.info("Stopping push monitor...")
+        state.push_monitor = None
+        await loop.run_in_executor(None, monitor.stop)
+
+
+def _mutation_connection():
+    """Check a pooled connection out for the mutation drain."""
+    if not state._imap_pool:
+        raise Empty
+    return state._imap_pool.connection(timeout=60)
+
+
+async def mutation_drain_loop():
+    """Background task that owns the mutation drain.
+
+    The drain applies journaled mutations to the server on its own thread,
+    using connections from the sync pool. Moves schedule a sync of the
+    destination folder so the moved emails show up there.
+    """
+    if not state.database or not await _ensure_connection_pool():
+        return
+
+    loop = asyncio.get_running_loop()
+
+    def _on_moved(folder: str) -> None:
+        loop.call_soon_threadsafe(
+            lambda: asyncio.create_task(debounced_sync(folder))
+        )
+
+    drain = MutationDrain(state.database, _mutation_connection, on_moved=_on_moved)
+    drain.start()
+    state.mutation_drain = drain
+
+    try:
+        while state.running and state.enrolled:
+            await asyncio.sleep(1.0)
+    finally:
+        logger.info("Stopping mutation drain...")
+        state.mutation_drain = None
+        await loop.run_in_executor(None, drain.stop)
 
 
-async def debounced_sync():
+async def debounced_sync(folder: Optional[str] = None):
     """Trigger a sync with debouncing to batch rapid changes.
 
-    If called multiple times within the debounce window, only one sync runs.
+    If called multiple times within the debounce window for the same folder,
+    only one sync runs. Without a folder every allowed folder is synced.
     """
-    if state._sync_debounce_task and not state._sync_debounce_task.done():
-        state._sync_debounce_task.cancel()
+    pending = state._sync_debounce_tasks.get(folder)
+    if pending and not pending.done():
+        pending.cancel()
         try:
-            await state._sync_debounce_task
+            await pending
         except asyncio.CancelledError:
             pass
 
     async def _delayed_sync():
         await asyncio.sleep(state._sync_debounce_delay)
-        await sync_emails_parallel()
+        await sync_emails_parallel([folder] if folder else None)
 
-    state._sync_debounce_task = asyncio.create_task(_delayed_sync())
+    state._sync_debounce_tasks[folder] = asyncio.create_task(_delayed_sync())
 
 
 app = FastAPI(title="Secretary Engine", lifespan=lifespan)
@@ -1223,6 +1532,17 @@ async def get_status():
         if state.database
         else False,
         "waiting_for_oauth": state.running and not state.enrolled,
+        "initial_sync": {
+            "recent_days": SYNC_RECENT_DAYS,
+            "inbox_ready_seconds": state.inbox_ready_seconds,
+            "headers_first": SYNC_HEADERS_FIRST,
+        },
+        "sync_pipeline": state.sync_pipeline.stats() if state.sync_pipeline else None,
+        "push": state.push_monitor.status() if state.push_monitor else None,
+        "catchup": state.catchup.status() if state.catchup else None,
+        "imap_pool": state._imap_pool.stats() if state._imap_pool else None,
+        "mutations": state.mutation_drain.stats() if state.mutation_drain else None,
+        "compression": _compression_status(),
     }
 
 
@@ -1290,16 +1610,33 @@ async def move_email(req: EmailMoveRequest):
             "message": "No account configured. Run auth_setup to add an account.",
         }
 
+    try:
+        _enqueue_mutations(
+            [(req.uid, req.folder)],
+            [EmailBatchOperation(action="move", destination=req.destination)],
+        )
+        return {"status": "ok"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@app.post("/api/email/hydrate")
+async def hydrate_email(req: EmailHydrateRequest):
+    """Download the body of a header-only email now instead of waiting."""
+    if not state.enrolled:
+        return {
+            "status": "no_account",
+            "message": "No account configured. Run auth_setup to add an account.",
+        }
+
     if not state.imap_client:
         return {"status": "error", "message": "IMAP not connected"}
 
     try:
-        state.imap_client.move_email(req.uid, req.folder, req.destination)
-        # Update database
-        if state.database:
-            # Delete from old location, will be re-synced in new location
-            state.database.delete_email(req.uid, req.folder)
-        await debounced_sync()
+        hydrated = _hydrate_bodies(state.imap_client, req.folder, [req.uid])
+        if not hydrated:
+            return {"status": "error", "message": "Email not found"}
+        await embed_specific_uids(req.folder, hydrated)
         return {"status": "ok"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -1313,13 +1650,10 @@ async def mark_read(req: EmailMarkRequest):
             "message": "No account configured. Run auth_setup to add an account.",
         }
 
-    if not state.imap_client:
-        return {"status": "error", "message": "IMAP not connected"}
-
     try:
-        state.imap_client.mark_email(req.uid, req.folder, "read")
-        if state.database:
-            state.database.mark_email_read(req.uid, req.folder, True)
+        _enqueue_mutations(
+            [(req.uid, req.folder)], [EmailBatchOperation(action="mark_read")]
+        )
         return {"status": "ok"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -1333,13 +1667,10 @@ async def mark_unread(req: EmailMarkRequest):
             "message": "No account configured. Run auth_setup to add an account.",
         }
 
-    if not state.imap_client:
-        return {"status": "error", "message": "IMAP not connected"}
-
     try:
-        state.imap_client.mark_email(req.uid, req.folder, "unread")
-        if state.database:
-            state.database.mark_email_read(req.uid, req.folder, False)
+        _enqueue_mutations(
+            [(req.uid, req.folder)], [EmailBatchOperation(action="mark_unread")]
+        )
         return {"status": "ok"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -1353,24 +1684,98 @@ async def modify_labels(req: EmailLabelsRequest):
             "message": "No account configured. Run auth_setup to add an account.",
         }
 
-    if not state.imap_client:
-        return {"status": "error", "message": "IMAP not connected"}
+    operation = EmailBatchOperation(
+        action="labels", labels=req.labels, label_action=req.action
+    )
+    error = _batch_error([operation])
+    if error:
+        return {"status": "error", "message": error}
 
     try:
-        if req.action == "add":
-            state.imap_client.add_gmail_labels(req.uid, req.folder, req.labels)
-        elif req.action == "remove":
-            state.imap_client.remove_gmail_labels(req.uid, req.folder, req.labels)
-        elif req.action == "set":
-            state.imap_client.set_gmail_labels(req.uid, req.folder, req.labels)
-        else:
-            return {"status": "error", "message": f"Invalid action: {req.action}"}
-        await debounced_sync()
+        _enqueue_mutations([(req.uid, req.folder)], [operation])
         return {"status": "ok"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+def _batch_error(operations: list[EmailBatchOperation]) -> Optional[str]:
+    """Why a batch's operations can't be applied, or None if they can."""
+    for i, op in enumerate(operations):
+        if op.action not in ("mark_read", "mark_unread", "move", "labels"):
+            return f"Invalid action: {op.action}"
+        if op.action == "move":
+            if not op.destination:
+                return "move needs a destination"
+            if i != len(operations) - 1:
+                return "move must be the last operation"
+        if op.action == "labels":
+            if not op.labels:
+                return "labels needs labels"
+            if op.label_action not in ("add", "remove", "set"):
+                return f"Invalid label action: {op.label_action}"
+    return None
+
+
+def _enqueue_mutations(
+    emails: list[tuple[int, str]], operations: list[EmailBatchOperation]
+) -> int:
+    """Journal operations on emails and apply them to the cache.
+
+    The mutation drain applies them to the server in the background.
+
+    Returns:
+        Number of mutations journaled.
+
+    Raises:
+        RuntimeError: If there is no database.
+    """
+    if not state.database:
+        raise RuntimeError("Database not ready")
+
+    mutations = []
+    for uid, folder in emails:
+        for op in operations:
+            params: dict[str, Any] = {}
+            if op.action == "labels":
+                params = {"labels": op.labels, "label_action": op.label_action}
+            elif op.action == "move":
+                params = {"destination": op.destination}
+            mutations.append(
+                {"uid": uid, "folder": folder, "action": op.action, "params": params}
+            )
+    queued = state.database.enqueue_mutations(mutations)
+    if state.mutation_drain:
+        state.mutation_drain.notify()
+    return queued
+
+
+@app.post("/api/email/batch")
+async def batch_emails(req: EmailBatchRequest):
+    """Apply the same operations to many emails.
+
+    The changes are journaled and applied to the cache in one transaction, so
+    the call returns without waiting for the server. The mutation drain then
+    sends one UID STORE / UID MOVE per folder and operation (per
+    ``MUTATION_CHUNK_SIZE`` UIDs) instead of one round trip per email.
+    """
+    if not state.enrolled:
+        return {
+            "status": "no_account",
+            "message": "No account configured. Run auth_setup to add an account.",
+        }
+
+    error = _batch_error(req.operations)
+    if error:
+        return {"status": "error", "message": error}
+
+    emails = list(dict.fromkeys((ref.uid, ref.folder) for ref in req.emails))
+    try:
+        _enqueue_mutations(emails, req.operations)
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "ok", "count": len(emails)}
+
+
 @app.post("/api/email/send")
 async def send_email(req: SendEmailRequest):
     """Send an email via SMTP/Gmail API."""
@@ -1405,16 +1810,9 @@ async def send_email(req: SendEmailRequest):
             import base64
 
             # Use Gmail API for sending (more reliable with OAuth)
-            from google.oauth2.credentials import Credentials
             from googleapiclient.discovery import build
 
-            creds = Credentials(
-                token=state.config.imap.oauth2.access_token,
-                refresh_token=state.config.imap.oauth2.refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=state.config.imap.oauth2.client_id,
-                client_secret=state.config.imap.oauth2.client_secret,
-            )
+            creds = token_provider(state.config.imap.oauth2).credentials()
 
             service = build("gmail", "v1", credentials=creds)
 
@@ -1501,16 +1899,9 @@ async def create_draft_reply(req: DraftReplyRequest):
         if state.config.imap.oauth2 and state.config.imap.oauth2.access_token:
             import base64
 
-            from google.oauth2.credentials import Credentials
             from googleapiclient.discovery import build
 
-            creds = Credentials(
-                token=state.config.imap.oauth2.access_token,
-                refresh_token=state.config.imap.oauth2.refresh_token,
-                token_uri="https://oauth2.googleapis.com/token",
-                client_id=state.config.imap.oauth2.client_id,
-                client_secret=state.config.imap.oauth2.client_secret,
-            )
+            creds = token_provider(state.config.imap.oauth2).credentials()
 
             service = build("gmail", "v1", credentials=creds)
 
@@ -1556,16 +1947,9 @@ async def setup_labels(req: SetupLabelsRequest):
         return {"status": "error", "message": "OAuth2 configuration required"}
 
     try:
-        from google.oauth2.credentials import Credentials
         from googleapiclient.discovery import build
 
-        creds = Credentials(
-            token=state.config.imap.oauth2.access_token,
-            refresh_token=state.config.imap.oauth2.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=state.config.imap.oauth2.client_id,
-            client_secret=state.config.imap.oauth2.client_secret,
-        )
+        creds = token_provider(state.config.imap.oauth2).credentials()
 
         service = build("gmail", "v1", credentials=creds)
 
@@ -1605,6 +1989,20 @@ async def setup_labels(req: SetupLabelsRequest):
         return {"status": "error", "message": str(e)}
 
 
+def _stored_attachment(uid: int, folder: str, filename: str) -> Optional[dict]:
+    """Look up an attachment's BODYSTRUCTURE metadata in the local cache."""
+    if not state.database:
+        return None
+    row = state.database.get_email_by_uid(uid, folder)
+    info = row.get("attachment_info") if row else None
+    if isinstance(info, str):
+        info = json.loads(info)
+    for attachment in info or []:
+        if attachment.get("filename") == filename and attachment.get("part"):
+            return attachment
+    return None
+
+
 @app.get("/api/email/{folder}/{uid}/attachment/{filename}")
 async def download_attachment(folder: str, uid: int, filename: str):
     """Download an email attachment."""
@@ -1615,6 +2013,20 @@ async def download_attachment(folder: str, uid: int, filename: str):
         raise HTTPException(status_code=500, detail="IMAP client not connected")
 
     try:
+        stored = _stored_attachment(uid, folder, filename)
+        if stored:
+            # Known section number: download just this part, not the message.
+            content = state.imap_client.fetch_part(
+                uid, folder, stored["part"], stored.get("encoding") or "7bit"
+            )
+            if content is None:
+                raise HTTPException(status_code=404, detail="Email not found")
+            return StreamingResponse(
+                io.BytesIO(content),
+                media_type=stored.get("content_type") or "application/octet-stream",
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            )
+
         email = state.imap_client.fetch_email(uid, folder)
         if not email:
             raise HTTPException(status_code=404, detail="Email not found")
@@ -1995,11 +2407,14 @@ class EmailDeleteRequest(BaseModel):
 
 @app.post("/api/internal/email/delete")
 async def internal_delete_email(req: EmailDeleteRequest):
-    if not state.enrolled or not state.imap_client:
+    if not state.enrolled:
         return {"status": "error", "message": "Not enrolled"}
 
     try:
-        state.imap_client.move_email(req.uid, req.folder, "[Gmail]/Trash")
+        _enqueue_mutations(
+            [(req.uid, req.folder)],
+            [EmailBatchOperation(action="move", destination="[Gmail]/Trash")],
+        )
         return {"status": "ok", "message": f"Email {req.uid} moved to Trash"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -0,0 +1,200 @@
+"""Helpers for IMAP BODYSTRUCTURE responses.
+
+imapclient returns BODYSTRUCTURE as nested tuples of bytes (``BodyData``). A
+multipart body starts with a list of child structures; a leaf body starts with
+its MIME type. These helpers flatten that tree into leaf parts carrying their
+IMAP section numbers (``1``, ``1.2``, ...), so sync can tell what a message
+contains without downloading it.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import email.utils
+import quopri
+import urllib.parse
+from dataclasses import dataclass, field
+from email.header import decode_header, make_header
+from typing import Any, Optional
+
+
+@dataclass
+class BodyPart:
+    """A leaf MIME part described by BODYSTRUCTURE."""
+
+    part: str
+    content_type: str
+    params: dict[str, str] = field(default_factory=dict)
+    encoding: str = "7bit"
+    size: int = 0
+    disposition: Optional[str] = None
+    filename: Optional[str] = None
+
+    @property
+    def maintype(self) -> str:
+        return self.content_type.split("/", 1)[0]
+
+    @property
+    def charset(self) -> Optional[str]:
+        return self.params.get("charset")
+
+    @property
+    def is_attachment(self) -> bool:
+        """Same rule as ImapClient._extract_attachment_info for full messages."""
+        if self.disposition == "attachment":
+            return True
+        return self.maintype not in ("text", "multipart")
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def _param_dict(raw: Any) -> dict[str, str]:
+    """Turn ``(b"CHARSET", b"utf-8", ...)`` into ``{"charset": "utf-8"}``."""
+    if not isinstance(raw, (list, tuple)):
+        return {}
+    items = list(raw)
+    params: dict[str, str] = {}
+    for key, value in zip(items[::2], items[1::2]):
+        params[_text(key).lower()] = _text(value)
+    return params
+
+
+def _decode_filename(params: dict[str, str]) -> Optional[str]:
+    for key in ("filename*", "name*"):
+        if key in params:
+            charset, _, encoded = email.utils.decode_rfc2231(params[key])
+            return urllib.parse.unquote(
+                encoded, encoding=charset or "utf-8", errors="replace"
+            )
+    for key in ("filename", "name"):
+        if key in params:
+            try:
+                return str(make_header(decode_header(params[key])))
+            except Exception:
+                return params[key]
+    return None
+
+
+def _leaf(body: Any, part: str) -> BodyPart:
+    maintype = _text(body[0]).lower()
+    subtype = _text(body[1]).lower()
+    params = _param_dict(body[2]) if len(body) > 2 else {}
+    encoding = _text(body[5]).lower() if len(body) > 5 and body[5] else "7bit"
+    try:
+        size = int(body[6]) if len(body) > 6 and body[6] is not None else 0
+    except (TypeError, ValueError):
+        size = 0
+
+    # Extension data position depends on the body type (RFC 3501 7.4.2).
+    if maintype == "text":
+        disposition_index = 9
+    elif maintype == "message" and subtype == "rfc822":
+        disposition_index = 11
+    else:
+        disposition_index = 8
+
+    disposition = None
+    disposition_params: dict[str, str] = {}
+    if len(body) > disposition_index:
+        raw = body[disposition_index]
+        if isinstance(raw, (list, tuple)) and raw:
+            disposition = _text(raw[0]).lower()
+            if len(raw) > 1:
+                disposition_params = _param_dict(raw[1])
+
+    filename = _decode_filename(disposition_params) or _decode_filename(params)
+
+    return BodyPart(
+        part=part,
+        content_type=f"{maintype}/{subtype}",
+        params=params,
+        encoding=encoding,
+        size=size,
+        disposition=disposition,
+        filename=filename,
+    )
+
+
+def walk_bodystructure(body: Any, prefix: str = "") -> list[BodyPart]:
+    """Flatten a BODYSTRUCTURE response into its leaf parts.
+
+    Nested ``message/rfc822`` parts are returned as a single leaf; their
+    contents are not walked.
+
+    Args:
+        body: BODYSTRUCTURE value from an imapclient FETCH response.
+        prefix: Section number of ``body`` itself (empty for the message root).
+
+    Returns:
+        Leaf parts in document order.
+    """
+    if not body:
+        return []
+
+    if isinstance(body[0], (list, tuple)):
+        parts: list[BodyPart] = []
+        for index, child in enumerate(body[0], start=1):
+            child_prefix = f"{prefix}.{index}" if prefix else str(index)
+            parts.extend(walk_bodystructure(child, child_prefix))
+        return parts
+
+    return [_leaf(body, prefix or "1")]
+
+
+def attachment_parts(parts: list[BodyPart]) -> list[BodyPart]:
+    return [part for part in parts if part.is_attachment]
+
+
+def attachment_info(parts: list[BodyPart]) -> list[dict[str, Any]]:
+    """Attachment metadata as stored in the ``attachment_info`` column."""
+    return [
+        {
+            "filename": part.filename,
+            "content_type": part.content_type,
+            "size": part.size,
+            "part": part.part,
+            "encoding": part.encoding,
+        }
+        for part in attachment_parts(parts)
+    ]
+
+
+def text_parts(parts: list[BodyPart]) -> dict[str, BodyPart]:
+    """First inline text/plain and text/html parts, keyed by subtype."""
+    chosen: dict[str, BodyPart] = {}
+    for part in parts:
+        if part.is_attachment or part.filename:
+            continue
+        subtype = part.content_type.split("/", 1)[1]
+        if part.maintype == "text" and subtype in ("plain", "html"):
+            chosen.setdefault(subtype, part)
+    return chosen
+
+
+def decode_transfer_encoding(data: bytes, encoding: str) -> bytes:
+    """Undo a Content-Transfer-Encoding on a fetched section."""
+    encoding = encoding.lower()
+    if encoding == "base64":
+        try:
+            return base64.b64decode(data)
+        except (binascii.Error, ValueError):
+            return base64.b64decode(data + b"==", validate=False)
+    if encoding == "quoted-printable":
+        return quopri.decodestring(data)
+    return data
+
+
+def decode_text_part(data: bytes, part: BodyPart) -> str:
+    """Decode a fetched text section using its transfer encoding and charset."""
+    raw = decode_transfer_encoding(data, part.encoding)
+    try:
+        return raw.decode(part.charset or "utf-8", errors="replace")
+    except LookupError:
+        return raw.decode("utf-8", errors="replace")
@@ -5,10 +5,9 @@ from typing import Any, Dict, List, Optional
 
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
-from google.auth.transport.requests import Request
 
 from workspace_secretary.config import ServerConfig
-from workspace_secretary.engine.oauth2 import get_access_token
+from workspace_secretary.engine.oauth2 import token_provider
 
 logger = logging.getLogger(__name__)
 
@@ -27,23 +26,12 @@ class CalendarClient:
             logger.error("OAuth2 configuration missing for Calendar")
             return None
 
-        oauth = self.config.imap.oauth2
-        creds = Credentials(
-            token=oauth.access_token,
-            refresh_token=oauth.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=oauth.client_id,
-            client_secret=oauth.client_secret,
-            scopes=["https://www.googleapis.com/auth/calendar"],
+        # Tokens come from the shared provider, which refreshes them (once
+        # for all clients) and saves them back to the token file.
+        return token_provider(self.config.imap.oauth2).credentials(
+            scopes=["https://www.googleapis.com/auth/calendar"]
         )
 
-        # Refresh if expired
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            # Note: In a real app, we'd want to save the new access_token back to config/file
-
-        return creds
-
     def connect(self):
         """Initialize the Calendar service."""
         try:
@@ -0,0 +1,194 @@
+"""Adaptive catch-up polling.
+
+Catch-up sync used to select and refresh every folder on one fixed interval.
+``CatchupSchedule`` instead estimates how often each folder changes and polls
+it about once per expected change, between ``min_interval`` and
+``max_interval``. A poll is a ``STATUS`` command, which needs no SELECT;
+``count_changes`` compares its UIDNEXT / HIGHESTMODSEQ / MESSAGES with
+``folder_state``, and only folders that changed are synced.
+
+The change rate is an exponentially weighted moving average of changes per
+hour. Each observation is weighted by how much time it covers, so one long
+quiet stretch counts as much as many short ones. Rates are persisted in
+``folder_state.change_rate`` so a restart keeps what was learned.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional
+
+# Observations older than this weigh about 1/e of a fresh one.
+RATE_TIME_CONSTANT = 6 * 3600
+
+
+def count_changes(
+    folder_state: Optional[dict[str, Any]],
+    status: dict[str, int],
+    cached_count: int,
+) -> int:
+    """Estimate how many changes a STATUS response shows since the last sync.
+
+    Args:
+        folder_state: The folder's stored state, or None if never synced.
+        status: The folder's entry from ``ImapClient.folders_status()``.
+        cached_count: Emails cached for the folder.
+
+    Returns:
+        The number of new UIDs, or 1 for a flag change, an expunge or any state
+        that needs a sync to settle (new folder, UIDVALIDITY change, unfinished
+        backfill). 0 means the folder can be skipped.
+    """
+    if not folder_state or folder_state.get("uidvalidity") != status.get(
+        "uidvalidity"
+    ):
+        return 1
+
+    backfill_lo = folder_state.get("backfill_lo")
+    backfill_hi = folder_state.get("backfill_hi")
+    window_open = (
+        backfill_lo is not None
+        and backfill_hi is not None
+        and backfill_lo <= backfill_hi
+    )
+
+    new_uids = max(0, status.get("uidnext", 0) - (folder_state.get("uidnext") or 0))
+    stored_modseq = folder_state.get("highestmodseq") or 0
+    modseq = status.get("highestmodseq", 0)
+    # Without CONDSTORE, MESSAGES is the only sign of an expunge.
+    expunged = not window_open and status.get("messages", 0) != cached_count + new_uids
+
+    if new_uids:
+        return new_uids
+    if window_open or expunged or (stored_modseq and modseq > stored_modseq):
+        return 1
+    return 0
+
+
+@dataclass
+class FolderSchedule:
+    """When a folder is polled next, and how often it has been changing."""
+
+    folder: str
+    change_rate: Optional[float]
+    interval: float
+    next_due: float
+    since: float
+
+
+class CatchupSchedule:
+    """Per-folder poll intervals learned from observed change rates.
+
+    Args:
+        folders: Folders to poll.
+        default_interval: Interval for a folder with no history yet. Folders
+            watched by the push monitor are never polled more often.
+        min_interval: Shortest interval for the busiest folders.
+        max_interval: Interval for folders that never change.
+        rates: Persisted change rates (changes per hour) by folder.
+        clock: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        folders: Iterable[str],
+        default_interval: float,
+        min_interval: float,
+        max_interval: float,
+        rates: Optional[dict[str, Optional[float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.clock = clock
+        self.pushed: set[str] = set()
+        now = clock()
+        rates = rates or {}
+        self.folders: dict[str, FolderSchedule] = {}
+        for folder in folders:
+            rate = rates.get(folder)
+            interval = self.interval_for(folder, rate)
+            self.folders[folder] = FolderSchedule(
+                folder, rate, interval, now + interval, now
+            )
+
+    def interval_for(self, folder: str, rate: Optional[float]) -> float:
+        """Poll interval for a folder changing ``rate`` times per hour."""
+        if rate is None:
+            interval = self.default_interval
+        elif rate <= 0:
+            interval = self.max_interval
+        else:
+            interval = 3600 / rate
+        floor = self.min_interval
+        if folder in self.pushed:
+            floor = max(floor, self.default_interval)
+        return min(self.max_interval, max(floor, interval))
+
+    def set_pushed(self, folders: Iterable[str]) -> None:
+        """Record which folders the push monitor watches."""
+        pushed = set(folders)
+        if pushed == self.pushed:
+            return
+        self.pushed = pushed
+        for entry in self.folders.values():
+            interval = self.interval_for(entry.folder, entry.change_rate)
+            entry.next_due += interval - entry.interval
+            entry.interval = interval
+
+    def due(self) -> list[str]:
+        """Folders whose next poll time has passed, most overdue first."""
+        now = self.clock()
+        due = [entry for entry in self.folders.values() if entry.next_due <= now]
+        return [entry.folder for entry in sorted(due, key=lambda e: e.next_due)]
+
+    def observe(self, folder: str, changes: Optional[int]) -> Optional[float]:
+        """Fold a poll result into the folder's rate and schedule its next poll.
+
+        Args:
+            folder: The folder polled.
+            changes: Changes seen since the previous poll, or None if the poll
+                failed (the folder is rescheduled without learning anything).
+
+        Returns:
+            The folder's updated change rate in changes per hour.
+        """
+        entry = self.folders[folder]
+        now = self.clock()
+        if changes is not None:
+            elapsed = max(now - entry.since, 1.0)
+            sample = changes * 3600 / elapsed
+            if entry.change_rate is None:
+                entry.change_rate = sample
+            else:
+                weight = 1 - math.exp(-elapsed / RATE_TIME_CONSTANT)
+                entry.change_rate += weight * (sample - entry.change_rate)
+            entry.since = now
+        entry.interval = self.interval_for(folder, entry.change_rate)
+        entry.next_due = now + entry.interval
+        return entry.change_rate
+
+    def seconds_until_due(self) -> float:
+        """Seconds until the next folder is due."""
+        if not self.folders:
+            return self.max_interval
+        next_due = min(entry.next_due for entry in self.folders.values())
+        return max(0.0, next_due - self.clock())
+
+    def status(self) -> list[dict[str, Any]]:
+        now = self.clock()
+        return [
+            {
+                "folder": entry.folder,
+                "change_rate": None
+                if entry.change_rate is None
+                else round(entry.change_rate, 3),
+                "interval": round(entry.interval),
+                "due_in": max(0, round(entry.next_due - now)),
+                "pushed": entry.folder in self.pushed,
+            }
+            for entry in sorted(self.folders.values(), key=lambda e: e.next_due)
+        ]
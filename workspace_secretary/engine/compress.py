@@ -0,0 +1,100 @@
+"""IMAP COMPRESS=DEFLATE (RFC 4978) for imaplib connections.
+
+After the server accepts ``COMPRESS DEFLATE``, everything either side sends is
+one raw DEFLATE stream (no zlib header). ``DeflateTransport`` takes over an
+``imaplib.IMAP4`` instance's ``read``, ``readline`` and ``send``, so imaplib
+and imapclient keep working on plain IMAP text while the socket carries
+compressed bytes. Every command is flushed with ``Z_SYNC_FLUSH`` so the server
+can act on it at once.
+
+The transport counts bytes before and after compression in both directions;
+``stats()`` shows how much the connection saved.
+"""
+
+from __future__ import annotations
+
+import imaplib
+import io
+import zlib
+from typing import Any, cast
+
+# Compressed bytes read from the socket at a time.
+READ_CHUNK_SIZE = 16384
+
+
+class DeflateTransport:
+    """Raw DEFLATE in both directions over an imaplib connection.
+
+    Args:
+        imap: Connection whose server just accepted ``COMPRESS DEFLATE``.
+            Bytes it already buffered are read as the start of the
+            compressed stream.
+        level: zlib compression level for what the client sends.
+    """
+
+    def __init__(self, imap: imaplib.IMAP4, level: int = zlib.Z_DEFAULT_COMPRESSION):
+        # imaplib opens the socket file with makefile("rb").
+        self._file = cast(io.BufferedReader, imap.file)
+        self._sock = imap.sock
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._buffer = bytearray()
+        self.bytes_received = 0
+        self.bytes_received_wire = 0
+        self.bytes_sent = 0
+        self.bytes_sent_wire = 0
+        # Instance attributes shadow the class methods imaplib calls.
+        imap.read = self.read  # type: ignore[method-assign]
+        imap.readline = self.readline  # type: ignore[method-assign]
+        imap.send = self.send  # type: ignore[method-assign, assignment]
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) < size and self._fill():
+            pass
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readline(self) -> bytes:
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", start)
+            if end >= 0:
+                end += 1
+                break
+            start = len(self._buffer)
+            if not self._fill():
+                end = len(self._buffer)
+                break
+        line = bytes(self._buffer[:end])
+        del self._buffer[:end]
+        return line
+
+    def send(self, data: bytes) -> None:
+        compressed = self._compressor.compress(data)
+        compressed += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.bytes_sent += len(data)
+        self.bytes_sent_wire += len(compressed)
+        self._sock.sendall(compressed)
+
+    def _fill(self) -> bool:
+        """Decompress the next chunk from the socket; False at EOF."""
+        data = self._file.read1(READ_CHUNK_SIZE)
+        if not data:
+            return False
+        self.bytes_received_wire += len(data)
+        plain = self._decompressor.decompress(data)
+        self.bytes_received += len(plain)
+        self._buffer += plain
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        plain = self.bytes_received + self.bytes_sent
+        wire = self.bytes_received_wire + self.bytes_sent_wire
+        return {
+            "bytes_received": self.bytes_received,
+            "bytes_received_wire": self.bytes_received_wire,
+            "bytes_sent": self.bytes_sent,
+            "bytes_sent_wire": self.bytes_sent_wire,
+            "ratio": round(wire / plain, 3) if plain else None,
+        }
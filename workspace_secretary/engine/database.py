@@ -1,16 +1,331 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import re
 import sqlite3
+import threading
 from abc import ABC, abstractmethod
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import getaddresses
 from pathlib import Path
 from typing import Any, Iterator, Optional, Protocol
 
 logger = logging.getLogger(__name__)
 
+# SQLite tuning, applied to every connection. WAL lets readers run while the
+# sync writes; synchronous=NORMAL is durable across crashes of the process (not
+# of the OS) in WAL mode. cache_size is in KiB when negative.
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -32768",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+# Prepared statements each connection keeps for reuse.
+SQLITE_STATEMENT_CACHE = 256
+
+# Ranked full-text search. Matches are scored by relevance (bm25 column weights
+# for subject, from, to and body in SQLite; tsvector weights A-D in Postgres)
+# with a recency boost: an email from today scores up to SEARCH_RECENCY_BOOST
+# more, half that at SEARCH_RECENCY_DAYS old. SQLite boosts only the best
+# SEARCH_CANDIDATES by relevance. Only returned rows get a snippet.
+FTS_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+SEARCH_CANDIDATES = 500
+SEARCH_RECENCY_BOOST = 0.5
+SEARCH_RECENCY_DAYS = 30
+SEARCH_SNIPPET_TOKENS = 16
+
+# Postgres: stored, weighted search document behind full_text_search().
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', COALESCE(subject, '')), 'A')"
+    " || setweight(to_tsvector('english', COALESCE(from_addr, '')), 'B')"
+    " || setweight(to_tsvector('english', COALESCE(to_addr, '')), 'C')"
+    " || setweight(to_tsvector('english', COALESCE(body_text, '')), 'D')"
+)
+PG_HEADLINE_OPTIONS = (
+    'MaxFragments=2, MinWords=5, MaxWords=16, FragmentDelimiter=" … "'
+)
+
+
+def pg_search_rank(table: str, query: str) -> str:
+    """Postgres expression ranking ``table`` rows against tsquery ``query``."""
+    age_days = (
+        f"EXTRACT(EPOCH FROM NOW() - COALESCE({table}.internal_date, {table}.date))"
+        " / 86400"
+    )
+    return (
+        f"ts_rank_cd({table}.search_vector, {query}, 1)"
+        f" * (1 + {SEARCH_RECENCY_BOOST}"
+        f" / (1 + GREATEST(COALESCE({age_days}, 3650), 0) / {SEARCH_RECENCY_DAYS}))"
+    )
+
+# Column order shared by the single-row and batched email upserts.
+EMAIL_COLUMNS = (
+    "uid",
+    "folder",
+    "message_id",
+    "subject",
+    "from_addr",
+    "to_addr",
+    "cc_addr",
+    "bcc_addr",
+    "date",
+    "internal_date",
+    "body_text",
+    "body_html",
+    "flags",
+    "is_unread",
+    "is_important",
+    "size",
+    "modseq",
+    "synced_at",
+    "in_reply_to",
+    "references_header",
+    "content_hash",
+    "gmail_thread_id",
+    "gmail_msgid",
+    "gmail_labels",
+    "has_attachments",
+    "attachment_filenames",
+    "auth_results_raw",
+    "spf",
+    "dkim",
+    "dmarc",
+    "is_suspicious_sender",
+    "suspicious_sender_signals",
+    "body_hydrated",
+    "attachment_info",
+)
+
+
+# Columns copy_emails_batch() sets per copy; the rest come from the source row.
+_COPY_COLUMNS = (
+    "uid",
+    "folder",
+    "flags",
+    "is_unread",
+    "is_important",
+    "modseq",
+    "synced_at",
+    "gmail_labels",
+)
+
+
+# Large columns an upsert leaves alone while the message content is unchanged.
+_BODY_COLUMNS = ("body_text", "body_html")
+
+
+# Emails with a move still pending wait outside their folder, under this prefix
+# plus the folder name, keeping their UID until the server assigns a new one.
+PENDING_MOVE_PREFIX = "[Moving]/"
+
+
+def pending_move_folder(folder: str) -> str:
+    """Where enqueue_mutations() parks emails of ``folder`` being moved."""
+    return f"{PENDING_MOVE_PREFIX}{folder}"
+
+
+def compute_content_hash(subject: Optional[str], body_text: Optional[str]) -> str:
+    content = f"{subject or ''}{body_text or ''}"
+    return hashlib.sha256(content.encode()).hexdigest()[:32]
+
+
+def _dedupe_email_rows(emails: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Keep the last row per (uid, folder) so one batch never hits a key twice."""
+    by_key: dict[tuple[int, str], dict[str, Any]] = {}
+    for email in emails:
+        by_key[(email["uid"], email["folder"])] = email
+    return list(by_key.values())
+
+
+_SEARCH_TOKEN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+
+def fts5_query(text: str) -> str:
+    """Turn a web-search style query into an FTS5 MATCH expression.
+
+    Words match as prefixes, ``"quoted phrases"`` match exactly, ``OR`` joins
+    alternatives and a leading ``-`` excludes a word or phrase. Returns an
+    empty string when nothing searchable is left.
+    """
+    terms: list[str] = []
+    excluded: list[str] = []
+    for negate, phrase, word in _SEARCH_TOKEN.findall(text):
+        if word == "OR":
+            if terms and terms[-1] != "OR":
+                terms.append("OR")
+            continue
+        if word.startswith("-"):
+            negate, word = "-", word[1:]
+        token = (phrase or word).replace('"', "")
+        if not re.search(r"\w", token):
+            continue
+        # Quoted, so FTS5 operators and punctuation in the text are literal.
+        term = f'"{token}"' if phrase else f'"{token}"*'
+        (excluded if negate else terms).append(term)
+    if terms and terms[-1] == "OR":
+        terms.pop()
+    if not terms:
+        return ""
+    query = " ".join(terms)
+    for term in excluded:
+        query = f"({query}) NOT {term}"
+    return query
+
+
+def like_pattern(text: str) -> str:
+    """``%text%`` for LIKE/ILIKE, with wildcards in ``text`` escaped."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+# Header each participants.role comes from.
+PARTICIPANT_COLUMNS = {"from": "from_addr", "to": "to_addr", "cc": "cc_addr"}
+
+_ADDRESS = re.compile(r"[^@\s<>,]+@[^@\s<>,]+\.[^@\s<>,]+")
+
+
+def participant_rows(email: dict[str, Any]) -> list[tuple[str, str, str, str]]:
+    """``(role, address, display_name, domain)`` for each sender and recipient.
+
+    Uses the ``participants`` that ingest attaches to the row. Rows without
+    them have their From, To and Cc headers parsed.
+    """
+    participants = email.get("participants")
+    if participants is None:
+        participants = [
+            {"role": role, "address": address, "display_name": name}
+            for role, column in PARTICIPANT_COLUMNS.items()
+            for name, address in getaddresses([email.get(column) or ""])
+        ]
+    rows: dict[tuple[str, str], tuple[str, str, str, str]] = {}
+    for participant in participants:
+        address = (participant["address"] or "").strip().lower()
+        if "@" not in address:
+            continue
+        role = participant["role"]
+        rows[(role, address)] = (
+            role,
+            address,
+            participant.get("display_name") or "",
+            address.rsplit("@", 1)[1],
+        )
+    return list(rows.values())
+
+
+def participant_key(text: str) -> Optional[tuple[str, str]]:
+    """Participants column and value an address filter can look up exactly.
+
+    ``("address", ...)`` for a complete address, ``("domain", ...)`` for
+    ``@domain``; None for anything else, which stays a substring match.
+    """
+    text = text.strip().lower()
+    if text.startswith("@") and "." in text:
+        return "domain", text[1:]
+    if _ADDRESS.fullmatch(text):
+        return "address", text
+    return None
+
+
+def pg_address_filter(column: str, text: str, alias: str = "") -> tuple[str, Any]:
+    """Postgres condition and parameter for a from_addr/to_addr filter."""
+    key = participant_key(text)
+    if key is None:
+        return f"{alias}{column} ILIKE %s", like_pattern(text)
+    role = "from" if column == "from_addr" else "to"
+    return (
+        f"({alias}uid, {alias}folder) IN (SELECT email_uid, email_folder"
+        f" FROM participants WHERE {key[0]} = %s AND role = '{role}')",
+        key[1],
+    )
+
+
+def _email_upsert_clause(excluded: str, distinct: str) -> str:
+    """``ON CONFLICT (uid, folder)`` action for writing email rows.
+
+    The update is skipped when the incoming row matches the stored one, and
+    the body columns keep their stored values while ``content_hash`` and
+    ``body_hydrated`` are unchanged, so re-syncing a message does not rewrite
+    its body or its full-text index entry.
+
+    Args:
+        excluded: The backend's name for the incoming row.
+        distinct: The backend's null-safe "differs from" operator.
+    """
+    keep_body = (
+        f"emails.content_hash = {excluded}.content_hash"
+        f" AND emails.body_hydrated = {excluded}.body_hydrated"
+    )
+    assignments = []
+    for column in EMAIL_COLUMNS:
+        if column in ("uid", "folder"):
+            continue
+        if column in _BODY_COLUMNS:
+            assignments.append(
+                f"{column} = CASE WHEN {keep_body} THEN emails.{column}"
+                f" ELSE {excluded}.{column} END"
+            )
+        else:
+            assignments.append(f"{column} = {excluded}.{column}")
+    compared = [
+        column
+        for column in EMAIL_COLUMNS
+        if column not in ("uid", "folder", "synced_at") + _BODY_COLUMNS
+    ]
+    stored = ", ".join(f"emails.{column}" for column in compared)
+    incoming = ", ".join(f"{excluded}.{column}" for column in compared)
+    return (
+        "ON CONFLICT (uid, folder) DO UPDATE SET\n"
+        + ",\n".join(assignments)
+        + f"\nWHERE ({stored}) {distinct} ({incoming})"
+    )
+
+
+def _apply_label_action(
+    current: list[str], labels: list[str], action: str
+) -> list[str]:
+    """Gmail labels of an email after an add, remove or set."""
+    if action == "set":
+        return list(labels)
+    if action == "remove":
+        return [label for label in current if label not in labels]
+    return current + [label for label in labels if label not in current]
+
+
+def _uids_by_folder(mutations: list[dict[str, Any]]) -> dict[str, list[int]]:
+    by_folder: dict[str, set[int]] = {}
+    for mutation in mutations:
+        by_folder.setdefault(mutation["folder"], set()).add(mutation["uid"])
+    return {folder: sorted(uids) for folder, uids in by_folder.items()}
+
+
+def _mutation_changes(mutations: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Turn journaled mutations into apply_email_changes() changes.
+
+    Mutations with the same folder, action and params share one change.
+    """
+    changes: dict[tuple[str, str, str], dict[str, Any]] = {}
+    for mutation in mutations:
+        action = mutation["action"]
+        params = mutation.get("params") or {}
+        key = (mutation["folder"], action, json.dumps(params, sort_keys=True))
+        change = changes.get(key)
+        if change is None:
+            change = changes[key] = {"folder": mutation["folder"], "uids": []}
+            if action in ("mark_read", "mark_unread"):
+                change["is_read"] = action == "mark_read"
+            elif action == "labels":
+                change["labels"] = params["labels"]
+                change["label_action"] = params.get("label_action", "add")
+            elif action == "move":
+                change["move_to"] = pending_move_folder(mutation["folder"])
+        change["uids"].append(mutation["uid"])
+    return list(changes.values())
+
 
 class DatabaseConnection(Protocol):
     def execute(self, query: str, params: tuple[Any, ...] = ()) -> Any: ...
@@ -38,7 +353,20 @@ class DatabaseInterface(ABC):
     def supports_embeddings(self) -> bool:
         return False
 
-    def get_synced_uids(self, folder: str) -> list[int]:
+    def get_synced_uids(
+        self,
+        folder: str,
+        uid_min: Optional[int] = None,
+        uid_max: Optional[int] = None,
+    ) -> list[int]:
+        raise NotImplementedError
+
+    def save_sync_cursor(self, folder: str, backfill_lo: int, backfill_hi: int) -> None:
+        """Persist the UID window an interrupted initial sync still has to cover."""
+        raise NotImplementedError
+
+    def save_change_rate(self, folder: str, change_rate: float) -> None:
+        """Persist a folder's learned change rate (changes per hour)."""
         raise NotImplementedError
 
     def count_emails(self, folder: str) -> int:
@@ -136,6 +464,153 @@ class DatabaseInterface(ABC):
     ) -> None:
         raise NotImplementedError
 
+    def upsert_emails_batch(self, emails: list[dict[str, Any]]) -> int:
+        """Upsert many emails in a single transaction.
+
+        Args:
+            emails: Dicts with the same keys as the upsert_email() arguments.
+
+        Returns:
+            Number of rows written.
+        """
+        for email in emails:
+            self.upsert_email(**email)
+        return len(emails)
+
+    def update_flags_batch(self, updates: list[dict[str, Any]]) -> int:
+        """Apply many flag updates in a single transaction.
+
+        Args:
+            updates: Dicts with the same keys as the update_email_flags() arguments.
+                A ``modseq`` of None keeps the stored value.
+
+        Returns:
+            Number of updates applied.
+        """
+        for update in updates:
+            self.update_email_flags(**update)
+        return len(updates)
+
+    def find_gmail_msgid_sources(
+        self, msgids: list[int]
+    ) -> dict[int, tuple[int, str]]:
+        """Map Gmail message IDs to a cached (uid, folder) row holding them.
+
+        Rows with a body are preferred over header-only ones.
+        """
+        raise NotImplementedError
+
+    def copy_emails_batch(self, copies: list[dict[str, Any]]) -> int:
+        """Store already-cached messages under another (uid, folder).
+
+        Args:
+            copies: Dicts with uid, folder, source_uid, source_folder, flags,
+                is_unread, is_important, modseq and gmail_labels. Every other
+                column, and the embedding if there is one, is copied from the
+                source row.
+
+        Returns:
+            Number of rows written.
+        """
+        raise NotImplementedError
+
+    def get_recipient_stats(
+        self, folder: str, uids: list[int], addresses: list[str]
+    ) -> dict[int, dict[str, Any]]:
+        """Recipient counts and "addressed to me" for emails of one folder.
+
+        Args:
+            folder: Folder of the emails.
+            uids: Emails to look up.
+            addresses: The user's addresses, lowercase.
+
+        Returns:
+            UID -> ``recipients`` (To plus Cc), ``to_me`` and ``cc_me``.
+            Emails without participants are left out.
+        """
+        raise NotImplementedError
+
+    def delete_emails_batch(self, folder: str, uids: list[int]) -> int:
+        """Delete many emails of one folder in a single transaction.
+
+        Embeddings of the deleted emails are removed with them.
+
+        Returns:
+            Number of rows deleted.
+        """
+        for uid in uids:
+            self.delete_email(uid, folder)
+        return len(uids)
+
+    def apply_email_changes(self, changes: list[dict[str, Any]]) -> int:
+        """Apply user mutations of many emails in a single transaction.
+
+        Args:
+            changes: Dicts with ``folder`` and ``uids`` plus any of ``is_read``
+                (bool), ``labels`` with ``label_action`` ("add", "remove" or
+                "set"), ``move_to`` (a folder to put the rows in, keeping
+                their UIDs) and ``delete`` (True to drop the rows). Changes
+                are applied in that order.
+
+        Returns:
+            Number of emails changed.
+        """
+        raise NotImplementedError
+
+    def relocate_emails(self, moves: list[tuple[int, str, int, str]]) -> int:
+        """Give cached emails a new (uid, folder) after they moved.
+
+        The rows keep their bodies, labels and embeddings. Where the new key
+        is already cached, e.g. because a sync fetched the email first, the
+        old row is dropped instead.
+
+        Args:
+            moves: (uid, folder, new_uid, new_folder) tuples.
+
+        Returns:
+            Number of rows relocated.
+        """
+        raise NotImplementedError
+
+    def get_unhydrated_emails(
+        self,
+        limit: int = 50,
+        folders: Optional[list[str]] = None,
+        max_attempts: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """Return (uid, folder, subject) of header-only rows, newest first.
+
+        Args:
+            limit: Maximum number of rows.
+            folders: Only rows in these folders.
+            max_attempts: Skip rows whose body fetch failed this many times.
+        """
+        raise NotImplementedError
+
+    def record_hydration_failures(self, folder: str, uids: list[int]) -> int:
+        """Count a failed body fetch for header-only rows of ``folder``.
+
+        Returns:
+            Number of rows updated.
+        """
+        raise NotImplementedError
+
+    def update_email_bodies_batch(self, bodies: list[dict[str, Any]]) -> int:
+        """Store fetched bodies for header-only rows and mark them hydrated.
+
+        Header-only rows of the same Gmail message (``gmail_msgid``) in other
+        folders receive the body as well, so only pass bodies that were
+        actually fetched; a row missing from the fetch must stay header-only.
+
+        Args:
+            bodies: Dicts with uid, folder, subject, body_text, body_html,
+                has_attachments, attachment_filenames and attachment_info.
+
+        Returns:
+            Number of rows updated.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def get_email_by_uid(self, uid: int, folder: str) -> Optional[dict[str, Any]]:
         raise NotImplementedError
@@ -157,6 +632,24 @@ class DatabaseInterface(ABC):
     ) -> list[dict[str, Any]]:
         raise NotImplementedError
 
+    def full_text_search(
+        self,
+        query: str,
+        folder: Optional[str] = None,
+        is_unread: Optional[bool] = None,
+        from_addr: Optional[str] = None,
+        to_addr: Optional[str] = None,
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        """Emails matching ``query``, most relevant first.
+
+        ``query`` takes web-search syntax: words (matched as prefixes in
+        SQLite), ``"quoted phrases"``, ``OR`` and ``-excluded`` terms. Each
+        row carries a ``rank`` (relevance with a recency boost) and a
+        ``snippet`` of the matching text with hits wrapped in ``**``.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def delete_email(self, uid: int, folder: str) -> None:
         raise NotImplementedError
@@ -179,6 +672,25 @@ class DatabaseInterface(ABC):
     def clear_folder(self, folder: str) -> int:
         raise NotImplementedError
 
+    def get_message_ids(self, folder: str) -> list[dict[str, Any]]:
+        """Return (uid, message_id, gmail_msgid) of every email in ``folder``."""
+        raise NotImplementedError
+
+    def remap_folder_uids(self, folder: str, uid_map: dict[int, int]) -> int:
+        """Renumber a folder's emails after its UIDVALIDITY changed.
+
+        Rows keep their bodies, labels and embeddings. Rows whose UID is not in
+        ``uid_map`` are deleted. PENDING journal rows follow their email.
+
+        Args:
+            folder: Folder to renumber.
+            uid_map: Old UID -> new UID; new UIDs must be distinct.
+
+        Returns:
+            Number of rows renumbered.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def log_sync_error(
         self,
@@ -210,23 +722,110 @@ class DatabaseInterface(ABC):
     def get_mutation(self, mutation_id: int) -> Optional[dict]:
         raise NotImplementedError
 
+    def enqueue_mutations(self, mutations: list[dict[str, Any]]) -> int:
+        """Journal mutations as PENDING and apply them to the cache.
+
+        Both happen in one transaction. Each journal row records the email's
+        read state and labels from before the batch as ``pre_state``. Moved
+        emails are parked in pending_move_folder() of their folder until the
+        server has moved them.
+
+        Args:
+            mutations: Dicts with uid, folder, action ("mark_read",
+                "mark_unread", "labels" or "move") and params (``labels`` and
+                ``label_action`` for labels, ``destination`` for a move).
+
+        Returns:
+            Number of mutations journaled.
+        """
+        raise NotImplementedError
+
+    def list_pending_mutations(self, limit: int = 1000) -> list[dict[str, Any]]:
+        """Oldest PENDING journal rows, with params and pre_state decoded."""
+        raise NotImplementedError
+
+    def update_mutations_status(
+        self,
+        mutation_ids: list[int],
+        status: str,
+        error: Optional[str] = None,
+        attempted: bool = False,
+    ) -> None:
+        """Set the status of many journal rows.
+
+        Args:
+            mutation_ids: Journal row ids.
+            status: PENDING, COMPLETED or FAILED.
+            error: Error to record, or None to clear it.
+            attempted: Count a failed attempt to apply the rows.
+        """
+        raise NotImplementedError
+
 
 class SqliteDatabase(DatabaseInterface):
+    """SQLite cache with one shared writer and one reader per thread.
+
+    Connections stay open for the life of the database, so their prepared
+    statements are reused. Writes are serialized on the writer connection;
+    reads run on the calling thread's own connection and, in WAL mode, never
+    wait for a write in progress.
+    """
+
     def __init__(self, db_path: str = "config/secretary.db"):
         self.db_path = db_path
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._trigram = False
 
     def supports_embeddings(self) -> bool:
         return False
 
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=SQLITE_STATEMENT_CACHE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
     @contextmanager
     def _get_email_connection(self) -> Iterator[sqlite3.Connection]:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """The writer connection, held by the calling thread for the block.
+
+        Work the block does not commit is rolled back, as it was when every
+        call opened and closed its own connection.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+                self._writer.execute("PRAGMA journal_mode = WAL")
+            conn = self._writer
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+
+    @contextmanager
+    def _get_read_connection(self) -> Iterator[sqlite3.Connection]:
+        """The calling thread's reader connection, for SELECTs only."""
+        conn = getattr(self._local, "reader", None)
+        if conn is None:
+            conn = self._local.reader = self._connect()
+            with self._readers_lock:
+                self._readers.append(conn)
         try:
             yield conn
         finally:
-            conn.close()
+            if conn.in_transaction:
+                conn.rollback()
 
     def initialize(self) -> None:
         self._init_email_db()
@@ -237,7 +836,15 @@ class SqliteDatabase(DatabaseInterface):
             yield conn
 
     def close(self) -> None:
-        return
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        self._local = threading.local()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
 
     def _init_email_db(self) -> None:
         with self._get_email_connection() as conn:
@@ -276,6 +883,9 @@ class SqliteDatabase(DatabaseInterface):
                     dmarc TEXT,
                     is_suspicious_sender INTEGER DEFAULT 0,
                     suspicious_sender_signals TEXT,
+                    body_hydrated INTEGER DEFAULT 1,
+                    attachment_info TEXT,
+                    hydrate_attempts INTEGER DEFAULT 0,
                     PRIMARY KEY (uid, folder)
                 )
                 """
@@ -288,6 +898,9 @@ class SqliteDatabase(DatabaseInterface):
                 ("dmarc", "TEXT"),
                 ("is_suspicious_sender", "INTEGER DEFAULT 0"),
                 ("suspicious_sender_signals", "TEXT"),
+                ("body_hydrated", "INTEGER DEFAULT 1"),
+                ("attachment_info", "TEXT"),
+                ("hydrate_attempts", "INTEGER DEFAULT 0"),
             ]:
                 try:
                     conn.execute(
@@ -303,11 +916,26 @@ class SqliteDatabase(DatabaseInterface):
                     uidvalidity INTEGER,
                     uidnext INTEGER,
                     highestmodseq INTEGER,
-                    last_sync TEXT
+                    last_sync TEXT,
+                    backfill_lo INTEGER,
+                    backfill_hi INTEGER,
+                    change_rate REAL
                 )
                 """
             )
 
+            for col_def in [
+                ("backfill_lo", "INTEGER"),
+                ("backfill_hi", "INTEGER"),
+                ("change_rate", "REAL"),
+            ]:
+                try:
+                    conn.execute(
+                        f"ALTER TABLE folder_state ADD COLUMN {col_def[0]} {col_def[1]}"
+                    )
+                except Exception:
+                    pass
+
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS mutation_journal (
@@ -321,8 +949,20 @@ class SqliteDatabase(DatabaseInterface):
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                     updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
                     error TEXT,
-                    FOREIGN KEY (email_uid, email_folder) REFERENCES emails(uid, folder) ON DELETE CASCADE
+                    attempts INTEGER DEFAULT 0
+                )
+                """
+            )
+            try:
+                conn.execute(
+                    "ALTER TABLE mutation_journal ADD COLUMN attempts INTEGER DEFAULT 0"
                 )
+            except Exception:
+                pass
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_mutation_journal_pending
+                ON mutation_journal(id) WHERE status = 'PENDING'
                 """
             )
 
@@ -363,14 +1003,28 @@ class SqliteDatabase(DatabaseInterface):
                 """
             )
 
+            # Prefix indexes make "word"* queries cheap. Older databases have
+            # an index without them, which is rebuilt once from emails.
+            fts = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'emails_fts'"
+            ).fetchone()
+            rebuild = fts is None or "prefix" not in fts[0]
+            if fts is not None and rebuild:
+                conn.execute("DROP TABLE emails_fts")
             conn.execute(
                 """
                 CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5(
                     subject, from_addr, to_addr, body_text,
-                    content='emails', content_rowid='rowid'
+                    content='emails', content_rowid='rowid',
+                    prefix='2 3', tokenize='unicode61 remove_diacritics 2'
                 )
                 """
             )
+            if rebuild:
+                conn.execute("INSERT INTO emails_fts(emails_fts) VALUES ('rebuild')")
+
+            self._trigram = self._init_trigram_index(conn)
+            self._init_participants(conn)
 
             conn.execute(
                 """
@@ -388,9 +1042,18 @@ class SqliteDatabase(DatabaseInterface):
                 END
                 """
             )
+            # Re-index only when an indexed column changes, not on flag updates.
+            # Recreated every start so databases with the old trigger pick it up.
+            conn.execute("DROP TRIGGER IF EXISTS emails_au")
             conn.execute(
                 """
-                CREATE TRIGGER IF NOT EXISTS emails_au AFTER UPDATE ON emails BEGIN
+                CREATE TRIGGER emails_au
+                AFTER UPDATE OF subject, from_addr, to_addr, body_text ON emails
+                WHEN old.subject IS NOT new.subject
+                    OR old.from_addr IS NOT new.from_addr
+                    OR old.to_addr IS NOT new.to_addr
+                    OR old.body_text IS NOT new.body_text
+                BEGIN
                     INSERT INTO emails_fts(emails_fts, rowid, subject, from_addr, to_addr, body_text)
                     VALUES('delete', old.rowid, old.subject, old.from_addr, old.to_addr, old.body_text);
                     INSERT INTO emails_fts(rowid, subject, from_addr, to_addr, body_text)
@@ -415,6 +1078,9 @@ class SqliteDatabase(DatabaseInterface):
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_emails_gmail_thread_id ON emails(gmail_thread_id)"
             )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_emails_gmail_msgid ON emails(gmail_msgid)"
+            )
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_emails_has_attachments ON emails(has_attachments)"
             )
@@ -424,9 +1090,191 @@ class SqliteDatabase(DatabaseInterface):
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_emails_is_suspicious_sender ON emails(is_suspicious_sender)"
             )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_emails_unhydrated
+                ON emails(internal_date) WHERE body_hydrated = 0
+                """
+            )
 
             conn.commit()
 
+    @staticmethod
+    def _init_trigram_index(conn: sqlite3.Connection) -> bool:
+        """Create the trigram index behind substring filters.
+
+        Returns False when this SQLite (before 3.34) has no trigram tokenizer;
+        substring filters then scan with LIKE.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'emails_trigram'"
+        ).fetchone()
+        try:
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS emails_trigram USING fts5(
+                    from_addr, to_addr, subject,
+                    content='emails', content_rowid='rowid',
+                    tokenize='trigram', detail='none'
+                )
+                """
+            )
+        except sqlite3.OperationalError as e:
+            logger.warning(f"No trigram index, substring filters will scan: {e}")
+            return False
+
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS emails_trigram_ai AFTER INSERT ON emails BEGIN
+                INSERT INTO emails_trigram(rowid, from_addr, to_addr, subject)
+                VALUES (new.rowid, new.from_addr, new.to_addr, new.subject);
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS emails_trigram_ad AFTER DELETE ON emails BEGIN
+                INSERT INTO emails_trigram(emails_trigram, rowid, from_addr, to_addr, subject)
+                VALUES ('delete', old.rowid, old.from_addr, old.to_addr, old.subject);
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS emails_trigram_au
+            AFTER UPDATE OF from_addr, to_addr, subject ON emails
+            WHEN old.from_addr IS NOT new.from_addr
+                OR old.to_addr IS NOT new.to_addr
+                OR old.subject IS NOT new.subject
+            BEGIN
+                INSERT INTO emails_trigram(emails_trigram, rowid, from_addr, to_addr, subject)
+                VALUES ('delete', old.rowid, old.from_addr, old.to_addr, old.subject);
+                INSERT INTO emails_trigram(rowid, from_addr, to_addr, subject)
+                VALUES (new.rowid, new.from_addr, new.to_addr, new.subject);
+            END
+            """
+        )
+        if not exists:
+            conn.execute(
+                "INSERT INTO emails_trigram(emails_trigram) VALUES ('rebuild')"
+            )
+        return True
+
+    @staticmethod
+    def _init_participants(conn: sqlite3.Connection) -> None:
+        """Create the participants table, filling it from cached emails once.
+
+        Rows are keyed by the email's rowid, which moves and UID remaps keep;
+        a trigger deletes them with their email.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'participants'"
+        ).fetchone()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS participants (
+                email_key INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                address TEXT NOT NULL,
+                display_name TEXT,
+                domain TEXT NOT NULL,
+                PRIMARY KEY (email_key, role, address)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_participants_address
+            ON participants(address, role)
+            """
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_participants_domain
+            ON participants(domain, role)
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS emails_participants_ad
+            AFTER DELETE ON emails BEGIN
+                DELETE FROM participants WHERE email_key = old.rowid;
+            END
+            """
+        )
+        if exists:
+            return
+
+        cursor = conn.execute("SELECT rowid, from_addr, to_addr, cc_addr FROM emails")
+        backfilled = 0
+        while batch := cursor.fetchmany(1000):
+            rows = [
+                (row[0], *participant)
+                for row in batch
+                for participant in participant_rows(
+                    {"from_addr": row[1], "to_addr": row[2], "cc_addr": row[3]}
+                )
+            ]
+            conn.executemany(
+                "INSERT OR IGNORE INTO participants VALUES (?, ?, ?, ?, ?)", rows
+            )
+            backfilled += len(batch)
+        if backfilled:
+            logger.info(f"Indexed participants of {backfilled} cached emails")
+
+    def _write_participants(
+        self, conn: sqlite3.Connection, emails: list[dict[str, Any]]
+    ) -> None:
+        """Add participants of upserted ``emails``; existing rows stay."""
+        conn.executemany(
+            """
+            INSERT OR IGNORE INTO participants
+            SELECT rowid, ?, ?, ?, ? FROM emails WHERE uid = ? AND folder = ?
+            """,
+            [
+                (*participant, email["uid"], email["folder"])
+                for email in emails
+                for participant in participant_rows(email)
+            ],
+        )
+
+    def _address_filter(
+        self, column: str, text: str, alias: str = ""
+    ) -> tuple[str, list[Any]]:
+        """Condition and parameters for a from_addr/to_addr filter.
+
+        A complete address or ``@domain`` is an index lookup in participants;
+        anything else is a substring match.
+        """
+        key = participant_key(text)
+        if key is None:
+            return self._contains(column, text, alias)
+        role = "from" if column == "from_addr" else "to"
+        return (
+            f"{alias}rowid IN (SELECT email_key FROM participants"
+            f" WHERE {key[0]} = ? AND role = '{role}')",
+            [key[1]],
+        )
+
+    def _contains(
+        self, column: str, text: str, alias: str = ""
+    ) -> tuple[str, list[Any]]:
+        """Condition and parameters for ``column`` containing ``text``.
+
+        The trigram index narrows the rows when ``text`` has a run of three
+        characters without LIKE wildcards; FTS5 cannot escape those, so its
+        match is a superset that the escaped LIKE then checks exactly.
+        """
+        condition = f"{alias}{column} LIKE ? ESCAPE '\\'"
+        params: list[Any] = [like_pattern(text)]
+        if self._trigram and max(map(len, re.split(r"[%_]", text))) >= 3:
+            condition = (
+                f"{alias}rowid IN (SELECT rowid FROM emails_trigram"
+                f" WHERE {column} LIKE ?) AND {condition}"
+            )
+            params.insert(0, f"%{text}%")
+        return condition, params
+
     def upsert_email(
         self,
         uid: int,
@@ -460,67 +1308,107 @@ class SqliteDatabase(DatabaseInterface):
         is_suspicious_sender: bool = False,
         suspicious_sender_signals: Optional[dict[str, Any]] = None,
     ) -> None:
-        import hashlib
-
-        content = f"{subject or ''}{body_text}"
-        content_hash = hashlib.sha256(content.encode()).hexdigest()[:32]
-
-        gmail_labels_str = ",".join(gmail_labels) if gmail_labels else None
-        attachment_filenames_str = (
-            json.dumps(attachment_filenames) if attachment_filenames else None
+        self.upsert_emails_batch(
+            [
+                {
+                    "uid": uid,
+                    "folder": folder,
+                    "message_id": message_id,
+                    "subject": subject,
+                    "from_addr": from_addr,
+                    "to_addr": to_addr,
+                    "cc_addr": cc_addr,
+                    "bcc_addr": bcc_addr,
+                    "date": date,
+                    "internal_date": internal_date,
+                    "body_text": body_text,
+                    "body_html": body_html,
+                    "flags": flags,
+                    "is_unread": is_unread,
+                    "is_important": is_important,
+                    "size": size,
+                    "modseq": modseq,
+                    "in_reply_to": in_reply_to,
+                    "references_header": references_header,
+                    "gmail_thread_id": gmail_thread_id,
+                    "gmail_msgid": gmail_msgid,
+                    "gmail_labels": gmail_labels,
+                    "has_attachments": has_attachments,
+                    "attachment_filenames": attachment_filenames,
+                    "auth_results_raw": auth_results_raw,
+                    "spf": spf,
+                    "dkim": dkim,
+                    "dmarc": dmarc,
+                    "is_suspicious_sender": is_suspicious_sender,
+                    "suspicious_sender_signals": suspicious_sender_signals,
+                }
+            ]
         )
-        suspicious_sender_signals_str = (
-            json.dumps(suspicious_sender_signals) if suspicious_sender_signals else None
+
+    def _email_row(self, email: dict[str, Any], synced_at: str) -> tuple[Any, ...]:
+        gmail_labels = email.get("gmail_labels")
+        attachment_filenames = email.get("attachment_filenames")
+        attachment_info = email.get("attachment_info")
+        suspicious_sender_signals = email.get("suspicious_sender_signals")
+        return (
+            email["uid"],
+            email["folder"],
+            email.get("message_id"),
+            email.get("subject"),
+            email.get("from_addr"),
+            email.get("to_addr"),
+            email.get("cc_addr"),
+            email.get("bcc_addr"),
+            email.get("date"),
+            email.get("internal_date"),
+            email.get("body_text"),
+            email.get("body_html"),
+            email.get("flags"),
+            1 if email.get("is_unread") else 0,
+            1 if email.get("is_important") else 0,
+            email.get("size"),
+            email.get("modseq"),
+            synced_at,
+            email.get("in_reply_to"),
+            email.get("references_header"),
+            compute_content_hash(email.get("subject"), email.get("body_text")),
+            email.get("gmail_thread_id"),
+            email.get("gmail_msgid"),
+            ",".join(gmail_labels) if gmail_labels else None,
+            1 if email.get("has_attachments") else 0,
+            json.dumps(attachment_filenames) if attachment_filenames else None,
+            email.get("auth_results_raw"),
+            email.get("spf"),
+            email.get("dkim"),
+            email.get("dmarc"),
+            1 if email.get("is_suspicious_sender") else 0,
+            json.dumps(suspicious_sender_signals) if suspicious_sender_signals else None,
+            1 if email.get("body_hydrated", True) else 0,
+            json.dumps(attachment_info) if attachment_info else None,
         )
 
+    _UPSERT_CONFLICT_CLAUSE = _email_upsert_clause("excluded", "IS NOT")
+
+    def upsert_emails_batch(self, emails: list[dict[str, Any]]) -> int:
+        if not emails:
+            return 0
+
+        synced_at = datetime.utcnow().isoformat()
+        rows = [self._email_row(email, synced_at) for email in emails]
+        placeholders = ", ".join("?" * len(EMAIL_COLUMNS))
+
         with self._get_email_connection() as conn:
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO emails (
-                    uid, folder, message_id, subject, from_addr, to_addr, cc_addr,
-                    bcc_addr, date, internal_date, body_text, body_html, flags,
-                    is_unread, is_important, size, modseq, synced_at, in_reply_to,
-                    references_header, content_hash, gmail_thread_id, gmail_msgid,
-                    gmail_labels, has_attachments, attachment_filenames,
-                    auth_results_raw, spf, dkim, dmarc, is_suspicious_sender, suspicious_sender_signals
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            conn.executemany(
+                f"""
+                INSERT INTO emails ({", ".join(EMAIL_COLUMNS)})
+                VALUES ({placeholders})
+                {self._UPSERT_CONFLICT_CLAUSE}
                 """,
-                (
-                    uid,
-                    folder,
-                    message_id,
-                    subject,
-                    from_addr,
-                    to_addr,
-                    cc_addr,
-                    bcc_addr,
-                    date,
-                    internal_date,
-                    body_text,
-                    body_html,
-                    flags,
-                    1 if is_unread else 0,
-                    1 if is_important else 0,
-                    size,
-                    modseq,
-                    datetime.utcnow().isoformat(),
-                    in_reply_to,
-                    references_header,
-                    content_hash,
-                    gmail_thread_id,
-                    gmail_msgid,
-                    gmail_labels_str,
-                    1 if has_attachments else 0,
-                    attachment_filenames_str,
-                    auth_results_raw,
-                    spf,
-                    dkim,
-                    dmarc,
-                    1 if is_suspicious_sender else 0,
-                    suspicious_sender_signals_str,
-                ),
+                rows,
             )
+            self._write_participants(conn, emails)
             conn.commit()
+        return len(rows)
 
     def update_email_flags(
         self,
@@ -531,29 +1419,216 @@ class SqliteDatabase(DatabaseInterface):
         modseq: int,
         gmail_labels: Optional[list[str]] = None,
     ) -> None:
-        gmail_labels_str = ",".join(gmail_labels) if gmail_labels else None
+        self.update_flags_batch(
+            [
+                {
+                    "uid": uid,
+                    "folder": folder,
+                    "flags": flags,
+                    "is_unread": is_unread,
+                    "modseq": modseq,
+                    "gmail_labels": gmail_labels,
+                }
+            ]
+        )
+
+    def update_flags_batch(self, updates: list[dict[str, Any]]) -> int:
+        if not updates:
+            return 0
+
+        synced_at = datetime.utcnow().isoformat()
+        rows = []
+        for update in updates:
+            gmail_labels = update.get("gmail_labels")
+            rows.append(
+                (
+                    update["flags"],
+                    1 if update["is_unread"] else 0,
+                    update["modseq"],
+                    ",".join(gmail_labels) if gmail_labels else None,
+                    synced_at,
+                    update["uid"],
+                    update["folder"],
+                )
+            )
 
         with self._get_email_connection() as conn:
-            conn.execute(
+            conn.executemany(
                 """
-                UPDATE emails SET flags = ?, is_unread = ?, modseq = ?,
+                UPDATE emails SET flags = ?, is_unread = ?,
+                    modseq = COALESCE(?, modseq),
                     gmail_labels = COALESCE(?, gmail_labels), synced_at = ?
                 WHERE uid = ? AND folder = ?
                 """,
-                (
-                    flags,
-                    1 if is_unread else 0,
-                    modseq,
-                    gmail_labels_str,
-                    datetime.utcnow().isoformat(),
-                    uid,
-                    folder,
-                ),
+                rows,
             )
             conn.commit()
+        return len(rows)
+
+    def find_gmail_msgid_sources(
+        self, msgids: list[int]
+    ) -> dict[int, tuple[int, str]]:
+        if not msgids:
+            return {}
+
+        placeholders = ", ".join("?" * len(msgids))
+        with self._get_read_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                SELECT gmail_msgid, uid, folder FROM emails
+                WHERE gmail_msgid IN ({placeholders})
+                ORDER BY body_hydrated
+                """,
+                list(msgids),
+            )
+            # Hydrated rows sort last and win.
+            return {
+                int(row[0]): (int(row[1]), row[2]) for row in cursor.fetchall()
+            }
+
+    def copy_emails_batch(self, copies: list[dict[str, Any]]) -> int:
+        if not copies:
+            return 0
+
+        synced_at = datetime.utcnow().isoformat()
+        rows = []
+        for copy in copies:
+            gmail_labels = copy.get("gmail_labels")
+            values = {
+                "uid": copy["uid"],
+                "folder": copy["folder"],
+                "flags": copy["flags"],
+                "is_unread": 1 if copy["is_unread"] else 0,
+                "is_important": 1 if copy["is_important"] else 0,
+                "modseq": copy["modseq"],
+                "synced_at": synced_at,
+                "gmail_labels": ",".join(gmail_labels) if gmail_labels else None,
+            }
+            rows.append(
+                tuple(values[column] for column in EMAIL_COLUMNS if column in values)
+                + (copy["source_uid"], copy["source_folder"])
+            )
+        select = ", ".join(
+            "?" if column in _COPY_COLUMNS else column for column in EMAIL_COLUMNS
+        )
+
+        with self._get_email_connection() as conn:
+            cursor = conn.executemany(
+                f"""
+                INSERT INTO emails ({", ".join(EMAIL_COLUMNS)})
+                SELECT {select} FROM emails WHERE uid = ? AND folder = ?
+                {self._UPSERT_CONFLICT_CLAUSE}
+                """,
+                rows,
+            )
+            copied = cursor.rowcount
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO participants
+                SELECT target.rowid, p.role, p.address, p.display_name, p.domain
+                FROM emails target, emails source
+                JOIN participants p ON p.email_key = source.rowid
+                WHERE target.uid = ? AND target.folder = ?
+                    AND source.uid = ? AND source.folder = ?
+                """,
+                [row[:2] + row[-2:] for row in rows],
+            )
+            conn.commit()
+            return copied
+
+    def get_unhydrated_emails(
+        self,
+        limit: int = 50,
+        folders: Optional[list[str]] = None,
+        max_attempts: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        conditions = ["body_hydrated = 0", "folder NOT LIKE ?"]
+        params: list[Any] = [f"{PENDING_MOVE_PREFIX}%"]
+        if folders is not None:
+            conditions.append(f"folder IN ({','.join('?' * len(folders))})")
+            params.extend(folders)
+        if max_attempts is not None:
+            conditions.append("hydrate_attempts < ?")
+            params.append(max_attempts)
+        params.append(limit)
+
+        with self._get_read_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                SELECT uid, folder, subject FROM emails
+                WHERE {" AND ".join(conditions)}
+                ORDER BY internal_date DESC
+                LIMIT ?
+                """,
+                params,
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def record_hydration_failures(self, folder: str, uids: list[int]) -> int:
+        if not uids:
+            return 0
+        with self._get_email_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                UPDATE emails SET hydrate_attempts = hydrate_attempts + 1
+                WHERE folder = ? AND body_hydrated = 0
+                    AND uid IN ({",".join("?" * len(uids))})
+                """,
+                [folder, *uids],
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def update_email_bodies_batch(self, bodies: list[dict[str, Any]]) -> int:
+        if not bodies:
+            return 0
+
+        rows = [
+            (
+                body["body_text"],
+                body["body_html"],
+                1 if body.get("has_attachments") else 0,
+                json.dumps(body["attachment_filenames"])
+                if body.get("attachment_filenames")
+                else None,
+                json.dumps(body["attachment_info"])
+                if body.get("attachment_info")
+                else None,
+                compute_content_hash(body.get("subject"), body["body_text"]),
+                body["uid"],
+                body["folder"],
+            )
+            for body in bodies
+        ]
 
-    def get_email_by_uid(self, uid: int, folder: str) -> Optional[dict[str, Any]]:
         with self._get_email_connection() as conn:
+            conn.executemany(
+                """
+                UPDATE emails SET body_text = ?, body_html = ?, has_attachments = ?,
+                    attachment_filenames = ?, attachment_info = ?, content_hash = ?,
+                    body_hydrated = 1
+                WHERE uid = ? AND folder = ?
+                """,
+                rows,
+            )
+            # Gmail shows one message in several folders; fill the other
+            # header-only copies too so each body is downloaded once.
+            conn.executemany(
+                """
+                UPDATE emails SET body_text = ?, body_html = ?, has_attachments = ?,
+                    attachment_filenames = ?, attachment_info = ?, content_hash = ?,
+                    body_hydrated = 1
+                WHERE body_hydrated = 0 AND gmail_msgid = (
+                    SELECT gmail_msgid FROM emails WHERE uid = ? AND folder = ?
+                )
+                """,
+                rows,
+            )
+            conn.commit()
+        return len(rows)
+
+    def get_email_by_uid(self, uid: int, folder: str) -> Optional[dict[str, Any]]:
+        with self._get_read_connection() as conn:
             cursor = conn.execute(
                 "SELECT * FROM emails WHERE uid = ? AND folder = ?", (uid, folder)
             )
@@ -563,7 +1638,7 @@ class SqliteDatabase(DatabaseInterface):
     def get_emails_by_uids(self, uids: list[int], folder: str) -> list[dict[str, Any]]:
         if not uids:
             return []
-        with self._get_email_connection() as conn:
+        with self._get_read_connection() as conn:
             placeholders = ",".join("?" * len(uids))
             cursor = conn.execute(
                 f"SELECT * FROM emails WHERE folder = ? AND uid IN ({placeholders}) ORDER BY date DESC",
@@ -571,40 +1646,103 @@ class SqliteDatabase(DatabaseInterface):
             )
             return [dict(row) for row in cursor.fetchall()]
 
-    def _fts_search(
+    def get_recipient_stats(
+        self, folder: str, uids: list[int], addresses: list[str]
+    ) -> dict[int, dict[str, Any]]:
+        if not uids:
+            return {}
+
+        uid_marks = ", ".join("?" * len(uids))
+        mine = ", ".join("?" * len(addresses)) or "NULL"
+        with self._get_read_connection() as conn:
+            cursor = conn.execute(
+                f"""
+                SELECT e.uid,
+                    SUM(p.role IN ('to', 'cc')) AS recipients,
+                    MAX(p.role = 'to' AND p.address IN ({mine})) AS to_me,
+                    MAX(p.role = 'cc' AND p.address IN ({mine})) AS cc_me
+                FROM emails e
+                JOIN participants p ON p.email_key = e.rowid
+                WHERE e.folder = ? AND e.uid IN ({uid_marks})
+                GROUP BY e.uid
+                """,
+                [*addresses, *addresses, folder, *uids],
+            )
+            return {
+                row["uid"]: {
+                    "recipients": row["recipients"],
+                    "to_me": bool(row["to_me"]),
+                    "cc_me": bool(row["cc_me"]),
+                }
+                for row in cursor.fetchall()
+            }
+
+    def full_text_search(
         self,
-        folder: str,
-        query_text: str,
-        is_unread: Optional[bool],
-        from_addr: Optional[str],
-        to_addr: Optional[str],
-        limit: int,
+        query: str,
+        folder: Optional[str] = None,
+        is_unread: Optional[bool] = None,
+        from_addr: Optional[str] = None,
+        to_addr: Optional[str] = None,
+        limit: int = 50,
     ) -> list[dict[str, Any]]:
-        with self._get_email_connection() as conn:
-            fts_query = f'"{query_text}"'
-            base_query = """
-                SELECT e.* FROM emails e
-                JOIN emails_fts ON e.rowid = emails_fts.rowid
-                WHERE emails_fts MATCH ? AND e.folder = ?
-            """
-            params: list[Any] = [fts_query, folder]
-
-            if is_unread is not None:
-                base_query += " AND e.is_unread = ?"
-                params.append(1 if is_unread else 0)
+        fts_query = fts5_query(query)
+        if not fts_query:
+            return []
 
-            if from_addr:
-                base_query += " AND e.from_addr LIKE ?"
-                params.append(f"%{from_addr}%")
+        conditions = ["emails_fts MATCH ?"]
+        params: list[Any] = [*FTS_WEIGHTS, fts_query]
 
-            if to_addr:
-                base_query += " AND e.to_addr LIKE ?"
-                params.append(f"%{to_addr}%")
+        if folder:
+            conditions.append("e.folder = ?")
+            params.append(folder)
 
-            base_query += " ORDER BY e.date DESC LIMIT ?"
-            params.append(limit)
+        if is_unread is not None:
+            conditions.append("e.is_unread = ?")
+            params.append(1 if is_unread else 0)
 
-            cursor = conn.execute(base_query, params)
+        for column, text in (("from_addr", from_addr), ("to_addr", to_addr)):
+            if text:
+                condition, condition_params = self._address_filter(column, text, "e.")
+                conditions.append(condition)
+                params.extend(condition_params)
+
+        params.extend(
+            [
+                SEARCH_CANDIDATES,
+                SEARCH_SNIPPET_TOKENS,
+                SEARCH_RECENCY_BOOST,
+                SEARCH_RECENCY_DAYS,
+                fts_query,
+                limit,
+            ]
+        )
+        # bm25() is negative, lower is better. Snippets and the recency boost
+        # are computed for the best candidates only.
+        sql = f"""
+            WITH candidates AS (
+                SELECT e.rowid AS id, -bm25(emails_fts, ?, ?, ?, ?) AS relevance
+                FROM emails_fts JOIN emails e ON e.rowid = emails_fts.rowid
+                WHERE {" AND ".join(conditions)}
+                ORDER BY relevance DESC
+                LIMIT ?
+            )
+            SELECT e.*,
+                snippet(emails_fts, -1, '**', '**', ' … ', ?) AS snippet,
+                c.relevance * (1 + ? / (1 + MAX(COALESCE(
+                    julianday('now') - julianday(COALESCE(e.internal_date, e.date)),
+                    3650
+                ), 0) / ?)) AS rank
+            FROM candidates c
+            JOIN emails e ON e.rowid = c.id
+            JOIN emails_fts ON emails_fts.rowid = c.id
+            WHERE emails_fts MATCH ?
+            ORDER BY rank DESC
+            LIMIT ?
+        """
+
+        with self._get_read_connection() as conn:
+            cursor = conn.execute(sql, params)
             return [dict(row) for row in cursor.fetchall()]
 
     def search_emails(
@@ -618,8 +1756,8 @@ class SqliteDatabase(DatabaseInterface):
         limit: int = 100,
     ) -> list[dict[str, Any]]:
         if body_contains:
-            return self._fts_search(
-                folder, body_contains, is_unread, from_addr, to_addr, limit
+            return self.full_text_search(
+                body_contains, folder, is_unread, from_addr, to_addr, limit
             )
 
         query = "SELECT * FROM emails WHERE folder = ?"
@@ -629,22 +1767,21 @@ class SqliteDatabase(DatabaseInterface):
             query += " AND is_unread = ?"
             params.append(1 if is_unread else 0)
 
-        if from_addr:
-            query += " AND from_addr LIKE ?"
-            params.append(f"%{from_addr}%")
-
-        if to_addr:
-            query += " AND to_addr LIKE ?"
-            params.append(f"%{to_addr}%")
+        for column, text in (("from_addr", from_addr), ("to_addr", to_addr)):
+            if text:
+                condition, condition_params = self._address_filter(column, text)
+                query += f" AND {condition}"
+                params.extend(condition_params)
 
         if subject_contains:
-            query += " AND subject LIKE ?"
-            params.append(f"%{subject_contains}%")
+            condition, condition_params = self._contains("subject", subject_contains)
+            query += f" AND {condition}"
+            params.extend(condition_params)
 
         query += " ORDER BY date DESC LIMIT ?"
         params.append(limit)
 
-        with self._get_email_connection() as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
 
@@ -655,12 +1792,126 @@ class SqliteDatabase(DatabaseInterface):
             )
             conn.commit()
 
-    def mark_email_read(self, uid: int, folder: str, is_read: bool) -> None:
+    def delete_emails_batch(self, folder: str, uids: list[int]) -> int:
+        if not uids:
+            return 0
+
         with self._get_email_connection() as conn:
-            if is_read:
-                conn.execute(
-                    """
-                    UPDATE emails SET is_unread = 0,
+            cursor = conn.executemany(
+                "DELETE FROM emails WHERE uid = ? AND folder = ?",
+                [(uid, folder) for uid in uids],
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def apply_email_changes(self, changes: list[dict[str, Any]]) -> int:
+        with self._get_email_connection() as conn:
+            changed = self._apply_changes(conn, changes)
+            conn.commit()
+        return changed
+
+    @staticmethod
+    def _apply_changes(conn: sqlite3.Connection, changes: list[dict[str, Any]]) -> int:
+        """Apply apply_email_changes() changes on ``conn`` without committing."""
+        changed = 0
+        for change in changes:
+            folder, uids = change["folder"], list(change["uids"])
+            if not uids:
+                continue
+            keys = [(uid, folder) for uid in uids]
+            is_read = change.get("is_read")
+            if is_read is True:
+                conn.executemany(
+                    """
+                    UPDATE emails SET is_unread = 0,
+                    flags = CASE WHEN flags NOT LIKE '%\\Seen%'
+                        THEN flags || ',\\Seen' ELSE flags END
+                    WHERE uid = ? AND folder = ?
+                    """,
+                    keys,
+                )
+            elif is_read is False:
+                conn.executemany(
+                    """
+                    UPDATE emails SET is_unread = 1,
+                    flags = REPLACE(flags, '\\Seen', '')
+                    WHERE uid = ? AND folder = ?
+                    """,
+                    keys,
+                )
+            if change.get("label_action"):
+                placeholders = ",".join("?" * len(uids))
+                cursor = conn.execute(
+                    f"""
+                    SELECT uid, gmail_labels FROM emails
+                    WHERE folder = ? AND uid IN ({placeholders})
+                    """,
+                    (folder, *uids),
+                )
+                rows = []
+                for uid, stored in cursor.fetchall():
+                    labels = _apply_label_action(
+                        stored.split(",") if stored else [],
+                        change["labels"],
+                        change["label_action"],
+                    )
+                    rows.append((",".join(labels) or None, uid, folder))
+                conn.executemany(
+                    """
+                    UPDATE emails SET gmail_labels = ?
+                    WHERE uid = ? AND folder = ?
+                    """,
+                    rows,
+                )
+            if change.get("move_to"):
+                SqliteDatabase._relocate(
+                    conn, [(uid, folder, uid, change["move_to"]) for uid in uids]
+                )
+            if change.get("delete"):
+                conn.executemany(
+                    "DELETE FROM emails WHERE uid = ? AND folder = ?", keys
+                )
+            changed += len(uids)
+        return changed
+
+    def relocate_emails(self, moves: list[tuple[int, str, int, str]]) -> int:
+        if not moves:
+            return 0
+
+        with self._get_email_connection() as conn:
+            relocated = self._relocate(conn, moves)
+            conn.commit()
+        return relocated
+
+    @staticmethod
+    def _relocate(
+        conn: sqlite3.Connection, moves: list[tuple[int, str, int, str]]
+    ) -> int:
+        """Apply relocate_emails() moves on ``conn`` without committing."""
+        relocated = 0
+        for uid, folder, new_uid, new_folder in moves:
+            taken = conn.execute(
+                "SELECT 1 FROM emails WHERE uid = ? AND folder = ?",
+                (new_uid, new_folder),
+            ).fetchone()
+            if taken:
+                conn.execute(
+                    "DELETE FROM emails WHERE uid = ? AND folder = ?", (uid, folder)
+                )
+                continue
+            cursor = conn.execute(
+                "UPDATE emails SET uid = ?, folder = ? WHERE uid = ? AND folder = ?",
+                (new_uid, new_folder, uid, folder),
+            )
+            relocated += cursor.rowcount
+        return relocated
+
+    def mark_email_read(self, uid: int, folder: str, is_read: bool) -> None:
+        with self._get_email_connection() as conn:
+            if is_read:
+                conn.execute(
+                    """
+                    UPDATE emails SET is_unread = 0,
                     flags = CASE WHEN flags NOT LIKE '%\\Seen%'
                         THEN flags || ',\\Seen' ELSE flags END
                     WHERE uid = ? AND folder = ?
@@ -679,9 +1930,13 @@ class SqliteDatabase(DatabaseInterface):
             conn.commit()
 
     def get_folder_state(self, folder: str) -> Optional[dict[str, Any]]:
-        with self._get_email_connection() as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.execute(
-                "SELECT uidvalidity, uidnext, highestmodseq, last_sync FROM folder_state WHERE folder = ?",
+                """
+                SELECT uidvalidity, uidnext, highestmodseq, last_sync,
+                    backfill_lo, backfill_hi, change_rate
+                FROM folder_state WHERE folder = ?
+                """,
                 (folder,),
             )
             row = cursor.fetchone()
@@ -693,8 +1948,13 @@ class SqliteDatabase(DatabaseInterface):
         with self._get_email_connection() as conn:
             conn.execute(
                 """
-                INSERT OR REPLACE INTO folder_state (folder, uidvalidity, uidnext, highestmodseq, last_sync)
+                INSERT INTO folder_state (folder, uidvalidity, uidnext, highestmodseq, last_sync)
                 VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(folder) DO UPDATE SET
+                    uidvalidity = excluded.uidvalidity,
+                    uidnext = excluded.uidnext,
+                    highestmodseq = excluded.highestmodseq,
+                    last_sync = excluded.last_sync
                 """,
                 (
                     folder,
@@ -712,6 +1972,46 @@ class SqliteDatabase(DatabaseInterface):
             conn.commit()
             return cursor.rowcount
 
+    def get_message_ids(self, folder: str) -> list[dict[str, Any]]:
+        with self._get_read_connection() as conn:
+            cursor = conn.execute(
+                "SELECT uid, message_id, gmail_msgid FROM emails WHERE folder = ?",
+                (folder,),
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    def remap_folder_uids(self, folder: str, uid_map: dict[int, int]) -> int:
+        with self._get_email_connection() as conn:
+            cursor = conn.execute("SELECT uid FROM emails WHERE folder = ?", (folder,))
+            stale = [row[0] for row in cursor.fetchall() if row[0] not in uid_map]
+            conn.executemany(
+                "DELETE FROM emails WHERE uid = ? AND folder = ?",
+                [(uid, folder) for uid in stale],
+            )
+            # Negate first so no new UID collides with an old one still in place.
+            conn.execute("UPDATE emails SET uid = -uid WHERE folder = ?", (folder,))
+            cursor = conn.executemany(
+                "UPDATE emails SET uid = ? WHERE uid = ? AND folder = ?",
+                [(new, -old, folder) for old, new in uid_map.items()],
+            )
+            remapped = cursor.rowcount
+            conn.executemany(
+                """
+                UPDATE mutation_journal SET email_uid = ?
+                WHERE email_uid = ? AND email_folder = ? AND status = 'PENDING'
+                """,
+                [(-new, old, folder) for old, new in uid_map.items()],
+            )
+            conn.execute(
+                """
+                UPDATE mutation_journal SET email_uid = -email_uid
+                WHERE email_uid < 0 AND email_folder = ? AND status = 'PENDING'
+                """,
+                (folder,),
+            )
+            conn.commit()
+        return remapped
+
     def create_mutation(
         self,
         email_uid: int,
@@ -753,7 +2053,7 @@ class SqliteDatabase(DatabaseInterface):
             conn.commit()
 
     def get_pending_mutations(self, email_uid: int, email_folder: str) -> list[dict]:
-        with self._get_email_connection() as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.execute(
                 """
                 SELECT * FROM mutation_journal
@@ -765,13 +2065,99 @@ class SqliteDatabase(DatabaseInterface):
             return [dict(row) for row in cursor.fetchall()]
 
     def get_mutation(self, mutation_id: int) -> Optional[dict]:
-        with self._get_email_connection() as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.execute(
                 "SELECT * FROM mutation_journal WHERE id = ?", (mutation_id,)
             )
             row = cursor.fetchone()
             return dict(row) if row else None
 
+    def enqueue_mutations(self, mutations: list[dict[str, Any]]) -> int:
+        if not mutations:
+            return 0
+
+        with self._get_email_connection() as conn:
+            pre_states = {}
+            for folder, uids in _uids_by_folder(mutations).items():
+                placeholders = ",".join("?" * len(uids))
+                cursor = conn.execute(
+                    f"""
+                    SELECT uid, is_unread, gmail_labels FROM emails
+                    WHERE folder = ? AND uid IN ({placeholders})
+                    """,
+                    (folder, *uids),
+                )
+                for uid, is_unread, labels in cursor.fetchall():
+                    pre_states[(uid, folder)] = {
+                        "is_unread": bool(is_unread),
+                        "gmail_labels": labels.split(",") if labels else [],
+                    }
+
+            rows = []
+            for mutation in mutations:
+                pre_state = pre_states.get((mutation["uid"], mutation["folder"]))
+                rows.append(
+                    (
+                        mutation["uid"],
+                        mutation["folder"],
+                        mutation["action"],
+                        json.dumps(mutation.get("params") or {}),
+                        json.dumps(pre_state) if pre_state else None,
+                    )
+                )
+            conn.executemany(
+                """
+                INSERT INTO mutation_journal
+                    (email_uid, email_folder, action, params, pre_state)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            self._apply_changes(conn, _mutation_changes(mutations))
+            conn.commit()
+        return len(rows)
+
+    def list_pending_mutations(self, limit: int = 1000) -> list[dict[str, Any]]:
+        with self._get_read_connection() as conn:
+            cursor = conn.execute(
+                """
+                SELECT * FROM mutation_journal WHERE status = 'PENDING'
+                ORDER BY id LIMIT ?
+                """,
+                (limit,),
+            )
+            rows = [dict(row) for row in cursor.fetchall()]
+        for row in rows:
+            for column in ("params", "pre_state"):
+                row[column] = json.loads(row[column]) if row[column] else None
+            row["params"] = row["params"] or {}
+        return rows
+
+    def update_mutations_status(
+        self,
+        mutation_ids: list[int],
+        status: str,
+        error: Optional[str] = None,
+        attempted: bool = False,
+    ) -> None:
+        if not mutation_ids:
+            return
+
+        with self._get_email_connection() as conn:
+            conn.executemany(
+                """
+                UPDATE mutation_journal
+                SET status = ?, error = ?, attempts = COALESCE(attempts, 0) + ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                [
+                    (status, error, 1 if attempted else 0, mutation_id)
+                    for mutation_id in mutation_ids
+                ],
+            )
+            conn.commit()
+
     def log_sync_error(
         self,
         error_type: str,
@@ -789,16 +2175,46 @@ class SqliteDatabase(DatabaseInterface):
             )
             conn.commit()
 
-    def get_synced_uids(self, folder: str) -> list[int]:
+    def get_synced_uids(
+        self,
+        folder: str,
+        uid_min: Optional[int] = None,
+        uid_max: Optional[int] = None,
+    ) -> list[int]:
+        query = "SELECT uid FROM emails WHERE folder = ?"
+        params: list[Any] = [folder]
+        if uid_min is not None:
+            query += " AND uid >= ?"
+            params.append(uid_min)
+        if uid_max is not None:
+            query += " AND uid <= ?"
+            params.append(uid_max)
+
+        with self._get_read_connection() as conn:
+            cursor = conn.execute(query, params)
+            return [int(row[0]) for row in cursor.fetchall()]
+
+    def save_sync_cursor(self, folder: str, backfill_lo: int, backfill_hi: int) -> None:
         with self._get_email_connection() as conn:
-            cursor = conn.execute(
-                "SELECT uid FROM emails WHERE folder = ?",
-                (folder,),
+            conn.execute(
+                """
+                UPDATE folder_state SET backfill_lo = ?, backfill_hi = ?
+                WHERE folder = ?
+                """,
+                (backfill_lo, backfill_hi, folder),
             )
-            return [int(row[0]) for row in cursor.fetchall()]
+            conn.commit()
 
-    def count_emails(self, folder: str) -> int:
+    def save_change_rate(self, folder: str, change_rate: float) -> None:
         with self._get_email_connection() as conn:
+            conn.execute(
+                "UPDATE folder_state SET change_rate = ? WHERE folder = ?",
+                (change_rate, folder),
+            )
+            conn.commit()
+
+    def count_emails(self, folder: str) -> int:
+        with self._get_read_connection() as conn:
             cursor = conn.execute(
                 "SELECT COUNT(*) FROM emails WHERE folder = ?",
                 (folder,),
@@ -864,6 +2280,7 @@ class PostgresDatabase(DatabaseInterface):
         with self._pool.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
                 cur.execute(
                     """
                     CREATE TABLE IF NOT EXISTS emails (
@@ -899,6 +2316,9 @@ class PostgresDatabase(DatabaseInterface):
                         dmarc TEXT,
                         is_suspicious_sender BOOLEAN DEFAULT FALSE,
                         suspicious_sender_signals JSONB,
+                        body_hydrated BOOLEAN DEFAULT TRUE,
+                        attachment_info JSONB,
+                        hydrate_attempts INTEGER DEFAULT 0,
                         PRIMARY KEY (uid, folder)
                     )
                     """
@@ -916,6 +2336,23 @@ class PostgresDatabase(DatabaseInterface):
                 cur.execute(
                     "ALTER TABLE emails ADD COLUMN IF NOT EXISTS suspicious_sender_signals JSONB"
                 )
+                cur.execute(
+                    "ALTER TABLE emails ADD COLUMN IF NOT EXISTS body_hydrated BOOLEAN DEFAULT TRUE"
+                )
+                cur.execute(
+                    "ALTER TABLE emails ADD COLUMN IF NOT EXISTS attachment_info JSONB"
+                )
+                cur.execute(
+                    "ALTER TABLE emails ADD COLUMN IF NOT EXISTS hydrate_attempts INTEGER DEFAULT 0"
+                )
+                # Stored so ranking reads the document instead of re-parsing
+                # subject and body for every match.
+                cur.execute(
+                    f"""
+                    ALTER TABLE emails ADD COLUMN IF NOT EXISTS search_vector tsvector
+                    GENERATED ALWAYS AS ({PG_SEARCH_VECTOR}) STORED
+                    """
+                )
                 cur.execute(
                     """
                     CREATE TABLE IF NOT EXISTS folder_state (
@@ -923,10 +2360,23 @@ class PostgresDatabase(DatabaseInterface):
                         uidvalidity INTEGER,
                         uidnext INTEGER,
                         highestmodseq BIGINT,
-                        last_sync TIMESTAMPTZ
+                        last_sync TIMESTAMPTZ,
+                        backfill_lo INTEGER,
+                        backfill_hi INTEGER,
+                        change_rate DOUBLE PRECISION
                     )
                     """
                 )
+                cur.execute(
+                    "ALTER TABLE folder_state ADD COLUMN IF NOT EXISTS backfill_lo INTEGER"
+                )
+                cur.execute(
+                    "ALTER TABLE folder_state ADD COLUMN IF NOT EXISTS backfill_hi INTEGER"
+                )
+                cur.execute(
+                    "ALTER TABLE folder_state "
+                    "ADD COLUMN IF NOT EXISTS change_rate DOUBLE PRECISION"
+                )
                 cur.execute(
                     """
                     CREATE TABLE IF NOT EXISTS mutation_journal (
@@ -940,10 +2390,26 @@ class PostgresDatabase(DatabaseInterface):
                         created_at TIMESTAMPTZ DEFAULT NOW(),
                         updated_at TIMESTAMPTZ DEFAULT NOW(),
                         error TEXT,
-                        FOREIGN KEY (email_uid, email_folder) REFERENCES emails(uid, folder) ON DELETE CASCADE
+                        attempts INTEGER DEFAULT 0
                     )
                     """
                 )
+                cur.execute(
+                    "ALTER TABLE mutation_journal "
+                    "ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0"
+                )
+                # Journal rows outlive their email: a move changes its key
+                # while the mutation is still pending.
+                cur.execute(
+                    "ALTER TABLE mutation_journal DROP CONSTRAINT IF EXISTS "
+                    "mutation_journal_email_uid_email_folder_fkey"
+                )
+                cur.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_mutation_journal_pending
+                    ON mutation_journal(id) WHERE status = 'PENDING'
+                    """
+                )
                 cur.execute(
                     """
                     CREATE TABLE IF NOT EXISTS system_health (
@@ -988,10 +2454,33 @@ class PostgresDatabase(DatabaseInterface):
                         content_hash TEXT,
                         created_at TIMESTAMPTZ DEFAULT NOW(),
                         PRIMARY KEY (email_uid, email_folder),
-                        FOREIGN KEY (email_uid, email_folder) REFERENCES emails(uid, folder) ON DELETE CASCADE
+                        FOREIGN KEY (email_uid, email_folder)
+                            REFERENCES emails(uid, folder)
+                            ON DELETE CASCADE ON UPDATE CASCADE
                     )
                     """
                 )
+                # Moved emails keep their embedding: relocate_emails() changes
+                # the key, which older tables' foreign key did not follow.
+                cur.execute(
+                    """
+                    SELECT confupdtype FROM pg_constraint
+                    WHERE conname = 'email_embeddings_email_uid_email_folder_fkey'
+                    """
+                )
+                row = cur.fetchone()
+                if row and row[0] != "c":
+                    cur.execute(
+                        """
+                        ALTER TABLE email_embeddings
+                        DROP CONSTRAINT email_embeddings_email_uid_email_folder_fkey,
+                        ADD CONSTRAINT email_embeddings_email_uid_email_folder_fkey
+                            FOREIGN KEY (email_uid, email_folder)
+                            REFERENCES emails(uid, folder)
+                            ON DELETE CASCADE ON UPDATE CASCADE
+                        """
+                    )
+                self._init_participants(cur)
                 cur.execute(
                     "CREATE INDEX IF NOT EXISTS idx_emails_folder ON emails(folder)"
                 )
@@ -1010,6 +2499,12 @@ class PostgresDatabase(DatabaseInterface):
                 cur.execute(
                     "CREATE INDEX IF NOT EXISTS idx_emails_gmail_thread_id ON emails(gmail_thread_id)"
                 )
+                cur.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_emails_gmail_msgid
+                    ON emails(gmail_msgid) WHERE gmail_msgid IS NOT NULL
+                    """
+                )
                 cur.execute(
                     "CREATE INDEX IF NOT EXISTS idx_emails_gmail_labels ON emails USING gin(gmail_labels)"
                 )
@@ -1022,20 +2517,101 @@ class PostgresDatabase(DatabaseInterface):
                 cur.execute(
                     "CREATE INDEX IF NOT EXISTS idx_emails_is_suspicious_sender ON emails(is_suspicious_sender)"
                 )
+                cur.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_emails_unhydrated
+                    ON emails(internal_date) WHERE NOT body_hydrated
+                    """
+                )
                 cur.execute(
                     f"""
                     CREATE INDEX IF NOT EXISTS idx_embeddings_vector
                     ON email_embeddings USING hnsw (embedding {self._vector_ops})
                     """
                 )
+                # Substring filters (ILIKE '%x%') cannot use a B-tree.
+                for column in ("from_addr", "to_addr", "subject"):
+                    cur.execute(
+                        f"""
+                        CREATE INDEX IF NOT EXISTS idx_emails_{column}_trgm
+                        ON emails USING gin({column} gin_trgm_ops)
+                        """
+                    )
+                cur.execute("DROP INDEX IF EXISTS idx_emails_fts")
                 cur.execute(
                     """
-                    CREATE INDEX IF NOT EXISTS idx_emails_fts
-                    ON emails USING gin(to_tsvector('english', COALESCE(subject, '') || ' ' || COALESCE(body_text, '')))
+                    CREATE INDEX IF NOT EXISTS idx_emails_search_vector
+                    ON emails USING gin(search_vector)
                     """
                 )
                 conn.commit()
 
+    @staticmethod
+    def _init_participants(cur: Any) -> None:
+        """Create the participants table, filling it from cached emails once."""
+        cur.execute("SELECT to_regclass('participants') IS NOT NULL")
+        exists = cur.fetchone()[0]
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS participants (
+                email_uid INTEGER NOT NULL,
+                email_folder TEXT NOT NULL,
+                role TEXT NOT NULL,
+                address TEXT NOT NULL,
+                display_name TEXT,
+                domain TEXT NOT NULL,
+                PRIMARY KEY (email_uid, email_folder, role, address),
+                FOREIGN KEY (email_uid, email_folder)
+                    REFERENCES emails(uid, folder)
+                    ON DELETE CASCADE ON UPDATE CASCADE
+            )
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_participants_address
+            ON participants(address, role)
+            """
+        )
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_participants_domain
+            ON participants(domain, role)
+            """
+        )
+        if exists:
+            return
+
+        key: tuple[int, str] = (-1, "")
+        backfilled = 0
+        while True:
+            cur.execute(
+                """
+                SELECT uid, folder, from_addr, to_addr, cc_addr FROM emails
+                WHERE (uid, folder) > (%s, %s)
+                ORDER BY uid, folder
+                LIMIT 5000
+                """,
+                key,
+            )
+            emails = cur.fetchall()
+            if not emails:
+                break
+            cur.executemany(
+                "INSERT INTO participants VALUES (%s, %s, %s, %s, %s, %s)",
+                [
+                    (uid, folder, *participant)
+                    for uid, folder, from_addr, to_addr, cc_addr in emails
+                    for participant in participant_rows(
+                        {"from_addr": from_addr, "to_addr": to_addr, "cc_addr": cc_addr}
+                    )
+                ],
+            )
+            key = emails[-1][:2]
+            backfilled += len(emails)
+        if backfilled:
+            logger.info(f"Indexed participants of {backfilled} cached emails")
+
     @contextmanager
     def connection(self) -> Iterator[Any]:
         if not self._pool:
@@ -1081,98 +2657,144 @@ class PostgresDatabase(DatabaseInterface):
         is_suspicious_sender: bool = False,
         suspicious_sender_signals: Optional[dict[str, Any]] = None,
     ) -> None:
-        import hashlib
-
-        content = f"{subject or ''}{body_text}"
-        content_hash = hashlib.sha256(content.encode()).hexdigest()[:32]
-
-        gmail_labels_json = json.dumps(gmail_labels) if gmail_labels else None
-        attachment_filenames_json = (
-            json.dumps(attachment_filenames) if attachment_filenames else None
+        self.upsert_emails_batch(
+            [
+                {
+                    "uid": uid,
+                    "folder": folder,
+                    "message_id": message_id,
+                    "subject": subject,
+                    "from_addr": from_addr,
+                    "to_addr": to_addr,
+                    "cc_addr": cc_addr,
+                    "bcc_addr": bcc_addr,
+                    "date": date,
+                    "internal_date": internal_date,
+                    "body_text": body_text,
+                    "body_html": body_html,
+                    "flags": flags,
+                    "is_unread": is_unread,
+                    "is_important": is_important,
+                    "size": size,
+                    "modseq": modseq,
+                    "in_reply_to": in_reply_to,
+                    "references_header": references_header,
+                    "gmail_thread_id": gmail_thread_id,
+                    "gmail_msgid": gmail_msgid,
+                    "gmail_labels": gmail_labels,
+                    "has_attachments": has_attachments,
+                    "attachment_filenames": attachment_filenames,
+                    "auth_results_raw": auth_results_raw,
+                    "spf": spf,
+                    "dkim": dkim,
+                    "dmarc": dmarc,
+                    "is_suspicious_sender": is_suspicious_sender,
+                    "suspicious_sender_signals": suspicious_sender_signals,
+                }
+            ]
         )
-        suspicious_sender_signals_json = (
-            json.dumps(suspicious_sender_signals) if suspicious_sender_signals else None
+
+    def _email_row(self, email: dict[str, Any], synced_at: datetime) -> tuple[Any, ...]:
+        gmail_labels = email.get("gmail_labels")
+        attachment_filenames = email.get("attachment_filenames")
+        attachment_info = email.get("attachment_info")
+        suspicious_sender_signals = email.get("suspicious_sender_signals")
+        return (
+            email["uid"],
+            email["folder"],
+            email.get("message_id"),
+            email.get("subject"),
+            email.get("from_addr"),
+            email.get("to_addr"),
+            email.get("cc_addr"),
+            email.get("bcc_addr"),
+            email.get("date"),
+            email.get("internal_date"),
+            email.get("body_text"),
+            email.get("body_html"),
+            email.get("flags"),
+            bool(email.get("is_unread")),
+            bool(email.get("is_important")),
+            email.get("size"),
+            email.get("modseq"),
+            synced_at,
+            email.get("in_reply_to"),
+            email.get("references_header"),
+            compute_content_hash(email.get("subject"), email.get("body_text")),
+            email.get("gmail_thread_id"),
+            email.get("gmail_msgid"),
+            json.dumps(gmail_labels) if gmail_labels else None,
+            bool(email.get("has_attachments")),
+            json.dumps(attachment_filenames) if attachment_filenames else None,
+            email.get("auth_results_raw"),
+            email.get("spf"),
+            email.get("dkim"),
+            email.get("dmarc"),
+            bool(email.get("is_suspicious_sender")),
+            json.dumps(suspicious_sender_signals) if suspicious_sender_signals else None,
+            bool(email.get("body_hydrated", True)),
+            json.dumps(attachment_info) if attachment_info else None,
         )
 
+    # Batches at or above this size are loaded with COPY into a staging table;
+    # smaller ones go through a pipelined executemany().
+    _COPY_BATCH_THRESHOLD = 20
+
+    _UPSERT_CONFLICT_CLAUSE = _email_upsert_clause("EXCLUDED", "IS DISTINCT FROM")
+    # Explicit, so reads leave out the search_vector column.
+    _EMAIL_SELECT = ", ".join(EMAIL_COLUMNS)
+
+    def upsert_emails_batch(self, emails: list[dict[str, Any]]) -> int:
+        if not emails:
+            return 0
+
+        synced_at = datetime.now(timezone.utc)
+        rows = [self._email_row(email, synced_at) for email in _dedupe_email_rows(emails)]
+        columns = ", ".join(EMAIL_COLUMNS)
+
         with self.connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
+                if len(rows) < self._COPY_BATCH_THRESHOLD:
+                    placeholders = ", ".join(["%s"] * len(EMAIL_COLUMNS))
+                    cur.executemany(
+                        f"""
+                        INSERT INTO emails ({columns}) VALUES ({placeholders})
+                        {self._UPSERT_CONFLICT_CLAUSE}
+                        """,
+                        rows,
+                    )
+                else:
+                    cur.execute(
+                        """
+                        CREATE TEMP TABLE IF NOT EXISTS emails_stage
+                        (LIKE emails INCLUDING DEFAULTS) ON COMMIT DROP
+                        """
+                    )
+                    with cur.copy(f"COPY emails_stage ({columns}) FROM STDIN") as copy:
+                        for row in rows:
+                            copy.write_row(row)
+                    cur.execute(
+                        f"""
+                        INSERT INTO emails ({columns})
+                        SELECT {columns} FROM emails_stage
+                        {self._UPSERT_CONFLICT_CLAUSE}
+                        """
+                    )
+                cur.executemany(
                     """
-                    INSERT INTO emails (
-                        uid, folder, message_id, subject, from_addr, to_addr, cc_addr,
-                        bcc_addr, date, internal_date, body_text, body_html, flags,
-                        is_unread, is_important, size, modseq, synced_at, in_reply_to,
-                        references_header, content_hash, gmail_thread_id, gmail_msgid,
-                        gmail_labels, has_attachments, attachment_filenames,
-                        auth_results_raw, spf, dkim, dmarc, is_suspicious_sender, suspicious_sender_signals
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(), %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (uid, folder) DO UPDATE SET
-                        message_id = EXCLUDED.message_id,
-                        subject = EXCLUDED.subject,
-                        from_addr = EXCLUDED.from_addr,
-                        to_addr = EXCLUDED.to_addr,
-                        cc_addr = EXCLUDED.cc_addr,
-                        bcc_addr = EXCLUDED.bcc_addr,
-                        date = EXCLUDED.date,
-                        internal_date = EXCLUDED.internal_date,
-                        body_text = EXCLUDED.body_text,
-                        body_html = EXCLUDED.body_html,
-                        flags = EXCLUDED.flags,
-                        is_unread = EXCLUDED.is_unread,
-                        is_important = EXCLUDED.is_important,
-                        size = EXCLUDED.size,
-                        modseq = EXCLUDED.modseq,
-                        synced_at = NOW(),
-                        in_reply_to = EXCLUDED.in_reply_to,
-                        references_header = EXCLUDED.references_header,
-                        content_hash = EXCLUDED.content_hash,
-                        gmail_thread_id = EXCLUDED.gmail_thread_id,
-                        gmail_msgid = EXCLUDED.gmail_msgid,
-                        gmail_labels = EXCLUDED.gmail_labels,
-                        has_attachments = EXCLUDED.has_attachments,
-                        attachment_filenames = EXCLUDED.attachment_filenames,
-                        auth_results_raw = EXCLUDED.auth_results_raw,
-                        spf = EXCLUDED.spf,
-                        dkim = EXCLUDED.dkim,
-                        dmarc = EXCLUDED.dmarc,
-                        is_suspicious_sender = EXCLUDED.is_suspicious_sender,
-                        suspicious_sender_signals = EXCLUDED.suspicious_sender_signals
+                    INSERT INTO participants
+                        (email_uid, email_folder, role, address, display_name, domain)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT DO NOTHING
                     """,
-                    (
-                        uid,
-                        folder,
-                        message_id,
-                        subject,
-                        from_addr,
-                        to_addr,
-                        cc_addr,
-                        bcc_addr,
-                        date,
-                        internal_date,
-                        body_text,
-                        body_html,
-                        flags,
-                        is_unread,
-                        is_important,
-                        size,
-                        modseq,
-                        in_reply_to,
-                        references_header,
-                        content_hash,
-                        gmail_thread_id,
-                        gmail_msgid,
-                        gmail_labels_json,
-                        has_attachments,
-                        attachment_filenames_json,
-                        auth_results_raw,
-                        spf,
-                        dkim,
-                        dmarc,
-                        is_suspicious_sender,
-                        suspicious_sender_signals_json,
-                    ),
+                    [
+                        (email["uid"], email["folder"], *participant)
+                        for email in _dedupe_email_rows(emails)
+                        for participant in participant_rows(email)
+                    ],
                 )
                 conn.commit()
+        return len(rows)
 
     def update_email_flags(
         self,
@@ -1183,25 +2805,236 @@ class PostgresDatabase(DatabaseInterface):
         modseq: int,
         gmail_labels: Optional[list[str]] = None,
     ) -> None:
-        gmail_labels_json = json.dumps(gmail_labels) if gmail_labels else None
+        self.update_flags_batch(
+            [
+                {
+                    "uid": uid,
+                    "folder": folder,
+                    "flags": flags,
+                    "is_unread": is_unread,
+                    "modseq": modseq,
+                    "gmail_labels": gmail_labels,
+                }
+            ]
+        )
+
+    def update_flags_batch(self, updates: list[dict[str, Any]]) -> int:
+        if not updates:
+            return 0
+
+        rows = []
+        for update in updates:
+            gmail_labels = update.get("gmail_labels")
+            rows.append(
+                (
+                    update["flags"],
+                    update["is_unread"],
+                    update["modseq"],
+                    json.dumps(gmail_labels) if gmail_labels else None,
+                    update["uid"],
+                    update["folder"],
+                )
+            )
 
         with self.connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(
+                cur.executemany(
                     """
-                    UPDATE emails SET flags = %s, is_unread = %s, modseq = %s,
+                    UPDATE emails SET flags = %s, is_unread = %s,
+                        modseq = COALESCE(%s, modseq),
                         gmail_labels = COALESCE(%s, gmail_labels), synced_at = NOW()
                     WHERE uid = %s AND folder = %s
                     """,
-                    (flags, is_unread, modseq, gmail_labels_json, uid, folder),
+                    rows,
                 )
                 conn.commit()
+        return len(rows)
+
+    def find_gmail_msgid_sources(
+        self, msgids: list[int]
+    ) -> dict[int, tuple[int, str]]:
+        if not msgids:
+            return {}
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT DISTINCT ON (gmail_msgid) gmail_msgid, uid, folder
+                    FROM emails
+                    WHERE gmail_msgid = ANY(%s)
+                    ORDER BY gmail_msgid, body_hydrated DESC
+                    """,
+                    (list(msgids),),
+                )
+                return {int(row[0]): (int(row[1]), row[2]) for row in cur.fetchall()}
+
+    def copy_emails_batch(self, copies: list[dict[str, Any]]) -> int:
+        if not copies:
+            return 0
+
+        synced_at = datetime.now(timezone.utc)
+        rows = []
+        embedding_rows = []
+        for copy in copies:
+            gmail_labels = copy.get("gmail_labels")
+            values = {
+                "uid": copy["uid"],
+                "folder": copy["folder"],
+                "flags": copy["flags"],
+                "is_unread": bool(copy["is_unread"]),
+                "is_important": bool(copy["is_important"]),
+                "modseq": copy["modseq"],
+                "synced_at": synced_at,
+                "gmail_labels": json.dumps(gmail_labels) if gmail_labels else None,
+            }
+            source = (copy["source_uid"], copy["source_folder"])
+            rows.append(
+                tuple(values[column] for column in EMAIL_COLUMNS if column in values)
+                + source
+            )
+            embedding_rows.append((copy["uid"], copy["folder"]) + source)
+        select = ", ".join(
+            "%s" if column in _COPY_COLUMNS else column for column in EMAIL_COLUMNS
+        )
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    f"""
+                    INSERT INTO emails ({", ".join(EMAIL_COLUMNS)})
+                    SELECT {select} FROM emails WHERE uid = %s AND folder = %s
+                    {self._UPSERT_CONFLICT_CLAUSE}
+                    """,
+                    rows,
+                )
+                cur.executemany(
+                    """
+                    INSERT INTO email_embeddings
+                        (email_uid, email_folder, embedding, model, content_hash)
+                    SELECT %s, %s, embedding, model, content_hash
+                    FROM email_embeddings
+                    WHERE email_uid = %s AND email_folder = %s
+                    ON CONFLICT (email_uid, email_folder) DO NOTHING
+                    """,
+                    embedding_rows,
+                )
+                cur.executemany(
+                    """
+                    INSERT INTO participants
+                    SELECT %s, %s, role, address, display_name, domain
+                    FROM participants
+                    WHERE email_uid = %s AND email_folder = %s
+                    ON CONFLICT DO NOTHING
+                    """,
+                    embedding_rows,
+                )
+                conn.commit()
+        return len(rows)
+
+    def get_unhydrated_emails(
+        self,
+        limit: int = 50,
+        folders: Optional[list[str]] = None,
+        max_attempts: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        conditions = ["NOT body_hydrated", "folder NOT LIKE %s"]
+        params: list[Any] = [f"{PENDING_MOVE_PREFIX}%"]
+        if folders is not None:
+            conditions.append("folder = ANY(%s)")
+            params.append(list(folders))
+        if max_attempts is not None:
+            conditions.append("hydrate_attempts < %s")
+            params.append(max_attempts)
+        params.append(limit)
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT uid, folder, subject FROM emails
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY internal_date DESC
+                    LIMIT %s
+                    """,
+                    params,
+                )
+                columns = [desc[0] for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def record_hydration_failures(self, folder: str, uids: list[int]) -> int:
+        if not uids:
+            return 0
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE emails SET hydrate_attempts = hydrate_attempts + 1
+                    WHERE folder = %s AND NOT body_hydrated AND uid = ANY(%s)
+                    """,
+                    (folder, uids),
+                )
+                conn.commit()
+                return cur.rowcount
+
+    def update_email_bodies_batch(self, bodies: list[dict[str, Any]]) -> int:
+        if not bodies:
+            return 0
+
+        rows = [
+            (
+                body["body_text"],
+                body["body_html"],
+                bool(body.get("has_attachments")),
+                json.dumps(body["attachment_filenames"])
+                if body.get("attachment_filenames")
+                else None,
+                json.dumps(body["attachment_info"])
+                if body.get("attachment_info")
+                else None,
+                compute_content_hash(body.get("subject"), body["body_text"]),
+                body["uid"],
+                body["folder"],
+            )
+            for body in bodies
+        ]
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    UPDATE emails SET body_text = %s, body_html = %s,
+                        has_attachments = %s, attachment_filenames = %s,
+                        attachment_info = %s, content_hash = %s,
+                        body_hydrated = TRUE
+                    WHERE uid = %s AND folder = %s
+                    """,
+                    rows,
+                )
+                # Gmail shows one message in several folders; fill the other
+                # header-only copies too so each body is downloaded once.
+                cur.executemany(
+                    """
+                    UPDATE emails SET body_text = %s, body_html = %s,
+                        has_attachments = %s, attachment_filenames = %s,
+                        attachment_info = %s, content_hash = %s,
+                        body_hydrated = TRUE
+                    WHERE NOT body_hydrated AND gmail_msgid = (
+                        SELECT gmail_msgid FROM emails WHERE uid = %s AND folder = %s
+                    )
+                    """,
+                    rows,
+                )
+                conn.commit()
+        return len(rows)
 
     def get_email_by_uid(self, uid: int, folder: str) -> Optional[dict[str, Any]]:
         with self.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    "SELECT * FROM emails WHERE uid = %s AND folder = %s", (uid, folder)
+                    f"SELECT {self._EMAIL_SELECT} FROM emails"
+                    " WHERE uid = %s AND folder = %s",
+                    (uid, folder),
                 )
                 row = cur.fetchone()
                 if row:
@@ -1215,7 +3048,8 @@ class PostgresDatabase(DatabaseInterface):
         with self.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    "SELECT * FROM emails WHERE folder = %s AND uid = ANY(%s) ORDER BY date DESC",
+                    f"SELECT {self._EMAIL_SELECT} FROM emails"
+                    " WHERE folder = %s AND uid = ANY(%s) ORDER BY date DESC",
                     (folder, uids),
                 )
                 columns = [desc[0] for desc in cur.description]
@@ -1231,6 +3065,11 @@ class PostgresDatabase(DatabaseInterface):
         body_contains: Optional[str] = None,
         limit: int = 100,
     ) -> list[dict[str, Any]]:
+        if body_contains:
+            return self.full_text_search(
+                body_contains, folder, is_unread, from_addr, to_addr, limit
+            )
+
         conditions = ["folder = %s"]
         params: list[Any] = [folder]
 
@@ -1239,18 +3078,23 @@ class PostgresDatabase(DatabaseInterface):
             params.append(is_unread)
 
         if from_addr:
-            conditions.append("from_addr ILIKE %s")
-            params.append(f"%{from_addr}%")
+            condition, param = pg_address_filter("from_addr", from_addr, "")
+            conditions.append(condition)
+            params.append(param)
 
         if to_addr:
-            conditions.append("to_addr ILIKE %s")
-            params.append(f"%{to_addr}%")
+            condition, param = pg_address_filter("to_addr", to_addr, "")
+            conditions.append(condition)
+            params.append(param)
 
         if subject_contains:
             conditions.append("subject ILIKE %s")
-            params.append(f"%{subject_contains}%")
+            params.append(like_pattern(subject_contains))
 
-        query = f"SELECT * FROM emails WHERE {' AND '.join(conditions)} ORDER BY date DESC LIMIT %s"
+        query = (
+            f"SELECT {self._EMAIL_SELECT} FROM emails"
+            f" WHERE {' AND '.join(conditions)} ORDER BY date DESC LIMIT %s"
+        )
         params.append(limit)
 
         with self.connection() as conn:
@@ -1259,6 +3103,91 @@ class PostgresDatabase(DatabaseInterface):
                 columns = [desc[0] for desc in cur.description]
                 return [dict(zip(columns, row)) for row in cur.fetchall()]
 
+    def get_recipient_stats(
+        self, folder: str, uids: list[int], addresses: list[str]
+    ) -> dict[int, dict[str, Any]]:
+        if not uids:
+            return {}
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT email_uid,
+                        COUNT(*) FILTER (WHERE role IN ('to', 'cc')),
+                        BOOL_OR(role = 'to' AND address = ANY(%s)),
+                        BOOL_OR(role = 'cc' AND address = ANY(%s))
+                    FROM participants
+                    WHERE email_folder = %s AND email_uid = ANY(%s)
+                    GROUP BY email_uid
+                    """,
+                    (addresses, addresses, folder, uids),
+                )
+                return {
+                    row[0]: {"recipients": row[1], "to_me": row[2], "cc_me": row[3]}
+                    for row in cur.fetchall()
+                }
+
+    def full_text_search(
+        self,
+        query: str,
+        folder: Optional[str] = None,
+        is_unread: Optional[bool] = None,
+        from_addr: Optional[str] = None,
+        to_addr: Optional[str] = None,
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        if not query.strip():
+            return []
+
+        conditions = ["e.search_vector @@ q"]
+        params: list[Any] = [query]
+
+        if folder:
+            conditions.append("e.folder = %s")
+            params.append(folder)
+
+        if is_unread is not None:
+            conditions.append("e.is_unread = %s")
+            params.append(is_unread)
+
+        if from_addr:
+            condition, param = pg_address_filter("from_addr", from_addr, "e.")
+            conditions.append(condition)
+            params.append(param)
+
+        if to_addr:
+            condition, param = pg_address_filter("to_addr", to_addr, "e.")
+            conditions.append(condition)
+            params.append(param)
+
+        params.extend([limit, query])
+        select_columns = ", ".join(f"e.{column}" for column in EMAIL_COLUMNS)
+        # ts_headline() re-parses the body, so it runs on the returned rows only.
+        sql = f"""
+            WITH ranked AS (
+                SELECT e.uid, e.folder, {pg_search_rank("e", "q")} AS rank
+                FROM emails e, websearch_to_tsquery('english', %s) q
+                WHERE {" AND ".join(conditions)}
+                ORDER BY rank DESC
+                LIMIT %s
+            )
+            SELECT {select_columns}, r.rank, ts_headline(
+                'english', COALESCE(e.body_text, ''), q,
+                'StartSel=**, StopSel=**, {PG_HEADLINE_OPTIONS}'
+            ) AS snippet
+            FROM ranked r
+            JOIN emails e ON e.uid = r.uid AND e.folder = r.folder,
+                websearch_to_tsquery('english', %s) q
+            ORDER BY r.rank DESC
+        """
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                columns = [desc[0] for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+
     def delete_email(self, uid: int, folder: str) -> None:
         with self.connection() as conn:
             with conn.cursor() as cur:
@@ -1267,6 +3196,115 @@ class PostgresDatabase(DatabaseInterface):
                 )
                 conn.commit()
 
+    def delete_emails_batch(self, folder: str, uids: list[int]) -> int:
+        if not uids:
+            return 0
+
+        # email_embeddings rows go with them (ON DELETE CASCADE).
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM emails WHERE folder = %s AND uid = ANY(%s)",
+                    (folder, list(uids)),
+                )
+                deleted = cur.rowcount
+                conn.commit()
+                return deleted
+
+    def apply_email_changes(self, changes: list[dict[str, Any]]) -> int:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                changed = self._apply_changes(cur, changes)
+                conn.commit()
+        return changed
+
+    @staticmethod
+    def _apply_changes(cur: Any, changes: list[dict[str, Any]]) -> int:
+        """Apply apply_email_changes() changes on ``cur`` without committing."""
+        changed = 0
+        for change in changes:
+            folder, uids = change["folder"], list(change["uids"])
+            if not uids:
+                continue
+            if change.get("is_read") is not None:
+                cur.execute(
+                    """
+                    UPDATE emails SET is_unread = %s
+                    WHERE folder = %s AND uid = ANY(%s)
+                    """,
+                    (not change["is_read"], folder, uids),
+                )
+            if change.get("label_action"):
+                cur.execute(
+                    """
+                    SELECT uid, gmail_labels FROM emails
+                    WHERE folder = %s AND uid = ANY(%s)
+                    FOR UPDATE
+                    """,
+                    (folder, uids),
+                )
+                rows = []
+                for uid, stored in cur.fetchall():
+                    labels = _apply_label_action(
+                        stored or [], change["labels"], change["label_action"]
+                    )
+                    rows.append((json.dumps(labels) if labels else None, uid, folder))
+                cur.executemany(
+                    """
+                    UPDATE emails SET gmail_labels = %s
+                    WHERE uid = %s AND folder = %s
+                    """,
+                    rows,
+                )
+            if change.get("move_to"):
+                PostgresDatabase._relocate(
+                    cur, [(uid, folder, uid, change["move_to"]) for uid in uids]
+                )
+            if change.get("delete"):
+                cur.execute(
+                    "DELETE FROM emails WHERE folder = %s AND uid = ANY(%s)",
+                    (folder, uids),
+                )
+            changed += len(uids)
+        return changed
+
+    def relocate_emails(self, moves: list[tuple[int, str, int, str]]) -> int:
+        if not moves:
+            return 0
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                relocated = self._relocate(cur, moves)
+                conn.commit()
+        return relocated
+
+    @staticmethod
+    def _relocate(cur: Any, moves: list[tuple[int, str, int, str]]) -> int:
+        """Apply relocate_emails() moves on ``cur`` without committing.
+
+        Embeddings follow their email through ON UPDATE CASCADE.
+        """
+        relocated = 0
+        for uid, folder, new_uid, new_folder in moves:
+            cur.execute(
+                "SELECT 1 FROM emails WHERE uid = %s AND folder = %s",
+                (new_uid, new_folder),
+            )
+            if cur.fetchone():
+                cur.execute(
+                    "DELETE FROM emails WHERE uid = %s AND folder = %s", (uid, folder)
+                )
+                continue
+            cur.execute(
+                """
+                UPDATE emails SET uid = %s, folder = %s
+                WHERE uid = %s AND folder = %s
+                """,
+                (new_uid, new_folder, uid, folder),
+            )
+            relocated += cur.rowcount
+        return relocated
+
     def mark_email_read(self, uid: int, folder: str, is_read: bool) -> None:
         with self.connection() as conn:
             with conn.cursor() as cur:
@@ -1292,7 +3330,11 @@ class PostgresDatabase(DatabaseInterface):
         with self.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    "SELECT uidvalidity, uidnext, highestmodseq, last_sync FROM folder_state WHERE folder = %s",
+                    """
+                    SELECT uidvalidity, uidnext, highestmodseq, last_sync,
+                        backfill_lo, backfill_hi, change_rate
+                    FROM folder_state WHERE folder = %s
+                    """,
                     (folder,),
                 )
                 row = cur.fetchone()
@@ -1328,6 +3370,54 @@ class PostgresDatabase(DatabaseInterface):
                 conn.commit()
                 return deleted
 
+    def get_message_ids(self, folder: str) -> list[dict[str, Any]]:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT uid, message_id, gmail_msgid FROM emails
+                    WHERE folder = %s
+                    """,
+                    (folder,),
+                )
+                columns = [desc[0] for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def remap_folder_uids(self, folder: str, uid_map: dict[int, int]) -> int:
+        old_uids, new_uids = list(uid_map), list(uid_map.values())
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    DELETE FROM emails
+                    WHERE folder = %s AND NOT (uid = ANY(%s))
+                    """,
+                    (folder, old_uids),
+                )
+                # Negate first so no new UID collides with an old one still in
+                # place; embeddings follow through ON UPDATE CASCADE.
+                cur.execute("UPDATE emails SET uid = -uid WHERE folder = %s", (folder,))
+                cur.execute(
+                    """
+                    UPDATE emails SET uid = m.new_uid
+                    FROM unnest(%s::int[], %s::int[]) AS m(old_uid, new_uid)
+                    WHERE emails.folder = %s AND emails.uid = -m.old_uid
+                    """,
+                    (old_uids, new_uids, folder),
+                )
+                remapped = cur.rowcount
+                cur.execute(
+                    """
+                    UPDATE mutation_journal SET email_uid = m.new_uid
+                    FROM unnest(%s::int[], %s::int[]) AS m(old_uid, new_uid)
+                    WHERE email_folder = %s AND status = 'PENDING'
+                    AND email_uid = m.old_uid
+                    """,
+                    (old_uids, new_uids, folder),
+                )
+                conn.commit()
+        return remapped
+
     def create_mutation(
         self,
         email_uid: int,
@@ -1397,6 +3487,90 @@ class PostgresDatabase(DatabaseInterface):
                     return dict(zip(columns, row))
                 return None
 
+    def enqueue_mutations(self, mutations: list[dict[str, Any]]) -> int:
+        if not mutations:
+            return 0
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                pre_states = {}
+                for folder, uids in _uids_by_folder(mutations).items():
+                    cur.execute(
+                        """
+                        SELECT uid, is_unread, gmail_labels FROM emails
+                        WHERE folder = %s AND uid = ANY(%s)
+                        """,
+                        (folder, uids),
+                    )
+                    for uid, is_unread, labels in cur.fetchall():
+                        pre_states[(uid, folder)] = {
+                            "is_unread": bool(is_unread),
+                            "gmail_labels": labels or [],
+                        }
+
+                rows = []
+                for mutation in mutations:
+                    pre_state = pre_states.get((mutation["uid"], mutation["folder"]))
+                    rows.append(
+                        (
+                            mutation["uid"],
+                            mutation["folder"],
+                            mutation["action"],
+                            json.dumps(mutation.get("params") or {}),
+                            json.dumps(pre_state) if pre_state else None,
+                        )
+                    )
+                cur.executemany(
+                    """
+                    INSERT INTO mutation_journal
+                        (email_uid, email_folder, action, params, pre_state)
+                    VALUES (%s, %s, %s, %s, %s)
+                    """,
+                    rows,
+                )
+                self._apply_changes(cur, _mutation_changes(mutations))
+                conn.commit()
+        return len(rows)
+
+    def list_pending_mutations(self, limit: int = 1000) -> list[dict[str, Any]]:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT * FROM mutation_journal WHERE status = 'PENDING'
+                    ORDER BY id LIMIT %s
+                    """,
+                    (limit,),
+                )
+                columns = [desc[0] for desc in cur.description]
+                rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+        for row in rows:
+            row["params"] = row["params"] or {}
+        return rows
+
+    def update_mutations_status(
+        self,
+        mutation_ids: list[int],
+        status: str,
+        error: Optional[str] = None,
+        attempted: bool = False,
+    ) -> None:
+        if not mutation_ids:
+            return
+
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE mutation_journal
+                    SET status = %s, error = %s,
+                        attempts = COALESCE(attempts, 0) + %s, updated_at = NOW()
+                    WHERE id = ANY(%s)
+                    """,
+                    (status, error, 1 if attempted else 0, list(mutation_ids)),
+                )
+                conn.commit()
+
     def log_sync_error(
         self,
         error_type: str,
@@ -1415,13 +3589,48 @@ class PostgresDatabase(DatabaseInterface):
                 )
                 conn.commit()
 
-    def get_synced_uids(self, folder: str) -> list[int]:
+    def get_synced_uids(
+        self,
+        folder: str,
+        uid_min: Optional[int] = None,
+        uid_max: Optional[int] = None,
+    ) -> list[int]:
+        query = "SELECT uid FROM emails WHERE folder = %s"
+        params: list[Any] = [folder]
+        if uid_min is not None:
+            query += " AND uid >= %s"
+            params.append(uid_min)
+        if uid_max is not None:
+            query += " AND uid <= %s"
+            params.append(uid_max)
+
         with self.connection() as conn:
             with conn.cursor() as cur:
-                cur.execute("SELECT uid FROM emails WHERE folder = %s", (folder,))
+                cur.execute(query, params)
                 rows = cur.fetchall()
                 return [int(row[0]) for row in rows]
 
+    def save_sync_cursor(self, folder: str, backfill_lo: int, backfill_hi: int) -> None:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE folder_state SET backfill_lo = %s, backfill_hi = %s
+                    WHERE folder = %s
+                    """,
+                    (backfill_lo, backfill_hi, folder),
+                )
+                conn.commit()
+
+    def save_change_rate(self, folder: str, change_rate: float) -> None:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE folder_state SET change_rate = %s WHERE folder = %s",
+                    (change_rate, folder),
+                )
+                conn.commit()
+
     def count_emails(self, folder: str) -> int:
         with self.connection() as conn:
             with conn.cursor() as cur:
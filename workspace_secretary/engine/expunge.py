@@ -0,0 +1,127 @@
+"""Detecting messages expunged on the server since they were cached.
+
+With QRESYNC (RFC 7162) the server lists expunged UIDs itself in a
+``VANISHED (EARLIER)`` response; ``parse_uid_set`` turns that list into UIDs
+(``compact_uid_set`` does the reverse, for commands that take a UID set).
+
+Without QRESYNC (Gmail among others), ``find_expunged_uids`` compares the cache
+with the folder in UID-range chunks. Message sequence numbers are dense, so if
+nothing was expunged the N-th cached UID is the UID at sequence N. One FETCH of
+the UIDs at every chunk boundary shows which chunks still line up; only the
+ones that do not are searched and diffed.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:
+    from workspace_secretary.engine.imap_sync import ImapClient
+
+EXPUNGE_CHUNK_SIZE = 1000
+
+
+def parse_uid_set(text: str) -> list[int]:
+    """Expand an IMAP UID set such as ``41,43:116`` into a list of UIDs."""
+    uids: list[int] = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if ":" in item:
+            start, end = (int(value) for value in item.split(":", 1))
+            lo, hi = min(start, end), max(start, end)
+            uids.extend(range(lo, hi + 1))
+        else:
+            uids.append(int(item))
+    return uids
+
+
+def compact_uid_set(uids: Iterable[int]) -> str:
+    """Collapse UIDs into an IMAP UID set such as ``41,43:116``."""
+    ranges: list[list[int]] = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ",".join(str(lo) if lo == hi else f"{lo}:{hi}" for lo, hi in ranges)
+
+
+def find_expunged_uids(
+    client: "ImapClient",
+    folder: str,
+    local_uids: list[int],
+    exists: int,
+    limit: Optional[int] = None,
+    chunk_size: int = EXPUNGE_CHUNK_SIZE,
+) -> list[int]:
+    """Find cached UIDs that are no longer in the folder on the server.
+
+    Only UIDs the server confirmed missing are returned, so mail the cache has
+    not caught up with yet never causes a cached message to be reported. Such
+    mail can, however, hide an expunge in the same chunk; pass ``limit`` (the
+    expected number of expunged UIDs) to have those chunks diffed as well.
+
+    Args:
+        client: Connected IMAP client.
+        folder: Folder to compare.
+        local_uids: UIDs cached for the folder, sorted ascending.
+        exists: Message count reported by SELECT.
+        limit: Number of expunged UIDs expected; the scan stops once this many
+            were found.
+        chunk_size: Cached UIDs compared per chunk.
+
+    Returns:
+        Expunged UIDs in ascending order.
+    """
+    if not local_uids:
+        return []
+    if exists == 0:
+        return list(local_uids)
+
+    ends = list(range(chunk_size - 1, len(local_uids), chunk_size))
+    if not ends or ends[-1] != len(local_uids) - 1:
+        ends.append(len(local_uids) - 1)
+    probes = client.uids_at_sequence(
+        folder, [end + 1 for end in ends if end + 1 <= exists]
+    )
+
+    def diff(start: int, end: int) -> int:
+        lo = local_uids[start - 1] + 1 if start else 1
+        on_server = set(client.search(f"UID {lo}:{local_uids[end]}", folder=folder))
+        expunged.extend(
+            uid for uid in local_uids[start : end + 1] if uid not in on_server
+        )
+        return len(on_server)
+
+    expunged: list[int] = []
+    skipped: list[tuple[int, int]] = []
+    # Server sequence number of local_uids[i] is i + 1 + shift while the chunks
+    # before it line up.
+    shift = 0
+    start = 0
+    for end in ends:
+        seq = end + 1 + shift
+        if 1 <= seq <= exists:
+            if seq not in probes:
+                probes.update(client.uids_at_sequence(folder, [seq]))
+            if probes.get(seq) == local_uids[end]:
+                skipped.append((start, end))
+                start = end + 1
+                continue
+
+        shift = start + shift + diff(start, end) - (end + 1)
+        start = end + 1
+        if limit is not None and len(expunged) >= limit:
+            return sorted(expunged)
+
+    # A chunk whose expunges are offset by server mail the cache has not
+    # fetched yet still lines up; when the count says something is missing,
+    # diff the skipped chunks too.
+    for start, end in skipped:
+        if limit is None or len(expunged) >= limit:
+            break
+        diff(start, end)
+
+    return sorted(expunged)
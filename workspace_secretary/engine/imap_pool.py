@@ -0,0 +1,352 @@
+"""Pool of IMAP connections shared by the sync workers.
+
+Connections are opened on demand up to ``max_size`` and closed again after
+sitting idle, down to ``min_size``. A connection that has been idle for a while,
+or whose last use raised, gets a NOOP before it is handed out; one that fails
+is reconnected, or replaced if the server is unreachable, so dead connections
+never circulate. A maintenance thread keeps idle connections alive with NOOPs
+and reconnects them before their OAuth2 access token expires, since an IMAP
+session cannot re-authenticate in place.
+
+``get()`` raises ``queue.Empty`` on timeout like ``Queue.get()``; prefer the
+``connection()`` context manager, which returns the connection and marks it
+for a health check if the block raised.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from queue import Empty
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+
+if TYPE_CHECKING:
+    from workspace_secretary.engine.imap_sync import ImapClient
+
+logger = logging.getLogger(__name__)
+
+# Connections idle longer than this get a NOOP before being handed out.
+HEALTH_CHECK_AFTER_SECONDS = 30.0
+HEALTH_CHECK_TIMEOUT = 10.0
+# Reconnect this long before the access token a connection logged in with
+# expires.
+REAUTH_MARGIN_SECONDS = 300
+MAINTENANCE_INTERVAL = 30.0
+
+
+@dataclass(eq=False)
+class _Idle:
+    client: "ImapClient"
+    since: float
+    suspect: bool = False
+
+
+class ImapConnectionPool:
+    """Self-healing pool of connected IMAP clients.
+
+    Args:
+        connect: Opens and returns a new connected client.
+        min_size: Connections kept open even when idle.
+        max_size: Most connections open at once.
+        keepalive_interval: Seconds of idleness after which the maintenance
+            thread sends a NOOP.
+        idle_timeout: Seconds of idleness after which connections above
+            ``min_size`` are closed.
+        clock: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], "ImapClient"],
+        min_size: int,
+        max_size: int,
+        keepalive_interval: float = 300,
+        idle_timeout: float = 600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.connect = connect
+        self.max_size = max(1, max_size)
+        self.min_size = max(0, min(min_size, self.max_size))
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._idle: list[_Idle] = []
+        self._size = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stopping = threading.Event()
+        self._maintainer: Optional[threading.Thread] = None
+        self._metrics = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "opened": 0,
+            "closed": 0,
+            "reconnects": 0,
+            "health_check_failures": 0,
+        }
+
+    @property
+    def size(self) -> int:
+        """Connections open or being opened."""
+        return self._size
+
+    def start(self) -> int:
+        """Open ``min_size`` connections and start maintenance.
+
+        Returns:
+            The number of connections opened.
+        """
+        self._fill()
+        self._maintainer = threading.Thread(
+            target=self._maintain, name="imap-pool", daemon=True
+        )
+        self._maintainer.start()
+        return self._size
+
+    def close(self) -> None:
+        """Stop maintenance and disconnect idle connections.
+
+        Connections checked out at the time are disconnected when returned.
+        """
+        self._stopping.set()
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._disconnect(entry.client)
+        if self._maintainer:
+            self._maintainer.join(timeout=5)
+            self._maintainer = None
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator["ImapClient"]:
+        """Check a connection out for the duration of a ``with`` block.
+
+        Raises:
+            queue.Empty: If no connection could be had within ``timeout``.
+        """
+        client = self.get(timeout=timeout)
+        try:
+            yield client
+        except BaseException:
+            self.put(client, suspect=True)
+            raise
+        self.put(client)
+
+    def get(self, timeout: Optional[float] = None) -> "ImapClient":
+        """Check out a healthy connection, opening one if the pool may grow.
+
+        Raises:
+            queue.Empty: If no connection could be had within ``timeout``.
+        """
+        started = self.clock()
+        deadline = None if timeout is None else started + timeout
+        while True:
+            entry = self._take(deadline)
+            try:
+                if entry is None:
+                    client = self._open()
+                else:
+                    client = self._check(entry)
+            except Exception as e:
+                logger.warning(f"Pooled IMAP connection unavailable: {e}")
+                self._release_slot()
+                if deadline is not None and self.clock() >= deadline:
+                    with self._cond:
+                        self._metrics["timeouts"] += 1
+                    raise Empty
+                # The slot is free again; retry (opening a fresh connection)
+                # unless the server is down, in which case don't spin.
+                if entry is None:
+                    self._stopping.wait(1.0)
+                continue
+
+            waited = self.clock() - started
+            with self._cond:
+                self._metrics["checkouts"] += 1
+                self._metrics["wait_seconds_total"] += waited
+                self._metrics["wait_seconds_max"] = max(
+                    self._metrics["wait_seconds_max"], waited
+                )
+            return client
+
+    def put(self, client: "ImapClient", suspect: bool = False) -> None:
+        """Return a checked-out connection.
+
+        Args:
+            client: The connection.
+            suspect: The connection may be broken; check it before reuse.
+        """
+        with self._cond:
+            if not self._closed:
+                self._idle.append(_Idle(client, self.clock(), suspect))
+                self._cond.notify()
+                return
+            self._size -= 1
+        self._disconnect(client)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            checkouts = self._metrics["checkouts"]
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._metrics,
+                "wait_seconds_total": round(self._metrics["wait_seconds_total"], 3),
+                "wait_seconds_max": round(self._metrics["wait_seconds_max"], 3),
+                "wait_seconds_avg": round(
+                    self._metrics["wait_seconds_total"] / checkouts, 3
+                )
+                if checkouts
+                else 0.0,
+            }
+
+    def _take(self, deadline: Optional[float]) -> Optional[_Idle]:
+        """Reserve an idle connection, or a slot to open one (None)."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise Empty
+                if self._idle:
+                    # Most recently used first: it is the least likely to need
+                    # a health check, and the rest can age out.
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    raise Empty
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _open(self) -> "ImapClient":
+        client = self.connect()
+        with self._cond:
+            self._metrics["opened"] += 1
+        return client
+
+    def _check(self, entry: _Idle) -> "ImapClient":
+        """Make sure an idle connection works, reconnecting it if not."""
+        client = entry.client
+        if self._auth_expiring(client):
+            self._reconnect(client, "access token about to expire")
+        elif entry.suspect or self.clock() - entry.since >= HEALTH_CHECK_AFTER_SECONDS:
+            try:
+                client.noop(timeout=HEALTH_CHECK_TIMEOUT)
+            except Exception as e:
+                with self._cond:
+                    self._metrics["health_check_failures"] += 1
+                self._reconnect(client, f"health check failed: {e}")
+        return client
+
+    def _reconnect(self, client: "ImapClient", reason: str) -> None:
+        logger.info(f"Reconnecting pooled IMAP connection: {reason}")
+        try:
+            client.disconnect()
+        except Exception:
+            pass
+        try:
+            client.connect()
+        except Exception:
+            with self._cond:
+                self._metrics["closed"] += 1
+            raise
+        with self._cond:
+            self._metrics["reconnects"] += 1
+
+    @staticmethod
+    def _auth_expiring(client: "ImapClient") -> bool:
+        expiry = client.auth_expiry
+        return expiry is not None and expiry - time.time() < REAUTH_MARGIN_SECONDS
+
+    def _disconnect(self, client: "ImapClient") -> None:
+        try:
+            client.disconnect()
+        except Exception:
+            pass
+        with self._cond:
+            self._metrics["closed"] += 1
+
+    def _fill(self) -> None:
+        """Open connections until the pool holds ``min_size``."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                client = self._open()
+            except Exception as e:
+                logger.error(f"Failed to open pooled IMAP connection: {e}")
+                self._release_slot()
+                return
+            self.put(client)
+
+    def maintain(self) -> None:
+        """Close surplus idle connections, keep the rest alive and refilled.
+
+        Runs every ``MAINTENANCE_INTERVAL`` seconds on the pool's thread.
+        """
+        now = self.clock()
+        with self._cond:
+            surplus = max(0, self._size - self.min_size)
+            expired = [
+                entry for entry in self._idle if now - entry.since >= self.idle_timeout
+            ][:surplus]
+            stale = [
+                entry
+                for entry in self._idle
+                if entry not in expired
+                and (
+                    entry.suspect
+                    or now - entry.since >= self.keepalive_interval
+                    or self._auth_expiring(entry.client)
+                )
+            ]
+            self._idle = [
+                entry
+                for entry in self._idle
+                if entry not in expired and entry not in stale
+            ]
+            self._size -= len(expired)
+
+        for entry in expired:
+            self._disconnect(entry.client)
+        for entry in stale:
+            try:
+                self.put(self._check(entry))
+            except Exception as e:
+                logger.warning(f"Dropping pooled IMAP connection: {e}")
+                self._release_slot()
+        if expired:
+            logger.debug(f"Closed {len(expired)} idle IMAP connections")
+        self._fill()
+
+    def _maintain(self) -> None:
+        while not self._stopping.wait(MAINTENANCE_INTERVAL):
+            try:
+                self.maintain()
+            except Exception as e:
+                logger.error(f"IMAP pool maintenance failed: {e}")
@@ -8,29 +8,56 @@ from email.message import Message
 from typing import Dict, List, Optional, Tuple, Union, Any, cast
 
 import imapclient
+from imapclient import imap_utf7
+from imapclient.response_parser import parse_response
 
 from workspace_secretary.config import ImapConfig
 from workspace_secretary.models import Email
+from workspace_secretary.engine.bodystructure import (
+    decode_transfer_encoding,
+    text_parts,
+    walk_bodystructure,
+)
+from workspace_secretary.engine.compress import DeflateTransport
+from workspace_secretary.engine.expunge import compact_uid_set, parse_uid_set
+from workspace_secretary.engine.ingest import apply_fetch_metadata, parse_message_data
 from workspace_secretary.engine.oauth2 import get_access_token
 
 logger = logging.getLogger(__name__)
 
+# UIDs per UID STORE / MOVE command in batched mutations, keeping command lines
+# short even when the UIDs don't form ranges.
+MUTATION_CHUNK_SIZE = 1000
+
 
 class ImapClient:
     """IMAP client for interacting with email servers."""
 
-    def __init__(self, config: ImapConfig, allowed_folders: Optional[List[str]] = None):
+    def __init__(
+        self,
+        config: ImapConfig,
+        allowed_folders: Optional[List[str]] = None,
+        compress: bool = False,
+    ):
         """Initialize IMAP client.
 
         Args:
             config: IMAP configuration
             allowed_folders: List of allowed folders (None means all folders)
+            compress: Enable COMPRESS=DEFLATE (RFC 4978) when the server has it
         """
         self.config = config
         self.allowed_folders = set(allowed_folders) if allowed_folders else None
+        self.compress = compress
+        # DEFLATE transport of the current session, if compression is on.
+        self.compression: Optional[DeflateTransport] = None
         self.client: Optional[imapclient.IMAPClient] = None
         self.folder_cache: Dict[str, List[str]] = {}
         self.connected = False
+        self.qresync_enabled = False
+        # Expiry (Unix time) of the OAuth2 access token the session logged in
+        # with; None for password logins.
+        self.auth_expiry: Optional[int] = None
         self.count_cache: Dict[
             str, Dict[str, Tuple[int, datetime]]
         ] = {}  # Cache for message counts
@@ -45,6 +72,9 @@ class ImapClient:
         Raises:
             ConnectionError: If connection fails
         """
+        self.qresync_enabled = False
+        self.auth_expiry = None
+        self.compression = None
         try:
             self.client = imapclient.IMAPClient(
                 self.config.host,
@@ -60,7 +90,7 @@ class ImapClient:
                 if not self.config.oauth2:
                     raise ValueError("OAuth2 configuration is required for Gmail")
 
-                access_token, _ = get_access_token(self.config.oauth2)
+                access_token, self.auth_expiry = get_access_token(self.config.oauth2)
 
                 # Authenticate with XOAUTH2
                 # Use the oauth_login method which properly formats the XOAUTH2 string
@@ -78,18 +108,41 @@ class ImapClient:
             logger.info(f"Connected to IMAP server {self.config.host}")
 
             capabilities = self.get_capabilities()
+            if self.compress and "COMPRESS=DEFLATE" in capabilities:
+                self._enable_compression()
             if "CONDSTORE" in capabilities:
                 try:
                     self.client.enable("CONDSTORE")
                     logger.info("CONDSTORE enabled")
                 except Exception as e:
                     logger.warning(f"Failed to enable CONDSTORE: {e}")
+            if "QRESYNC" in capabilities:
+                try:
+                    enabled = self.client.enable("QRESYNC")
+                    self.qresync_enabled = b"QRESYNC" in enabled
+                    logger.info("QRESYNC enabled")
+                except Exception as e:
+                    logger.warning(f"Failed to enable QRESYNC: {e}")
 
         except Exception as e:
             self.connected = False
             logger.error(f"Failed to connect to IMAP server: {e}")
             raise ConnectionError(f"Failed to connect to IMAP server: {e}")
 
+    def _enable_compression(self) -> None:
+        """Switch the session to COMPRESS=DEFLATE; failures leave it plain."""
+        client = self._get_client()
+        try:
+            typ, data = client._raw_command(b"COMPRESS", [b"DEFLATE"], uid=False)
+        except Exception as e:
+            logger.warning(f"Failed to enable COMPRESS=DEFLATE: {e}")
+            return
+        if typ != "OK":
+            logger.warning(f"Server refused COMPRESS=DEFLATE: {data}")
+            return
+        self.compression = DeflateTransport(client._imap)
+        logger.info("COMPRESS=DEFLATE enabled")
+
     def disconnect(self) -> None:
         """Disconnect from IMAP server."""
         if self.client:
@@ -130,6 +183,30 @@ class ImapClient:
             raise ConnectionError("IMAP client not initialized")
         return self.client
 
+    def noop(self, timeout: Optional[float] = None) -> None:
+        """Send NOOP to check that the connection still works.
+
+        Args:
+            timeout: Seconds to wait for the reply; None waits indefinitely
+
+        Raises:
+            ConnectionError: If the server does not answer
+        """
+        client = self._get_client()
+        sock = client.socket()
+        previous = sock.gettimeout()
+        sock.settimeout(timeout)
+        try:
+            client.noop()
+        except Exception as e:
+            self.connected = False
+            raise ConnectionError(f"NOOP failed: {e}")
+        finally:
+            try:
+                sock.settimeout(previous)
+            except OSError:
+                pass
+
     def get_capabilities(self) -> List[str]:
         """Get IMAP server capabilities.
 
@@ -290,6 +367,97 @@ class ImapClient:
             logger.error(f"Error selecting folder {folder}: {e}")
             raise ConnectionError(f"Failed to select folder {folder}: {e}")
 
+    def folders_status(self, folders: List[str]) -> Dict[str, Dict[str, int]]:
+        """Get STATUS counters for several folders in one round trip.
+
+        Uses LIST-STATUS (RFC 5819) when the server offers it; otherwise sends
+        one STATUS command per folder without waiting for each reply. Neither
+        selects a folder.
+
+        Args:
+            folders: Folders to query; folders that are not allowed are skipped
+
+        Returns:
+            Dictionary keyed by folder with messages, uidnext, uidvalidity and,
+            if the server supports CONDSTORE, highestmodseq. Folders the server
+            did not report (deleted, or rejected) are missing.
+
+        Raises:
+            ConnectionError: If the server rejects the command
+        """
+        folders = [folder for folder in folders if self._is_folder_allowed(folder)]
+        if not folders:
+            return {}
+
+        client = self._get_client()
+        items = b"MESSAGES UIDNEXT UIDVALIDITY"
+        if self.has_condstore_capability():
+            items += b" HIGHESTMODSEQ"
+
+        try:
+            results: Dict[str, Dict[str, int]] = {}
+            if "LIST-STATUS" in self.get_capabilities():
+                results = self._parse_status_responses(
+                    self._list_status(client, folders, items)
+                )
+            # Servers may leave the selected folder out of LIST-STATUS.
+            missing = [folder for folder in folders if folder not in results]
+            if missing:
+                results.update(
+                    self._parse_status_responses(
+                        self._pipelined_status(client, missing, items)
+                    )
+                )
+        except imapclient.IMAPClient.Error as e:
+            logger.error(f"Error getting status of {len(folders)} folders: {e}")
+            raise ConnectionError(f"Failed to get folder status: {e}")
+        return {folder: results[folder] for folder in folders if folder in results}
+
+    def _list_status(
+        self, client: imapclient.IMAPClient, folders: List[str], items: bytes
+    ) -> List[Any]:
+        imap = client._imap
+        patterns = b" ".join(_quote_folder(folder) for folder in folders)
+        tag = imap._command(
+            "LIST", b'""', b"(" + patterns + b")", b"RETURN (STATUS (" + items + b"))"
+        )
+        typ, data = imap._command_complete("LIST", tag)
+        imap.untagged_responses.pop("LIST", None)
+        responses = imap.untagged_responses.pop("STATUS", [])
+        client._checkok("list", typ, data)
+        return responses
+
+    def _pipelined_status(
+        self, client: imapclient.IMAPClient, folders: List[str], items: bytes
+    ) -> List[Any]:
+        imap = client._imap
+        tags = [
+            imap._command("STATUS", _quote_folder(folder), b"(" + items + b")")
+            for folder in folders
+        ]
+        for folder, tag in zip(folders, tags):
+            typ, data = imap._command_complete("STATUS", tag)
+            if typ != "OK":
+                logger.warning(f"STATUS {folder} failed: {data}")
+        return imap.untagged_responses.pop("STATUS", [])
+
+    def _parse_status_responses(
+        self, responses: List[Any]
+    ) -> Dict[str, Dict[str, int]]:
+        """Parse untagged STATUS responses into counters keyed by folder."""
+        if not responses:
+            return {}
+        parsed = parse_response(responses)
+        results: Dict[str, Dict[str, int]] = {}
+        for name, values in zip(parsed[::2], parsed[1::2]):
+            if isinstance(name, int):
+                name = str(name)
+            results[self.decode_folder_name(name)] = {
+                key.decode().lower(): int(value)
+                for key, value in zip(values[::2], values[1::2])
+            }
+        return results
+
     def search(
         self,
         criteria: Union[str, List, Tuple, Dict[str, Any]],
@@ -465,50 +633,11 @@ class ImapClient:
             raw_message = message_data.get(b"BODY[]") or message_data.get(
                 b"BODY.PEEK[]"
             )
-            flags = message_data.get(b"FLAGS", [])
 
             if not raw_message:
                 logger.warning(f"No body found for message {uid}")
                 continue
 
-            gmail_thread_id = None
-            gmail_labels = None
-            gmail_msgid = None
-            if is_gmail:
-                gmail_thread_id_raw = message_data.get(b"X-GM-THRID")
-                if isinstance(gmail_thread_id_raw, bytes):
-                    gmail_thread_id = int(gmail_thread_id_raw.decode("utf-8"))
-                elif gmail_thread_id_raw is not None:
-                    gmail_thread_id = int(gmail_thread_id_raw)
-
-                gmail_labels_raw = message_data.get(b"X-GM-LABELS")
-                if gmail_labels_raw and isinstance(gmail_labels_raw, (list, tuple)):
-                    gmail_labels = [
-                        label.decode("utf-8")
-                        if isinstance(label, bytes)
-                        else str(label)
-                        for label in gmail_labels_raw
-                    ]
-
-                gmail_msgid_raw = message_data.get(b"X-GM-MSGID")
-                if gmail_msgid_raw is not None:
-                    gmail_msgid = int(gmail_msgid_raw)
-
-            modseq = 0
-            if has_condstore:
-                modseq_raw = message_data.get(b"MODSEQ")
-                if modseq_raw and isinstance(modseq_raw, tuple) and len(modseq_raw) > 0:
-                    modseq = int(modseq_raw[0])
-
-            internal_date = message_data.get(b"INTERNALDATE")
-            size = message_data.get(b"RFC822.SIZE", 0)
-
-            str_flags = []
-            if flags and isinstance(flags, (list, tuple)):
-                str_flags = [
-                    f.decode("utf-8") if isinstance(f, bytes) else str(f) for f in flags
-                ]
-
             if not isinstance(raw_message, bytes):
                 logger.warning(f"Message data for {uid} is not bytes")
                 continue
@@ -519,18 +648,8 @@ class ImapClient:
                 message
             )
 
-            email_obj = Email.from_message(
-                message,
-                uid=uid,
-                folder=folder,
-                gmail_thread_id=str(gmail_thread_id) if gmail_thread_id else None,
-                gmail_labels=gmail_labels,
-            )
-            email_obj.flags = str_flags
-            email_obj.modseq = modseq
-            email_obj.gmail_msgid = gmail_msgid
-            email_obj.internal_date = internal_date
-            email_obj.size = size
+            email_obj = Email.from_message(message, uid=uid, folder=folder)
+            apply_fetch_metadata(email_obj, message_data)
             email_obj.has_attachments = has_attachments
             email_obj.attachment_filenames = attachment_filenames
 
@@ -538,6 +657,181 @@ class ImapClient:
 
         return emails
 
+    def fetch_headers(self, uids: List[int], folder: str = "INBOX") -> Dict[int, Email]:
+        """Fetch headers, structure and flags without downloading message bodies.
+
+        The returned emails have empty content. Attachment information comes
+        from BODYSTRUCTURE, so no attachment bytes are transferred.
+
+        Args:
+            uids: List of email UIDs
+            folder: Folder to fetch from
+
+        Returns:
+            Dictionary mapping UIDs to header-only Email objects
+
+        Raises:
+            ConnectionError: If not connected and connection fails
+        """
+        fetched = self.fetch_message_data(uids, folder, bodies=False)
+        return self._parse_all(fetched, folder)
+
+    def fetch_email_bodies(
+        self, uids: List[int], folder: str = "INBOX"
+    ) -> Dict[int, Email]:
+        """Fetch emails with their text bodies but without attachment bytes.
+
+        BODYSTRUCTURE is read first, then only the text/plain and text/html
+        sections are downloaded (``BODY.PEEK[1.1]`` etc.). Attachments are
+        described by ``attachment_info`` (filename, size, MIME type, part).
+
+        Args:
+            uids: List of email UIDs
+            folder: Folder to fetch from
+
+        Returns:
+            Dictionary mapping UIDs to Email objects
+
+        Raises:
+            ConnectionError: If not connected and connection fails
+        """
+        return self._parse_all(self.fetch_message_data(uids, folder), folder)
+
+    def fetch_message_data(
+        self, uids: List[int], folder: str = "INBOX", bodies: bool = True
+    ) -> Dict[int, Dict[bytes, Any]]:
+        """Download raw FETCH data for ``uids`` without parsing it.
+
+        Each response holds BODY[HEADER], BODYSTRUCTURE, flags, size, dates and
+        MODSEQ / Gmail attributes when the server has them. With ``bodies`` the
+        text/plain and text/html sections are added as ``BODY[<part>]`` keys.
+        Use ``ingest.parse_message_data`` to turn a response into an Email.
+
+        Args:
+            uids: List of email UIDs
+            folder: Folder to fetch from
+            bodies: Also download the text sections
+
+        Returns:
+            Dictionary mapping UIDs to FETCH response dictionaries
+
+        Raises:
+            ConnectionError: If not connected and connection fails
+        """
+        client = self._get_client()
+        self.select_folder(folder, readonly=True)
+
+        if not uids:
+            return {}
+
+        fetch_attributes = [
+            "BODY.PEEK[HEADER]",
+            "BODYSTRUCTURE",
+            "FLAGS",
+            "INTERNALDATE",
+            "RFC822.SIZE",
+        ]
+
+        capabilities = self.get_capabilities()
+        if "CONDSTORE" in capabilities:
+            fetch_attributes.append("MODSEQ")
+        if "X-GM-EXT-1" in capabilities:
+            fetch_attributes.extend(["X-GM-THRID", "X-GM-LABELS", "X-GM-MSGID"])
+
+        result: Any = client.fetch(uids, fetch_attributes)
+        fetched: Dict[int, Dict[bytes, Any]] = {
+            uid: dict(message_data) for uid, message_data in result.items()
+        }
+        if not bodies:
+            return fetched
+
+        # Messages with the same text-section layout are fetched together.
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+        for uid, message_data in fetched.items():
+            sections = text_parts(
+                walk_bodystructure(message_data.get(b"BODYSTRUCTURE"))
+            )
+            if sections:
+                key = tuple(sorted(part.part for part in sections.values()))
+                groups.setdefault(key, []).append(uid)
+
+        for key, group_uids in groups.items():
+            result = client.fetch(
+                group_uids, [f"BODY.PEEK[{section}]" for section in key]
+            )
+            for uid, section_data in result.items():
+                if uid in fetched:
+                    for section in key:
+                        name = f"BODY[{section}]".encode()
+                        if name in section_data:
+                            fetched[uid][name] = section_data[name]
+
+        return fetched
+
+    def fetch_gmail_metadata(
+        self, uids: List[int], folder: str = "INBOX"
+    ) -> Dict[int, Dict[bytes, Any]]:
+        """Fetch X-GM-MSGID, X-GM-LABELS, flags and MODSEQ for ``uids``.
+
+        This is enough to recognise a message already cached from another
+        folder and record its state in this one, without downloading it.
+
+        Args:
+            uids: List of email UIDs
+            folder: Folder to fetch from
+
+        Returns:
+            Dictionary mapping UIDs to FETCH response dictionaries, or an empty
+            dictionary if the server has no Gmail extensions
+        """
+        if not uids or not self._has_gmail_extensions():
+            return {}
+
+        client = self._get_client()
+        self.select_folder(folder, readonly=True)
+
+        fetch_attributes = ["FLAGS", "X-GM-MSGID", "X-GM-LABELS"]
+        if "CONDSTORE" in self.get_capabilities():
+            fetch_attributes.append("MODSEQ")
+
+        result: Any = client.fetch(uids, fetch_attributes)
+        return {uid: dict(message_data) for uid, message_data in result.items()}
+
+    def fetch_part(
+        self, uid: int, folder: str, part: str, encoding: str = "7bit"
+    ) -> Optional[bytes]:
+        """Download a single body section, e.g. one attachment.
+
+        Args:
+            uid: Email UID
+            folder: Folder to fetch from
+            part: IMAP section number from BODYSTRUCTURE
+            encoding: Content-Transfer-Encoding of the section
+
+        Returns:
+            Decoded section bytes, or None if the message has no such section
+        """
+        client = self._get_client()
+        self.select_folder(folder, readonly=True)
+
+        result: Any = client.fetch([uid], [f"BODY.PEEK[{part}]"])
+        data = result.get(uid, {}).get(f"BODY[{part}]".encode())
+        if not isinstance(data, bytes):
+            return None
+        return decode_transfer_encoding(data, encoding)
+
+    def _parse_all(
+        self, fetched: Dict[int, Dict[bytes, Any]], folder: str
+    ) -> Dict[int, Email]:
+        emails = {}
+        for uid, message_data in fetched.items():
+            email_obj = parse_message_data(uid, folder, message_data)
+            if email_obj is None:
+                logger.warning(f"No headers found for message {uid}")
+                continue
+            emails[uid] = email_obj
+        return emails
+
     def _extract_attachment_info(self, message: Message) -> Tuple[bool, List[str]]:
         """Extract attachment information from a MIME message."""
         has_attachments = False
@@ -889,6 +1183,106 @@ class ImapClient:
             logger.error(f"Failed to remove Gmail labels: {e}")
             return False
 
+    def store_flags(self, folder: str, uids: List[int], flag: str, value: bool) -> None:
+        """Set or clear a flag on many emails of one folder.
+
+        Sends one ``UID STORE ... FLAGS.SILENT`` per ``MUTATION_CHUNK_SIZE``
+        UIDs, with the UIDs collapsed into ranges.
+
+        Raises:
+            ConnectionError: If not connected and connection fails
+            imapclient.exceptions.IMAPClientError: If the server rejects it
+        """
+        client = self._get_client()
+        self.select_folder(folder)
+        for uid_set in _uid_set_chunks(uids):
+            if value:
+                client.add_flags(uid_set, [flag], silent=True)
+            else:
+                client.remove_flags(uid_set, [flag], silent=True)
+        logger.debug(f"{'Set' if value else 'Cleared'} {flag} on {len(uids)} emails")
+
+    def move_emails(
+        self, folder: str, uids: List[int], target_folder: str
+    ) -> Dict[int, int]:
+        """Move many emails of one folder to another folder.
+
+        Uses ``UID MOVE`` when the server has MOVE, otherwise ``UID COPY``
+        followed by flagging the UIDs deleted and expunging them.
+
+        Returns:
+            The UID each moved email got in the target folder, as reported by
+            the server's ``COPYUID`` responses (UIDPLUS). Emails the server
+            reported nothing for are missing.
+
+        Raises:
+            ConnectionError: If not connected and connection fails
+            ValueError: If a folder is not allowed
+            imapclient.exceptions.IMAPClientError: If the server rejects it
+        """
+        if self.allowed_folders is not None:
+            if folder not in self.allowed_folders:
+                raise ValueError(f"Source folder '{folder}' is not allowed")
+            if target_folder not in self.allowed_folders:
+                raise ValueError(f"Target folder '{target_folder}' is not allowed")
+
+        client = self._get_client()
+        self.select_folder(folder)
+        capabilities = self.get_capabilities()
+        untagged = client._imap.untagged_responses
+        untagged.pop("COPYUID", None)
+        new_uids: Dict[int, int] = {}
+        for uid_set in _uid_set_chunks(uids):
+            if "MOVE" in capabilities:
+                client.move(uid_set, target_folder)
+            else:
+                client.copy(uid_set, target_folder)
+                client.add_flags(uid_set, [r"\Deleted"], silent=True)
+                if "UIDPLUS" in capabilities:
+                    client.uid_expunge(uid_set)
+                else:
+                    client.expunge()
+            # MOVE sends COPYUID untagged, COPY in its tagged OK; imaplib files
+            # both under the response code.
+            for data in untagged.pop("COPYUID", []):
+                new_uids.update(_parse_copyuid(data))
+        logger.debug(f"Moved {len(uids)} emails from {folder} to {target_folder}")
+        return new_uids
+
+    def modify_gmail_labels(
+        self, folder: str, uids: List[int], labels: List[str], action: str
+    ) -> None:
+        """Add, remove or set Gmail labels on many emails of one folder.
+
+        Args:
+            folder: Folder containing the emails
+            uids: Email UIDs
+            labels: Labels to apply
+            action: "add", "remove" or "set"
+
+        Raises:
+            ConnectionError: If not connected and connection fails
+            ValueError: If the action is unknown or the server has no Gmail
+                extensions
+            imapclient.exceptions.IMAPClientError: If the server rejects it
+        """
+        stores = {
+            "add": "add_gmail_labels",
+            "remove": "remove_gmail_labels",
+            "set": "set_gmail_labels",
+        }
+        if action not in stores:
+            raise ValueError(f"Invalid label action: {action}")
+        if not self._has_gmail_extensions():
+            raise ValueError("Gmail extensions not supported by server")
+
+        client = self._get_client()
+        self.select_folder(folder)
+        store = getattr(client, stores[action])
+        for uid_set in _uid_set_chunks(uids):
+            store(uid_set, labels, silent=True)
+        logger.debug(f"Labels {action} {labels} on {len(uids)} emails in {folder}")
+
     def has_sort_capability(self) -> bool:
         """Check if server supports SORT extension (RFC 5256)."""
         capabilities = self.get_capabilities()
@@ -904,6 +1298,16 @@ class ImapClient:
         capabilities = self.get_capabilities()
         return "CONDSTORE" in capabilities
 
+    def has_qresync_capability(self) -> bool:
+        """Check if server supports QRESYNC extension (RFC 7162)."""
+        capabilities = self.get_capabilities()
+        return "QRESYNC" in capabilities
+
+    def has_notify_capability(self) -> bool:
+        """Check if server supports NOTIFY extension (RFC 5465)."""
+        capabilities = self.get_capabilities()
+        return "NOTIFY" in capabilities
+
     def has_idle_capability(self) -> bool:
         """Check if server supports IDLE extension (RFC 2177)."""
         capabilities = self.get_capabilities()
@@ -1390,6 +1794,154 @@ class ImapClient:
             logger.error(f"fetch_changed_since failed: {e}")
             raise
 
+    def fetch_message_ids(self, folder: str) -> Dict[int, Dict[str, Any]]:
+        """Fetch what identifies each message of a folder, and its flags.
+
+        Used after a UIDVALIDITY change to match cached rows to their new UIDs
+        without downloading the messages again.
+
+        Args:
+            folder: Folder to fetch from
+
+        Returns:
+            Dictionary mapping UIDs to:
+            - message_id: Message-ID header, or None
+            - gmail_msgid: X-GM-MSGID (None without Gmail extensions)
+            - flags: List of flags
+            - modseq: Modification sequence (0 without CONDSTORE)
+            - gmail_labels: List of Gmail labels (if available)
+        """
+        client = self._get_client()
+        self.select_folder(folder, readonly=True)
+
+        fetch_attrs = ["FLAGS", "BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)]"]
+        has_gmail = self._has_gmail_extensions()
+        if has_gmail:
+            fetch_attrs.extend(["X-GM-MSGID", "X-GM-LABELS"])
+        if self.has_condstore_capability():
+            fetch_attrs.append("MODSEQ")
+
+        result: Any = client.fetch("1:*", fetch_attrs)
+        messages: Dict[int, Dict[str, Any]] = {}
+        for uid, data in result.items():
+            raw_header = data.get(b"BODY[HEADER.FIELDS (MESSAGE-ID)]") or b""
+            message_id = email.message_from_bytes(raw_header).get("Message-ID")
+
+            modseq_raw = data.get(b"MODSEQ")
+            gmail_msgid = data.get(b"X-GM-MSGID")
+            labels_raw = data.get(b"X-GM-LABELS") if has_gmail else None
+            messages[uid] = {
+                "message_id": str(message_id).strip() if message_id else None,
+                "gmail_msgid": int(gmail_msgid) if gmail_msgid is not None else None,
+                "flags": [
+                    f.decode("utf-8") if isinstance(f, bytes) else str(f)
+                    for f in data.get(b"FLAGS", [])
+                ],
+                "modseq": int(modseq_raw[0]) if modseq_raw else 0,
+                "gmail_labels": [
+                    label.decode("utf-8") if isinstance(label, bytes) else str(label)
+                    for label in labels_raw
+                ]
+                if labels_raw is not None
+                else None,
+            }
+        logger.debug(f"Fetched message ids of {len(messages)} messages in {folder}")
+        return messages
+
+    def fetch_vanished_since(self, folder: str, modseq: int) -> List[int]:
+        """Fetch UIDs expunged from a folder since given modseq (QRESYNC).
+
+        Sends ``UID FETCH 1:* (UID) (CHANGEDSINCE modseq VANISHED)`` and reads
+        the ``VANISHED (EARLIER)`` response that comes with it.
+
+        Args:
+            folder: Folder to check
+            modseq: The HIGHESTMODSEQ from the last sync
+
+        Returns:
+            Expunged UIDs (may include UIDs that were never cached)
+
+        Raises:
+            ValueError: If QRESYNC is not enabled on this connection
+        """
+        if not self.qresync_enabled:
+            raise ValueError("QRESYNC is not enabled")
+
+        client = self._get_client()
+        self.select_folder(folder, readonly=True)
+
+        untagged = client._imap.untagged_responses
+        untagged.pop("VANISHED", None)
+        try:
+            client.fetch(
+                "1:*", ["UID"], modifiers=[f"CHANGEDSINCE {modseq}", "VANISHED"]
+            )
+        except Exception as e:
+            logger.error(f"fetch_vanished_since failed: {e}")
+            raise
+
+        vanished: List[int] = []
+        for line in untagged.pop("VANISHED", []):
+            text = line.decode("ascii") if isinstance(line, bytes) else str(line)
+            vanished.extend(parse_uid_set(text.replace("(EARLIER)", "")))
+        logger.debug(f"VANISHED since {modseq} returned {len(vanished)} UIDs")
+        return vanished
+
+    def uids_at_sequence(self, folder: str, seqs: List[int]) -> Dict[int, int]:
+        """Map message sequence numbers to UIDs in a folder.
+
+        Args:
+            folder: Folder to look in
+            seqs: Message sequence numbers
+
+        Returns:
+            Dictionary mapping each sequence number that exists to its UID
+        """
+        if not seqs:
+            return {}
+
+        client = self._get_client()
+        self.select_folder(folder, readonly=True)
+
+        client.use_uid = False
+        try:
+            result = client.fetch(seqs, ["UID"])
+        finally:
+            client.use_uid = True
+        return {seq: int(data[b"UID"]) for seq, data in result.items()}
+
+    def notify_set(self, folders: List[str]) -> None:
+        """Subscribe to NOTIFY events (RFC 5465) for the selected folder and others.
+
+        Changes in the selected folder then arrive as EXISTS, EXPUNGE and FETCH
+        responses; changes in ``folders`` as STATUS responses. They are read
+        with idle_check() like any other IDLE response.
+
+        Raises:
+            ConnectionError: If not connected
+            imapclient.IMAPClient.Error: If the server rejects the command
+        """
+        client = self._get_client()
+        events = b"(MessageNew MessageExpunge FlagChange)"
+        mailboxes = b" ".join(_quote_folder(folder) for folder in folders)
+        if len(folders) > 1:
+            # one-or-more-mailbox: several mailboxes must be a list.
+            mailboxes = b"(" + mailboxes + b")"
+        args = [
+            b"SET",
+            b"(selected (MessageNew (UID) MessageExpunge FlagChange))",
+            b"(mailboxes " + mailboxes + b" " + events + b")",
+        ]
+        typ, data = client._raw_command(b"NOTIFY", args, uid=False)
+        client._checkok("notify", typ, data)
+        logger.info(f"NOTIFY enabled for {len(folders)} folders")
+
+    def decode_folder_name(self, name: Union[str, bytes]) -> str:
+        """Decode a modified UTF-7 mailbox name from a server response."""
+        if isinstance(name, bytes):
+            return imap_utf7.decode(name)
+        return name
+
     def idle_start(self) -> None:
         """Start IDLE mode for push-based notifications.
 
@@ -1424,14 +1976,18 @@ class ImapClient:
         logger.debug(f"IDLE check returned {len(responses)} responses")
         return responses
 
-    def idle_done(self) -> None:
+    def idle_done(self) -> List[Tuple[Any, ...]]:
         """Exit IDLE mode.
 
         Must be called after idle_start() before issuing any other IMAP commands.
+
+        Returns:
+            Responses received since the last idle_check()
         """
         client = self._get_client()
-        client.idle_done()
+        _, responses = client.idle_done()
         logger.debug("IDLE mode ended")
+        return responses
 
     def gmail_raw_search(self, query: str, folder: str = "INBOX") -> List[int]:
         """Search using Gmail's X-GM-RAW query syntax.
@@ -1518,3 +2074,38 @@ class ImapClient:
         except Exception as e:
             logger.error(f"Failed to save draft: {e}")
             return None
+
+
+def _quote_folder(folder: str) -> bytes:
+    """Encode a folder name as a quoted IMAP mailbox argument."""
+    name = imap_utf7.encode(folder)
+    return b'"' + name.replace(b"\\", b"\\\\").replace(b'"', b'\\"') + b'"'
+
+
+def _parse_copyuid(data: Union[bytes, str]) -> Dict[int, int]:
+    """Map source to destination UIDs from a ``COPYUID`` response code.
+
+    ``data`` is the code's argument, ``<uidvalidity> <source set> <dest set>``;
+    both sets list UIDs in the same order (RFC 4315).
+    """
+    if isinstance(data, bytes):
+        data = data.decode("ascii", "replace")
+    parts = data.split()
+    if len(parts) != 3:
+        return {}
+    try:
+        source, target = parse_uid_set(parts[1]), parse_uid_set(parts[2])
+    except ValueError:
+        return {}
+    if len(source) != len(target):
+        return {}
+    return dict(zip(source, target))
+
+
+def _uid_set_chunks(uids: List[int]) -> List[str]:
+    """Split UIDs into compact UID sets of at most ``MUTATION_CHUNK_SIZE``."""
+    ordered = sorted(set(uids))
+    return [
+        compact_uid_set(ordered[i : i + MUTATION_CHUNK_SIZE])
+        for i in range(0, len(ordered), MUTATION_CHUNK_SIZE)
+    ]
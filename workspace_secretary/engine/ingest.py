@@ -0,0 +1,310 @@
+"""Turn IMAP FETCH responses into database rows.
+
+This is the CPU side of sync: MIME header decoding, BODYSTRUCTURE walking,
+charset decoding and the sender-authentication heuristics. Everything here is
+free of network and database access, so it can run on its own pipeline stage.
+"""
+
+from __future__ import annotations
+
+import email
+import re
+from email.utils import parseaddr
+from typing import Any, Optional
+
+import idna
+
+from workspace_secretary.engine.bodystructure import (
+    attachment_info,
+    attachment_parts,
+    decode_text_part,
+    text_parts,
+    walk_bodystructure,
+)
+from workspace_secretary.models import Email
+
+
+def _decode_flags(message_data: dict[bytes, Any]) -> list[str]:
+    flags = message_data.get(b"FLAGS", [])
+    if not flags or not isinstance(flags, (list, tuple)):
+        return []
+    return [f.decode("utf-8") if isinstance(f, bytes) else str(f) for f in flags]
+
+
+def _decode_gmail_labels(message_data: dict[bytes, Any]) -> Optional[list[str]]:
+    gmail_labels_raw = message_data.get(b"X-GM-LABELS")
+    if not gmail_labels_raw or not isinstance(gmail_labels_raw, (list, tuple)):
+        return None
+    return [
+        label.decode("utf-8") if isinstance(label, bytes) else str(label)
+        for label in gmail_labels_raw
+    ]
+
+
+def _decode_modseq(message_data: dict[bytes, Any]) -> int:
+    modseq_raw = message_data.get(b"MODSEQ")
+    if modseq_raw and isinstance(modseq_raw, tuple) and len(modseq_raw) > 0:
+        return int(modseq_raw[0])
+    return 0
+
+
+def apply_fetch_metadata(email_obj: Email, message_data: dict[bytes, Any]) -> None:
+    """Copy flags, size, dates, MODSEQ and Gmail attributes onto an Email."""
+    gmail_thread_id_raw = message_data.get(b"X-GM-THRID")
+    if isinstance(gmail_thread_id_raw, bytes):
+        email_obj.gmail_thread_id = gmail_thread_id_raw.decode("utf-8")
+    elif gmail_thread_id_raw is not None:
+        email_obj.gmail_thread_id = str(gmail_thread_id_raw)
+
+    gmail_labels = _decode_gmail_labels(message_data)
+    if gmail_labels is not None:
+        email_obj.gmail_labels = gmail_labels
+
+    gmail_msgid_raw = message_data.get(b"X-GM-MSGID")
+    if gmail_msgid_raw is not None:
+        email_obj.gmail_msgid = int(gmail_msgid_raw)
+
+    email_obj.flags = _decode_flags(message_data)
+    email_obj.modseq = _decode_modseq(message_data)
+    email_obj.internal_date = message_data.get(b"INTERNALDATE")
+    email_obj.size = message_data.get(b"RFC822.SIZE", 0)
+
+
+def gmail_copy_params(
+    uid: int,
+    folder: str,
+    source: tuple[int, str],
+    message_data: dict[bytes, Any],
+) -> dict[str, Any]:
+    """Build a ``copy_emails_batch`` entry for a message cached in another folder.
+
+    Gmail shows one message in every folder it has a label for. Only the
+    per-folder state comes from ``message_data`` (flags, labels, MODSEQ); the
+    rest is copied from the cached ``source`` (uid, folder) row.
+    """
+    flags = _decode_flags(message_data)
+    return {
+        "uid": uid,
+        "folder": folder,
+        "source_uid": source[0],
+        "source_folder": source[1],
+        "flags": ",".join(flags),
+        "is_unread": "\\Seen" not in flags,
+        "is_important": "\\Flagged" in flags,
+        "modseq": _decode_modseq(message_data),
+        "gmail_labels": _decode_gmail_labels(message_data),
+    }
+
+
+def parse_message_data(
+    uid: int, folder: str, message_data: dict[bytes, Any]
+) -> Optional[Email]:
+    """Build an Email from a header + BODYSTRUCTURE FETCH response.
+
+    Text sections fetched alongside (``BODY[1.1]`` etc.) are decoded into the
+    email content; without them the email is header-only.
+    """
+    raw_header = message_data.get(b"BODY[HEADER]")
+    if not isinstance(raw_header, bytes):
+        return None
+
+    email_obj = Email.from_message(
+        email.message_from_bytes(raw_header), uid=uid, folder=folder
+    )
+    apply_fetch_metadata(email_obj, message_data)
+
+    parts = walk_bodystructure(message_data.get(b"BODYSTRUCTURE"))
+    attachments = attachment_parts(parts)
+    email_obj.has_attachments = bool(attachments)
+    email_obj.attachment_filenames = [
+        part.filename for part in attachments if part.filename
+    ]
+    email_obj.attachment_info = attachment_info(parts)
+
+    for subtype, part in text_parts(parts).items():
+        data = message_data.get(f"BODY[{part.part}]".encode())
+        if not isinstance(data, bytes):
+            continue
+        if subtype == "plain":
+            email_obj.content.text = decode_text_part(data, part)
+        else:
+            email_obj.content.html = decode_text_part(data, part)
+
+    return email_obj
+
+
+def _parse_authentication_results(headers: dict[str, Any]) -> dict[str, Any]:
+    raw_values: list[str] = []
+    for k in ["Authentication-Results", "ARC-Authentication-Results", "Received-SPF"]:
+        v = headers.get(k)
+        if not v:
+            continue
+        if isinstance(v, list):
+            raw_values.extend([str(x) for x in v if x])
+        else:
+            raw_values.append(str(v))
+
+    combined = "\n".join(raw_values)
+    combined_l = combined.lower()
+
+    def _has_result(prefix: str, value: str) -> bool:
+        return bool(
+            re.search(rf"\b{re.escape(prefix)}\s*=\s*{re.escape(value)}\b", combined_l)
+        )
+
+    spf_pass = _has_result("spf", "pass") or _has_result("spf", "bestguesspass")
+    spf_fail = _has_result("spf", "fail") or _has_result("spf", "softfail")
+    dkim_pass = _has_result("dkim", "pass")
+    dkim_fail = _has_result("dkim", "fail")
+    dmarc_pass = _has_result("dmarc", "pass")
+    dmarc_fail = _has_result("dmarc", "fail")
+
+    return {
+        "auth_results_raw": combined or None,
+        "spf": "pass" if spf_pass else "fail" if spf_fail else "unknown",
+        "dkim": "pass" if dkim_pass else "fail" if dkim_fail else "unknown",
+        "dmarc": "pass" if dmarc_pass else "fail" if dmarc_fail else "unknown",
+    }
+
+
+def _extract_domain(addr: str) -> str:
+    _, email_addr = parseaddr(addr or "")
+    if "@" not in email_addr:
+        return ""
+    return email_addr.split("@", 1)[1].strip().lower()
+
+
+def _is_punycode_domain(domain: str) -> bool:
+    if not domain:
+        return False
+    try:
+        decoded = idna.decode(domain)
+        return decoded != domain
+    except Exception:
+        return "xn--" in domain
+
+
+def _sender_suspicion_signals(from_addr_raw: str, reply_to_raw: str) -> dict[str, Any]:
+    from_domain = _extract_domain(from_addr_raw)
+    reply_to_domain = _extract_domain(reply_to_raw)
+
+    reply_to_differs = bool(
+        reply_to_domain and from_domain and reply_to_domain != from_domain
+    )
+
+    display_name, parsed_addr = parseaddr(from_addr_raw)
+    display_name_l = (display_name or "").lower()
+    parsed_local = parsed_addr.split("@", 1)[0].lower() if "@" in parsed_addr else ""
+
+    display_name_mismatch = False
+    if display_name_l and parsed_local:
+        token = re.sub(r"[^a-z0-9]+", "", parsed_local)
+        if token and token not in re.sub(r"[^a-z0-9]+", "", display_name_l):
+            display_name_mismatch = True
+
+    punycode_domain = _is_punycode_domain(from_domain) or _is_punycode_domain(
+        reply_to_domain
+    )
+
+    return {
+        "reply_to_differs": reply_to_differs,
+        "display_name_mismatch": display_name_mismatch,
+        "punycode_domain": punycode_domain,
+        "is_suspicious_sender": bool(
+            reply_to_differs or display_name_mismatch or punycode_domain
+        ),
+    }
+
+
+def email_to_db_params(
+    email_obj: Email, folder: str, body_hydrated: bool = True
+) -> dict[str, Any]:
+    """Convert Email dataclass to database upsert parameters.
+
+    ``body_hydrated`` is False for header-only emails from ``fetch_headers``.
+    """
+    date_str = email_obj.date.isoformat() if email_obj.date else None
+    internal_date_str = (
+        email_obj.internal_date.isoformat() if email_obj.internal_date else None
+    )
+    gmail_thread_id = (
+        int(email_obj.gmail_thread_id) if email_obj.gmail_thread_id else None
+    )
+
+    headers = email_obj.headers or {}
+    if not isinstance(headers, dict):
+        headers = {}
+
+    auth = _parse_authentication_results(headers)
+
+    reply_to_raw = ""
+    reply_to_v = headers.get("Reply-To")
+    if reply_to_v:
+        reply_to_raw = str(reply_to_v)
+
+    from_addr_raw = str(email_obj.from_)
+    suspicious = _sender_suspicion_signals(from_addr_raw, reply_to_raw)
+
+    return {
+        "uid": email_obj.uid or 0,
+        "folder": folder,
+        "message_id": email_obj.message_id,
+        "subject": email_obj.subject,
+        "from_addr": str(email_obj.from_),
+        "to_addr": ",".join(str(addr) for addr in email_obj.to),
+        "cc_addr": ",".join(str(addr) for addr in email_obj.cc),
+        "bcc_addr": "",
+        "date": date_str,
+        "internal_date": internal_date_str,
+        "body_text": email_obj.content.text or "",
+        "body_html": email_obj.content.html or "",
+        "flags": ",".join(email_obj.flags),
+        "is_unread": "\\Seen" not in email_obj.flags,
+        "is_important": "\\Flagged" in email_obj.flags,
+        "size": email_obj.size,
+        "modseq": email_obj.modseq,
+        "in_reply_to": email_obj.in_reply_to or "",
+        "references_header": " ".join(email_obj.references)
+        if email_obj.references
+        else "",
+        "gmail_thread_id": gmail_thread_id,
+        "gmail_msgid": email_obj.gmail_msgid,
+        "gmail_labels": email_obj.gmail_labels,
+        "has_attachments": email_obj.has_attachments,
+        "attachment_filenames": email_obj.attachment_filenames,
+        "attachment_info": email_obj.attachment_info,
+        "auth_results_raw": auth["auth_results_raw"],
+        "spf": auth["spf"],
+        "dkim": auth["dkim"],
+        "dmarc": auth["dmarc"],
+        "is_suspicious_sender": suspicious["is_suspicious_sender"],
+        "suspicious_sender_signals": {
+            "reply_to_differs": suspicious["reply_to_differs"],
+            "display_name_mismatch": suspicious["display_name_mismatch"],
+            "punycode_domain": suspicious["punycode_domain"],
+        },
+        "body_hydrated": body_hydrated,
+        "participants": [
+            {"role": role, "address": addr.address, "display_name": addr.name}
+            for role, addrs in (
+                ("from", [email_obj.from_]),
+                ("to", email_obj.to),
+                ("cc", email_obj.cc),
+            )
+            for addr in addrs
+        ],
+    }
+
+
+def parse_fetch_batch(
+    folder: str,
+    fetched: dict[int, dict[bytes, Any]],
+    body_hydrated: bool = True,
+) -> list[dict[str, Any]]:
+    """Parse a batch of FETCH responses into rows for ``upsert_emails_batch``."""
+    rows = []
+    for uid, message_data in fetched.items():
+        email_obj = parse_message_data(uid, folder, message_data)
+        if email_obj is not None:
+            rows.append(email_to_db_params(email_obj, folder, body_hydrated))
+    return rows
@@ -0,0 +1,429 @@
+"""Write-behind queue for email mutations.
+
+Mutation endpoints don't wait for the IMAP server. ``enqueue_mutations()``
+journals each change in ``mutation_journal`` as PENDING, with the email's read
+state and labels from before it, and applies it to the cached row in the same
+transaction. ``MutationDrain`` then applies pending mutations to the server on
+its own thread:
+
+- An email's pending mutations are coalesced into their net effect. Marking a
+  read email unread and then read again needs no command at all; such
+  mutations are completed without touching the server.
+- Emails of one folder with the same net effect share one ``UID STORE`` /
+  ``X-GM-LABELS`` store / ``UID MOVE`` per operation.
+- Moved emails wait in ``pending_move_folder()`` of their folder. Once moved,
+  each row takes the UID the server's ``COPYUID`` response (UIDPLUS) gives it
+  in the destination, so nothing is downloaded or embedded again; only
+  emails the server reported no UID for are dropped and left to a sync of the
+  destination.
+- A folder whose commands fail is retried with exponential backoff. After
+  ``MAX_ATTEMPTS`` its mutations are marked FAILED and the cached rows are put
+  back: moved emails into their folder, then read state and labels from
+  ``pre_state``.
+"""
+
+from __future__ import annotations
+
+import imaplib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from queue import Empty
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Optional
+
+from workspace_secretary.engine.database import pending_move_folder
+
+if TYPE_CHECKING:
+    from workspace_secretary.engine.database import DatabaseInterface
+    from workspace_secretary.engine.imap_sync import ImapClient
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 15.0
+RETRY_MAX_SECONDS = 900.0
+# Pending rows read per pass.
+DRAIN_BATCH_SIZE = 2000
+# How long the drain sleeps when nothing wakes it; catches mutations journaled
+# by another process.
+DRAIN_POLL_SECONDS = 60.0
+# Errors meaning the connection broke rather than the server refusing.
+CONNECTION_ERRORS = (OSError, imaplib.IMAP4.abort)
+
+
+@dataclass
+class EmailChange:
+    """Net effect of one email's pending mutations."""
+
+    uid: int
+    folder: str
+    pre_state: Optional[dict[str, Any]] = None
+    mutation_ids: list[int] = field(default_factory=list)
+    attempts: int = 0
+    is_read: Optional[bool] = None
+    # Label -> whether it should end up on the email.
+    labels: dict[str, bool] = field(default_factory=dict)
+    set_labels: Optional[list[str]] = None
+    destination: Optional[str] = None
+
+    def add(self, mutation: dict[str, Any]) -> None:
+        """Fold the next journaled mutation of the email into the change."""
+        self.mutation_ids.append(mutation["id"])
+        self.attempts = max(self.attempts, mutation.get("attempts") or 0)
+        action = mutation["action"]
+        params = mutation.get("params") or {}
+        if action in ("mark_read", "mark_unread"):
+            self.is_read = action == "mark_read"
+        elif action == "labels":
+            labels = params.get("labels") or []
+            label_action = params.get("label_action", "add")
+            if label_action == "set":
+                self.set_labels = list(labels)
+                self.labels = {}
+            elif self.set_labels is not None:
+                self.set_labels = [
+                    label for label in self.set_labels if label not in labels
+                ]
+                if label_action == "add":
+                    self.set_labels.extend(labels)
+            else:
+                for label in labels:
+                    self.labels[label] = label_action == "add"
+        elif action == "move":
+            self.destination = params.get("destination")
+
+    def settle(self) -> None:
+        """Drop whatever the email already had before the first mutation."""
+        pre_state = self.pre_state or {}
+        if "is_unread" in pre_state and self.is_read == (not pre_state["is_unread"]):
+            self.is_read = None
+        current = pre_state.get("gmail_labels")
+        if current is None:
+            return
+        if self.set_labels is not None and sorted(self.set_labels) == sorted(current):
+            self.set_labels = None
+        self.labels = {
+            label: wanted
+            for label, wanted in self.labels.items()
+            if (label in current) != wanted
+        }
+
+    @property
+    def empty(self) -> bool:
+        return (
+            self.is_read is None
+            and not self.labels
+            and self.set_labels is None
+            and self.destination is None
+        )
+
+    @property
+    def added_labels(self) -> list[str]:
+        return sorted(label for label, wanted in self.labels.items() if wanted)
+
+    @property
+    def removed_labels(self) -> list[str]:
+        return sorted(label for label, wanted in self.labels.items() if not wanted)
+
+    @property
+    def signature(self) -> tuple[Any, ...]:
+        """Changes with equal signatures can share IMAP commands."""
+        return (
+            self.is_read,
+            tuple(self.added_labels),
+            tuple(self.removed_labels),
+            None if self.set_labels is None else tuple(sorted(self.set_labels)),
+            self.destination,
+        )
+
+    def revert(self) -> Optional[dict[str, Any]]:
+        """The apply_email_changes() change restoring the cached row."""
+        if not self.pre_state:
+            return None
+        return {
+            "folder": self.folder,
+            "uids": [self.uid],
+            "is_read": not self.pre_state["is_unread"],
+            "labels": self.pre_state.get("gmail_labels") or [],
+            "label_action": "set",
+        }
+
+
+def coalesce(mutations: list[dict[str, Any]]) -> list[EmailChange]:
+    """Reduce journaled mutations to one net change per email.
+
+    Args:
+        mutations: PENDING journal rows, as from list_pending_mutations().
+
+    Returns:
+        One change per (uid, folder), in order of each email's first mutation.
+        Changes with nothing left to do are ``empty``.
+    """
+    changes: dict[tuple[int, str], EmailChange] = {}
+    for mutation in sorted(mutations, key=lambda m: m["id"]):
+        key = (mutation["email_uid"], mutation["email_folder"])
+        change = changes.get(key)
+        if change is None:
+            change = changes[key] = EmailChange(
+                uid=key[0], folder=key[1], pre_state=mutation.get("pre_state")
+            )
+        change.add(mutation)
+    for change in changes.values():
+        change.settle()
+    return list(changes.values())
+
+
+class MutationDrain:
+    """Applies journaled mutations to the IMAP server in the background.
+
+    Args:
+        database: Cache holding ``mutation_journal``.
+        connection: Returns a context manager yielding a connected client,
+            e.g. ``pool.connection``; raises ``queue.Empty`` if none is free.
+        on_moved: Called with the destination folder after emails moved that
+            have to be fetched from there again.
+        clock: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        database: "DatabaseInterface",
+        connection: Callable[[], ContextManager["ImapClient"]],
+        on_moved: Optional[Callable[[str], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.database = database
+        self.connection = connection
+        self.on_moved = on_moved
+        self.clock = clock
+        self._failures: dict[str, int] = {}
+        self._retry_at: dict[str, float] = {}
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._metrics = {
+            "applied": 0,
+            "coalesced": 0,
+            "failed": 0,
+            "commands": 0,
+            "retries": 0,
+            "relocated": 0,
+        }
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="mutation-drain", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def notify(self) -> None:
+        """Wake the drain because mutations were journaled."""
+        self._wake.set()
+
+    def stats(self) -> dict[str, Any]:
+        now = self.clock()
+        return {
+            **self._metrics,
+            "backoff": {
+                folder: round(retry_at - now)
+                for folder, retry_at in self._retry_at.items()
+                if retry_at > now
+            },
+        }
+
+    def drain(self) -> int:
+        """Apply what is pending, skipping folders waiting out a backoff.
+
+        Returns:
+            Mutations completed or failed in this pass.
+        """
+        pending = self.database.list_pending_mutations(DRAIN_BATCH_SIZE)
+        if not pending:
+            return 0
+
+        changes = coalesce(pending)
+        noops = [i for change in changes if change.empty for i in change.mutation_ids]
+        self.database.update_mutations_status(noops, "COMPLETED")
+        self._metrics["coalesced"] += len(noops)
+        settled = len(noops)
+
+        by_folder: dict[str, list[EmailChange]] = {}
+        for change in changes:
+            if not change.empty:
+                by_folder.setdefault(change.folder, []).append(change)
+        now = self.clock()
+        for folder, folder_changes in by_folder.items():
+            if self._retry_at.get(folder, 0) > now:
+                continue
+            settled += self._drain_folder(folder, folder_changes)
+        return settled
+
+    def _drain_folder(self, folder: str, changes: list[EmailChange]) -> int:
+        groups: dict[tuple[Any, ...], list[EmailChange]] = {}
+        for change in changes:
+            groups.setdefault(change.signature, []).append(change)
+
+        settled = 0
+        failed = False
+        try:
+            with self.connection() as client:
+                for group in groups.values():
+                    try:
+                        self._apply(client, folder, group)
+                    except CONNECTION_ERRORS:
+                        raise
+                    except Exception as e:
+                        # The server refused; other groups may still succeed.
+                        logger.error(f"[{folder}] Applying mutations failed: {e}")
+                        settled += self._record_failure(group, str(e))
+                        failed = True
+                        continue
+                    ids = [i for change in group for i in change.mutation_ids]
+                    self.database.update_mutations_status(ids, "COMPLETED")
+                    self._metrics["applied"] += len(ids)
+                    settled += len(ids)
+        except Empty:
+            logger.warning(f"[{folder}] No IMAP connection for pending mutations")
+            failed = True
+        except CONNECTION_ERRORS as e:
+            # Not the mutations' fault: retry without counting an attempt.
+            logger.warning(f"[{folder}] Connection lost applying mutations: {e}")
+            failed = True
+
+        if failed:
+            self._backoff(folder)
+        else:
+            self._failures.pop(folder, None)
+            self._retry_at.pop(folder, None)
+        return settled
+
+    def _apply(
+        self, client: "ImapClient", folder: str, group: list[EmailChange]
+    ) -> None:
+        """Send the commands for changes sharing one signature."""
+        change = group[0]
+        uids = [c.uid for c in group]
+        if change.is_read is not None:
+            client.store_flags(folder, uids, r"\Seen", change.is_read)
+            self._metrics["commands"] += 1
+        if change.set_labels is not None:
+            client.modify_gmail_labels(folder, uids, change.set_labels, "set")
+            self._metrics["commands"] += 1
+        for action, labels in (
+            ("add", change.added_labels),
+            ("remove", change.removed_labels),
+        ):
+            if labels:
+                client.modify_gmail_labels(folder, uids, labels, action)
+                self._metrics["commands"] += 1
+        if change.destination:
+            new_uids = client.move_emails(folder, uids, change.destination)
+            self._metrics["commands"] += 1
+            self._relocate(folder, uids, change.destination, new_uids)
+
+    def _relocate(
+        self, folder: str, uids: list[int], destination: str, new_uids: dict[int, int]
+    ) -> None:
+        """Move parked rows to the UIDs the server gave them in ``destination``."""
+        parked = pending_move_folder(folder)
+        moved = {uid: new_uids[uid] for uid in uids if uid in new_uids}
+        self.database.relocate_emails(
+            [(uid, parked, new_uid, destination) for uid, new_uid in moved.items()]
+        )
+        changes: list[dict[str, Any]] = []
+        for label, action in (
+            (_folder_label(folder), "remove"),
+            (_folder_label(destination), "add"),
+        ):
+            if label and moved:
+                changes.append(
+                    {
+                        "folder": destination,
+                        "uids": sorted(moved.values()),
+                        "labels": [label],
+                        "label_action": action,
+                    }
+                )
+        unknown = [uid for uid in uids if uid not in moved]
+        if unknown:
+            changes.append({"folder": parked, "uids": unknown, "delete": True})
+        self.database.apply_email_changes(changes)
+        self._metrics["relocated"] += len(moved)
+        if unknown and self.on_moved:
+            self.on_moved(destination)
+
+    def _backoff(self, folder: str) -> None:
+        failures = self._failures.get(folder, 0) + 1
+        self._failures[folder] = failures
+        delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (failures - 1))
+        self._retry_at[folder] = self.clock() + delay
+
+    def _record_failure(self, group: list[EmailChange], error: str) -> int:
+        """Count a failed attempt; give up on changes out of attempts.
+
+        Returns:
+            Mutations marked FAILED.
+        """
+        exhausted = [c for c in group if c.attempts + 1 >= MAX_ATTEMPTS]
+        retry = [c for c in group if c.attempts + 1 < MAX_ATTEMPTS]
+        self.database.update_mutations_status(
+            [i for change in retry for i in change.mutation_ids],
+            "PENDING",
+            error,
+            attempted=True,
+        )
+        self._metrics["retries"] += len(retry)
+        if not exhausted:
+            return 0
+
+        ids = [i for change in exhausted for i in change.mutation_ids]
+        self.database.update_mutations_status(ids, "FAILED", error, attempted=True)
+        self._metrics["failed"] += len(ids)
+        logger.error(f"Giving up on {len(ids)} mutations: {error}")
+
+        self.database.relocate_emails(
+            [
+                (c.uid, pending_move_folder(c.folder), c.uid, c.folder)
+                for c in exhausted
+                if c.destination
+            ]
+        )
+        reverts = [c.revert() for c in exhausted]
+        self.database.apply_email_changes([r for r in reverts if r])
+        return len(ids)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Mutation drain failed: {e}")
+            self._wake.wait(self._sleep_seconds())
+
+    def _sleep_seconds(self) -> float:
+        if not self._retry_at:
+            return DRAIN_POLL_SECONDS
+        soonest = min(self._retry_at.values()) - self.clock()
+        return min(DRAIN_POLL_SECONDS, max(1.0, soonest))
+
+
+def _folder_label(folder: str) -> Optional[str]:
+    """The Gmail label an email has for being in ``folder``, if any.
+
+    System folders other than INBOX (``[Gmail]/...``) are not plain labels and
+    are left alone.
+    """
+    if folder.upper() == "INBOX":
+        return "\\Inbox"
+    if folder.startswith(("[Gmail]/", "[Google Mail]/")):
+        return None
+    return folder
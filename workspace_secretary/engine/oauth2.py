@@ -3,8 +3,12 @@
 import base64
 import json
 import logging
+import os
+import threading
 import time
-from typing import Optional, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import requests  # type: ignore
 from google.auth.transport.requests import Request
@@ -20,6 +24,9 @@ GMAIL_SCOPES = [
     "https://mail.google.com/",
     "https://www.googleapis.com/auth/calendar",
 ]
+# Tokens are refreshed when they have less than this many seconds left.
+REFRESH_MARGIN_SECONDS = 300
+DEFAULT_TOKEN_PATH = "config/token.json"
 
 
 class OAuthValidationResult:
@@ -75,14 +82,124 @@ def _parse_token_expiry(token_expiry) -> int:
             return 0
 
 
+class TokenProvider:
+    """Access-token cache shared by every client using one OAuth2 config.
+
+    IMAP, SMTP, Calendar and Gmail API clients all ask the provider instead of
+    refreshing on their own. The token is cached on the config until
+    ``REFRESH_MARGIN_SECONDS`` before it expires; concurrent callers that find
+    it stale wait for a single refresh and share its result. Refreshed tokens
+    are written back to the token file so restarts and other processes reuse
+    them.
+
+    Args:
+        oauth2_config: Config holding the refresh token and cached token.
+        token_path: JSON token file to update after a refresh; not written if
+            it does not exist.
+    """
+
+    def __init__(self, oauth2_config: OAuth2Config, token_path: Optional[Path] = None):
+        self.oauth2_config = oauth2_config
+        self.token_path = token_path
+        self.refreshes = 0
+        self._lock = threading.Lock()
+
+    def get_access_token(self) -> Tuple[str, int]:
+        """Get a valid access token and its expiry, refreshing if needed."""
+        cached = self._cached()
+        if cached:
+            return cached
+        with self._lock:
+            # Another caller may have refreshed while this one waited.
+            cached = self._cached()
+            if cached:
+                return cached
+            refresh_token = self.oauth2_config.refresh_token
+            token = _refresh_access_token(self.oauth2_config)
+            self.refreshes += 1
+            self._persist(refresh_token)
+            return token
+
+    def credentials(self, scopes: Optional[Sequence[str]] = None) -> Credentials:
+        """Google API credentials that take their tokens from this provider."""
+        token, expiry = self.get_access_token()
+        return Credentials(
+            token=token,
+            expiry=_utc_naive(expiry),
+            refresh_handler=self._refresh_handler,
+            scopes=list(scopes) if scopes else None,
+        )
+
+    def _refresh_handler(
+        self, request: Request, scopes: Optional[List[str]] = None
+    ) -> Tuple[str, datetime]:
+        token, expiry = self.get_access_token()
+        return token, _utc_naive(expiry)
+
+    def _cached(self) -> Optional[Tuple[str, int]]:
+        config = self.oauth2_config
+        expiry = _parse_token_expiry(config.token_expiry)
+        if config.access_token and expiry > time.time() + REFRESH_MARGIN_SECONDS:
+            return config.access_token, expiry
+        return None
+
+    def _persist(self, refresh_token: Optional[str]) -> None:
+        """Write the refreshed token into the token file it was loaded from.
+
+        Args:
+            refresh_token: The refresh token used, which identifies the account
+                in the file (the refresh may have rotated it).
+        """
+        path = self.token_path
+        if path is None or not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            # YAML token files are left alone.
+            return
+        oauth2_data = (
+            data.get("imap", {}).get("oauth2") or data.get("oauth2") or data
+        )
+        config = self.oauth2_config
+        if oauth2_data.get("refresh_token") not in (None, refresh_token):
+            logger.warning(f"{path} belongs to another account; not updating it")
+            return
+        oauth2_data["access_token"] = config.access_token
+        oauth2_data["token_expiry"] = config.token_expiry
+        oauth2_data["refresh_token"] = config.refresh_token
+
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(data, indent=2))
+            os.chmod(tmp, path.stat().st_mode & 0o777)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Failed to save refreshed token to {path}: {e}")
+
+
+_providers: Dict[int, TokenProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def token_provider(oauth2_config: OAuth2Config) -> TokenProvider:
+    """Get the process-wide token provider for an OAuth2 config."""
+    with _providers_lock:
+        provider = _providers.get(id(oauth2_config))
+        if provider is None:
+            token_path = Path(os.environ.get("TOKEN_PATH", DEFAULT_TOKEN_PATH))
+            provider = TokenProvider(oauth2_config, token_path)
+            # The provider keeps the config alive, so its id is not reused.
+            _providers[id(oauth2_config)] = provider
+        return provider
+
+
 def get_access_token(oauth2_config: OAuth2Config) -> Tuple[str, int]:
     """Get a valid access token, refreshing if needed."""
-    current_time = int(time.time())
-    token_expiry = _parse_token_expiry(oauth2_config.token_expiry)
+    return token_provider(oauth2_config).get_access_token()
 
-    if oauth2_config.access_token and token_expiry > current_time + 300:
-        return oauth2_config.access_token, token_expiry
 
+def _refresh_access_token(oauth2_config: OAuth2Config) -> Tuple[str, int]:
     if not oauth2_config.refresh_token:
         raise ValueError("Refresh token is required for OAuth2 authentication")
 
@@ -95,7 +212,7 @@ def get_access_token(oauth2_config: OAuth2Config) -> Tuple[str, int]:
         "grant_type": "refresh_token",
     }
 
-    response = requests.post(GMAIL_TOKEN_URI, data=data)
+    response = requests.post(GMAIL_TOKEN_URI, data=data, timeout=30)
     if response.status_code != 200:
         logger.error(f"Failed to refresh token: {response.text}")
         raise ValueError(
@@ -109,10 +226,18 @@ def get_access_token(oauth2_config: OAuth2Config) -> Tuple[str, int]:
 
     oauth2_config.access_token = access_token
     oauth2_config.token_expiry = expiry
+    # Google occasionally rotates the refresh token.
+    if token_data.get("refresh_token"):
+        oauth2_config.refresh_token = token_data["refresh_token"]
 
     return access_token, expiry
 
 
+def _utc_naive(timestamp: int) -> datetime:
+    # google-auth compares expiry against naive UTC datetimes.
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
 def generate_oauth2_string(username: str, access_token: str) -> str:
     """Generate the SASL XOAUTH2 string for IMAP authentication.
 
@@ -0,0 +1,305 @@
+"""Push notifications for every watched folder.
+
+Servers with NOTIFY (RFC 5465) report changes in any mailbox on one connection:
+events for the selected folder arrive as ordinary EXISTS / EXPUNGE / FETCH
+responses, and events in other folders as untagged STATUS responses. Servers
+without it (Gmail) get one IDLE connection per folder for the first
+``max_connections`` folders; the rest are left to catch-up sync. A server that
+advertises NOTIFY but rejects the subscription is watched the same way.
+
+Each event is turned into a request to sync just the folder that changed.
+Unsolicited FETCH responses carry new flags, which are applied to the cache
+directly instead of triggering a sync.
+"""
+
+from __future__ import annotations
+
+import imaplib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from workspace_secretary.engine.imap_sync import ImapClient
+
+logger = logging.getLogger(__name__)
+
+# Gmail drops IDLE after 29 minutes.
+IDLE_RENEW_SECONDS = 25 * 60
+# How long one idle_check() blocks; bounds how long stop() waits.
+IDLE_POLL_SECONDS = 30.0
+RECONNECT_DELAY_SECONDS = 30
+
+
+@dataclass
+class FolderEvents:
+    """What one batch of IDLE responses says about a folder."""
+
+    folder: str
+    changed: bool = False
+    flag_updates: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _text(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _fetch_update(seq: int, data: Any) -> dict[str, Any]:
+    items = list(data) if isinstance(data, (list, tuple)) else []
+    attrs = {_text(key).upper(): value for key, value in zip(items[::2], items[1::2])}
+    update: dict[str, Any] = {"seq": seq, "uid": None, "modseq": None}
+    if "UID" in attrs:
+        update["uid"] = int(attrs["UID"])
+    if "FLAGS" in attrs:
+        update["flags"] = [_text(flag) for flag in attrs["FLAGS"]]
+    modseq = attrs.get("MODSEQ")
+    if isinstance(modseq, (list, tuple)) and modseq:
+        update["modseq"] = int(modseq[0])
+    labels = attrs.get("X-GM-LABELS")
+    if isinstance(labels, (list, tuple)):
+        update["gmail_labels"] = [_text(label) for label in labels]
+    return update
+
+
+def parse_idle_responses(
+    folder: str,
+    responses: list[tuple[Any, ...]],
+    decode_folder: Callable[[Any], str] = _text,
+) -> dict[str, FolderEvents]:
+    """Group IDLE / NOTIFY responses by the folder they are about.
+
+    Args:
+        folder: The folder selected on the connection.
+        responses: Parsed responses from ``idle_check()``.
+        decode_folder: Turns a STATUS mailbox name into a folder name.
+
+    Returns:
+        Events keyed by folder. FETCH responses that change flags become
+        ``flag_updates`` (with ``uid`` None when the server sent only a
+        sequence number); everything else marks the folder ``changed``.
+    """
+    events: dict[str, FolderEvents] = {}
+
+    def _events(name: str) -> FolderEvents:
+        return events.setdefault(name, FolderEvents(name))
+
+    for response in responses:
+        if len(response) < 2:
+            continue
+        if response[0] == b"STATUS":
+            _events(decode_folder(response[1])).changed = True
+        elif response[0] == b"VANISHED":
+            _events(folder).changed = True
+        elif response[1] in (b"EXISTS", b"EXPUNGE"):
+            _events(folder).changed = True
+        elif response[1] == b"FETCH" and len(response) > 2:
+            update = _fetch_update(int(response[0]), response[2])
+            if "flags" in update:
+                _events(folder).flag_updates.append(update)
+    return events
+
+
+def dispatch_events(
+    client: "ImapClient",
+    folder: str,
+    events: dict[str, FolderEvents],
+    on_change: Callable[[str], None],
+    on_flags: Callable[[str, list[dict[str, Any]]], None],
+) -> None:
+    """Apply flag updates and request syncs for one batch of events.
+
+    Runs after IDLE is done, so ``client`` can map sequence numbers to UIDs.
+    Updates that only carry a sequence number are dropped when the folder also
+    saw EXISTS / EXPUNGE (sequence numbers may have moved); the folder sync that
+    follows picks those changes up through CONDSTORE.
+    """
+    for name, folder_events in events.items():
+        updates = folder_events.flag_updates
+        unmapped = [u["seq"] for u in updates if u["uid"] is None]
+        if unmapped and name == folder and not folder_events.changed:
+            uids = client.uids_at_sequence(folder, unmapped)
+            for update in updates:
+                if update["uid"] is None:
+                    update["uid"] = uids.get(update["seq"])
+        rows = [
+            {
+                "uid": update["uid"],
+                "folder": name,
+                "flags": ",".join(update["flags"]),
+                "is_unread": "\\Seen" not in update["flags"],
+                "modseq": update["modseq"],
+                "gmail_labels": update.get("gmail_labels"),
+            }
+            for update in updates
+            if update["uid"] is not None
+        ]
+        if rows:
+            on_flags(name, rows)
+        if folder_events.changed or len(rows) < len(updates):
+            on_change(name)
+
+
+class PushMonitor:
+    """Watches folders with NOTIFY, or with one IDLE connection per folder.
+
+    Args:
+        connect: Opens a new connected client for a folder.
+        folders: Folders to watch, most important first.
+        max_connections: IDLE connections to open when NOTIFY is unavailable.
+        on_change: Called with a folder whose messages changed.
+        on_flags: Called with a folder and flag updates for cached rows.
+        client: Already-connected client to use for the first folder.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[str], "ImapClient"],
+        folders: list[str],
+        max_connections: int,
+        on_change: Callable[[str], None],
+        on_flags: Callable[[str, list[dict[str, Any]]], None],
+        client: Optional["ImapClient"] = None,
+    ):
+        self.connect = connect
+        self.folders = folders
+        self.max_connections = max(1, max_connections)
+        self.on_change = on_change
+        self.on_flags = on_flags
+        self.mode: Optional[str] = None
+        self.watched: list[str] = []
+        self._client = client
+        self._opened: list["ImapClient"] = []
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if not self.folders:
+            return
+        first = self._client or self._open(self.folders[0])
+
+        if first.has_notify_capability() and len(self.folders) > 1:
+            self.mode = "notify"
+            self.watched = list(self.folders)
+            self._spawn(first, self.folders[0], self.folders[1:])
+        else:
+            self.mode = "idle"
+            self.watched = self.folders[: self.max_connections]
+            self._spawn(first, self.watched[0])
+            self._spawn_idle(self.watched[1:])
+        logger.info(f"Push monitor ({self.mode}) watching {', '.join(self.watched)}")
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=IDLE_POLL_SECONDS + 5)
+            if thread.is_alive():
+                logger.warning(f"{thread.name} did not stop cleanly")
+        self._threads.clear()
+        for client in self._opened:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        self._opened.clear()
+
+    def status(self) -> dict[str, Any]:
+        return {"mode": self.mode, "folders": self.watched}
+
+    def _open(self, folder: str) -> "ImapClient":
+        client = self.connect(folder)
+        self._opened.append(client)
+        return client
+
+    def _spawn_idle(self, folders: list[str]) -> None:
+        """Open an IDLE connection and worker for each of ``folders``."""
+        for folder in folders:
+            try:
+                self._spawn(self._open(folder), folder)
+            except Exception as e:
+                logger.warning(f"[{folder}] Could not open IDLE connection: {e}")
+                self.watched.remove(folder)
+
+    def _fall_back_to_idle(self) -> None:
+        """Switch from NOTIFY to one IDLE connection per folder.
+
+        Runs on the worker of the first folder, which keeps watching it.
+        """
+        self.mode = "idle"
+        self.watched = self.folders[: self.max_connections]
+        if not self._stopping.is_set():
+            self._spawn_idle(self.watched[1:])
+        logger.info(f"Push monitor ({self.mode}) watching {', '.join(self.watched)}")
+
+    def _spawn(
+        self, client: "ImapClient", folder: str, notify: Optional[list[str]] = None
+    ) -> None:
+        thread = threading.Thread(
+            target=self._watch,
+            args=(client, folder, notify),
+            name=f"idle-{folder}",
+            daemon=True,
+        )
+        thread.start()
+        self._threads.append(thread)
+
+    def _watch(
+        self, client: "ImapClient", folder: str, notify: Optional[list[str]]
+    ) -> None:
+        """IDLE on ``folder`` until stopped, reconnecting after errors."""
+        logger.info(f"[{folder}] IDLE worker started")
+        subscribed = False
+        while not self._stopping.is_set():
+            try:
+                client.select_folder(folder, readonly=True)
+                if notify and not subscribed:
+                    try:
+                        client.notify_set(notify)
+                        subscribed = True
+                    except imaplib.IMAP4.abort:
+                        raise
+                    except imaplib.IMAP4.error as e:
+                        logger.warning(f"NOTIFY rejected, falling back to IDLE: {e}")
+                        notify = None
+                        self._fall_back_to_idle()
+                responses = self._idle(client)
+                if responses:
+                    events = parse_idle_responses(
+                        folder, responses, client.decode_folder_name
+                    )
+                    dispatch_events(
+                        client, folder, events, self.on_change, self.on_flags
+                    )
+            except Exception as e:
+                logger.error(f"[{folder}] IDLE worker error: {e}")
+                if self._stopping.wait(RECONNECT_DELAY_SECONDS):
+                    break
+                try:
+                    client.disconnect()
+                    client.connect()
+                    subscribed = False
+                except Exception as reconnect_error:
+                    logger.warning(
+                        f"[{folder}] IDLE reconnect failed: {reconnect_error}"
+                    )
+        logger.info(f"[{folder}] IDLE worker stopped")
+
+    def _idle(self, client: "ImapClient") -> list[tuple[Any, ...]]:
+        """IDLE until the server reports something, renewal, or stop."""
+        deadline = time.monotonic() + IDLE_RENEW_SECONDS
+        responses: list[tuple[Any, ...]] = []
+        client.idle_start()
+        try:
+            while not self._stopping.is_set() and time.monotonic() < deadline:
+                responses = _events_only(client.idle_check(timeout=IDLE_POLL_SECONDS))
+                if responses:
+                    break
+        finally:
+            responses += _events_only(client.idle_done())
+        return responses
+
+
+def _events_only(responses: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+    # Servers send "* OK Still here" keep-alives while idling.
+    return [r for r in responses if r and r[0] != b"OK"]
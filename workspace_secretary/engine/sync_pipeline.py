@@ -0,0 +1,318 @@
+"""Staged sync pipeline: fetch → parse → store.
+
+Fetching (network), parsing (CPU) and storing (database) run on their own
+threads, connected by bounded queues, so one batch is parsed while the next
+downloads and the previous one is written. When a stage falls behind, the
+queue in front of it fills up and the stages feeding it block. Memory therefore
+stays at about ``depth`` batches per queue however slow a stage gets.
+
+There is a single store thread, so the database only ever sees one writer.
+
+Parsing is pure-Python CPU work. With ``parse_processes`` set, batches of at
+least ``parse_min_batch`` emails are parsed in a process pool so they do not
+compete for the GIL with fetching and storing; smaller batches are parsed in
+the parse thread, where shipping them to another process would cost more than
+it saves.
+
+With ``gmail_dedupe``, the fetch stage first asks Gmail for each message's
+X-GM-MSGID. Messages already cached from another folder (INBOX, a label, All
+Mail) are copied from that row, embedding included, instead of being
+downloaded and parsed again.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from queue import Empty, Full, Queue
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from workspace_secretary.engine.ingest import gmail_copy_params, parse_fetch_batch
+
+if TYPE_CHECKING:
+    from workspace_secretary.engine.database import DatabaseInterface
+    from workspace_secretary.engine.imap_pool import ImapConnectionPool
+    from workspace_secretary.engine.imap_sync import ImapClient
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("fetch", "parse", "store")
+
+
+@dataclass
+class SyncJob:
+    """A batch of UIDs from one folder to bring into the local cache.
+
+    ``on_stored`` runs on the store thread right after the batch is written,
+    with the UIDs that were stored. ``future`` resolves to the same list, or to
+    the exception that stopped the batch. ``copies`` is filled by the fetch
+    stage with messages copied from another folder rather than downloaded.
+    """
+
+    folder: str
+    uids: list[int]
+    bodies: bool = True
+    on_stored: Optional[Callable[[list[int]], None]] = None
+    future: Future = field(default_factory=Future, repr=False)
+    copies: list[dict[str, Any]] = field(default_factory=list, repr=False)
+
+    @property
+    def copied_uids(self) -> list[int]:
+        return [copy["uid"] for copy in self.copies]
+
+
+@dataclass
+class StageStats:
+    """Throughput counters for one pipeline stage."""
+
+    batches: int = 0
+    emails: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+
+    def as_dict(self, queued: int) -> dict[str, Any]:
+        rate = self.emails / self.busy_seconds if self.busy_seconds else 0.0
+        return {
+            "batches": self.batches,
+            "emails": self.emails,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 1),
+            "emails_per_second": round(rate, 1),
+            "queued": queued,
+        }
+
+
+class SyncPipeline:
+    """Runs sync jobs through fetch, parse and store stages.
+
+    Args:
+        database: Local cache written by the store stage.
+        pool: IMAP connection pool the fetch workers check connections out of.
+        fetch_workers: Number of fetch threads.
+        depth: Capacity, in batches, of each queue between stages.
+        checkout_timeout: Seconds a fetch worker waits for a pooled connection.
+        parse_processes: Size of the parse process pool; 0 parses in-thread.
+        parse_min_batch: Smallest batch sent to the process pool.
+        gmail_dedupe: Copy messages cached from another Gmail folder instead of
+            downloading them again.
+    """
+
+    def __init__(
+        self,
+        database: "DatabaseInterface",
+        pool: "ImapConnectionPool",
+        fetch_workers: int,
+        depth: int = 4,
+        checkout_timeout: float = 60,
+        parse_processes: int = 0,
+        parse_min_batch: int = 20,
+        gmail_dedupe: bool = False,
+    ):
+        self.database = database
+        self.pool = pool
+        self.fetch_workers = max(1, fetch_workers)
+        self.checkout_timeout = checkout_timeout
+        self.parse_processes = max(0, parse_processes)
+        self.parse_min_batch = parse_min_batch
+        self.gmail_dedupe = gmail_dedupe
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._jobs: Queue = Queue(maxsize=depth)
+        self._fetched: Queue = Queue(maxsize=depth)
+        self._parsed: Queue = Queue(maxsize=depth)
+        self._stats = {stage: StageStats() for stage in STAGES}
+        self._stats_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if self.parse_processes:
+            # spawn, not fork: forking a process that runs threads can copy
+            # locks held by other threads into the child.
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        workers: list[tuple[str, Callable[[], None]]] = [
+            (f"sync-fetch-{i}", self._fetch_worker) for i in range(self.fetch_workers)
+        ]
+        # One parse thread per process keeps every process busy.
+        workers += [
+            (f"sync-parse-{i}", self._parse_worker)
+            for i in range(max(1, self.parse_processes))
+        ]
+        workers.append(("sync-store", self._store_worker))
+        for name, target in workers:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Stop all stages. Jobs still queued fail with RuntimeError."""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
+        if self._parse_pool:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+            self._parse_pool = None
+        for queue in (self._jobs, self._fetched, self._parsed):
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except Empty:
+                    break
+                job = item[0] if isinstance(item, tuple) else item
+                self._fail(job, None, RuntimeError("Sync pipeline stopped"))
+
+    def submit(self, job: SyncJob) -> Future:
+        """Queue a job for fetching; blocks while the fetch queue is full."""
+        self._put(self._jobs, job)
+        return job.future
+
+    def submit_fetched(
+        self, job: SyncJob, fetched: dict[int, dict[bytes, Any]]
+    ) -> Future:
+        """Queue data the caller already fetched; blocks while parsing is behind.
+
+        Used by folder workers that hold their own connection, so they never
+        wait on the fetch workers for a pooled one.
+        """
+        self._put(self._fetched, (job, fetched))
+        return job.future
+
+    def stats(self) -> dict[str, Any]:
+        queued = {
+            "fetch": self._jobs.qsize(),
+            "parse": self._fetched.qsize(),
+            "store": self._parsed.qsize(),
+        }
+        with self._stats_lock:
+            return {
+                stage: self._stats[stage].as_dict(queued[stage]) for stage in STAGES
+            }
+
+    def _put(self, queue: Queue, item: Any) -> None:
+        while not self._stopping.is_set():
+            try:
+                queue.put(item, timeout=0.5)
+                return
+            except Full:
+                continue
+        job = item[0] if isinstance(item, tuple) else item
+        self._fail(job, None, RuntimeError("Sync pipeline stopped"))
+
+    def _get(self, queue: Queue) -> Any:
+        while not self._stopping.is_set():
+            try:
+                return queue.get(timeout=0.5)
+            except Empty:
+                continue
+        return None
+
+    def _record(self, stage: str, emails: int, started: float) -> None:
+        with self._stats_lock:
+            stats = self._stats[stage]
+            stats.batches += 1
+            stats.emails += emails
+            stats.busy_seconds += time.monotonic() - started
+
+    def _fail(self, job: SyncJob, stage: Optional[str], error: Exception) -> None:
+        if stage:
+            with self._stats_lock:
+                self._stats[stage].errors += 1
+            logger.error(f"[{job.folder}] Sync {stage} failed: {error}")
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    def _fetch_worker(self) -> None:
+        while True:
+            job = self._get(self._jobs)
+            if job is None:
+                return
+            started = time.monotonic()
+            try:
+                with self.pool.connection(self.checkout_timeout) as client:
+                    if self.gmail_dedupe:
+                        uids = self._copy_cached(client, job)
+                    else:
+                        uids = job.uids
+                    fetched = client.fetch_message_data(
+                        uids, job.folder, bodies=job.bodies
+                    )
+            except Empty:
+                self._fail(job, "fetch", TimeoutError("No IMAP connection available"))
+                continue
+            except Exception as e:
+                self._fail(job, "fetch", e)
+                continue
+            self._record("fetch", len(fetched), started)
+            self._put(self._fetched, (job, fetched))
+
+    def _copy_cached(self, client: "ImapClient", job: SyncJob) -> list[int]:
+        """Queue copies of messages cached in another folder.
+
+        Returns the UIDs that still have to be downloaded.
+        """
+        metadata = client.fetch_gmail_metadata(job.uids, job.folder)
+        msgids = {
+            uid: int(data[b"X-GM-MSGID"])
+            for uid, data in metadata.items()
+            if data.get(b"X-GM-MSGID") is not None
+        }
+        if not msgids:
+            return job.uids
+
+        sources = self.database.find_gmail_msgid_sources(list(set(msgids.values())))
+        job.copies = []
+        remaining = []
+        for uid in job.uids:
+            source = sources.get(msgids[uid]) if uid in msgids else None
+            if source is None or source == (uid, job.folder):
+                remaining.append(uid)
+                continue
+            job.copies.append(gmail_copy_params(uid, job.folder, source, metadata[uid]))
+        return remaining
+
+    def _parse_worker(self) -> None:
+        while True:
+            item = self._get(self._fetched)
+            if item is None:
+                return
+            job, fetched = item
+            started = time.monotonic()
+            try:
+                if self._parse_pool and len(fetched) >= self.parse_min_batch:
+                    rows = self._parse_pool.submit(
+                        parse_fetch_batch, job.folder, fetched, job.bodies
+                    ).result()
+                else:
+                    rows = parse_fetch_batch(job.folder, fetched, job.bodies)
+            except Exception as e:
+                self._fail(job, "parse", e)
+                continue
+            self._record("parse", len(rows), started)
+            self._put(self._parsed, (job, rows))
+
+    def _store_worker(self) -> None:
+        while True:
+            item = self._get(self._parsed)
+            if item is None:
+                return
+            job, rows = item
+            started = time.monotonic()
+            try:
+                self.database.upsert_emails_batch(rows)
+                if job.copies:
+                    self.database.copy_emails_batch(job.copies)
+                uids = [row["uid"] for row in rows] + job.copied_uids
+                if job.on_stored:
+                    job.on_stored(uids)
+            except Exception as e:
+                self._fail(job, "store", e)
+                continue
+            self._record("store", len(uids), started)
+            job.future.set_result(uids)
@@ -0,0 +1,364 @@
+"""Resumable initial-sync planning.
+
+The planner works out which UIDs of a folder are missing from the local cache
+once, then hands them out newest-first as UID-range work units. Progress is
+persisted in ``folder_state`` as the ``[backfill_lo, backfill_hi]`` window of
+UIDs that may still be missing, so a restarted engine only rescans what it had
+not finished.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from workspace_secretary.engine.database import DatabaseInterface
+    from workspace_secretary.engine.imap_sync import ImapClient
+
+logger = logging.getLogger(__name__)
+
+# Folders that hold old or bulk mail; they are backfilled after everything else.
+ARCHIVE_FOLDERS = {
+    "[Gmail]/All Mail",
+    "[Gmail]/Spam",
+    "[Gmail]/Trash",
+    "[Gmail]/Bin",
+    "[Google Mail]/All Mail",
+    "[Google Mail]/Spam",
+    "[Google Mail]/Trash",
+    "Archive",
+    "Junk",
+    "Spam",
+    "Trash",
+}
+
+
+def folder_sync_priority(folder: str) -> int:
+    """Lower sorts first: INBOX, then regular folders, then archive folders."""
+    if folder.upper() == "INBOX":
+        return 0
+    if folder in ARCHIVE_FOLDERS:
+        return 2
+    return 1
+
+
+def order_folders(folders: list[str]) -> list[str]:
+    """Sort folders by sync priority, keeping configured order within a tier."""
+    return sorted(folders, key=folder_sync_priority)
+
+
+@dataclass
+class WorkUnit:
+    """A batch of missing UIDs from one folder, sorted ascending."""
+
+    folder: str
+    uids: list[int]
+
+    @property
+    def lo(self) -> int:
+        return self.uids[0]
+
+    @property
+    def hi(self) -> int:
+        return self.uids[-1]
+
+
+@dataclass
+class FolderSyncPlan:
+    """Missing UIDs of a folder plus the persisted backfill window.
+
+    ``lo``/``hi`` bound the UIDs that are not yet known to be synced. They only
+    shrink past a UID once every unit covering it has completed, so units may
+    finish in any order without losing mail after a crash.
+
+    ``recent_floor`` is the lowest UID delivered inside the recent-mail cutoff;
+    UIDs at or above it are handed out first when ``recent_only`` is requested.
+
+    Units may be taken, completed and released from different threads.
+    """
+
+    folder: str
+    uidvalidity: int
+    lo: int
+    hi: int
+    missing: list[int] = field(default_factory=list)
+    recent_floor: Optional[int] = None
+    _outstanding: list[WorkUnit] = field(default_factory=list, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def total(self) -> int:
+        return len(self.missing) + sum(len(u.uids) for u in self._outstanding)
+
+    @property
+    def done(self) -> bool:
+        return not self.missing and not self._outstanding
+
+    @property
+    def in_flight(self) -> int:
+        """Number of units handed out and not yet completed or released."""
+        return len(self._outstanding)
+
+    @property
+    def has_recent(self) -> bool:
+        """True while missing UIDs inside the recent-mail cutoff remain."""
+        if self.recent_floor is None or not self.missing:
+            return False
+        return self.missing[-1] >= self.recent_floor
+
+    def next_unit(self, size: int, recent_only: bool = False) -> Optional[WorkUnit]:
+        """Take the ``size`` newest missing UIDs as a work unit.
+
+        Args:
+            size: Maximum number of UIDs in the unit.
+            recent_only: Only hand out UIDs at or above ``recent_floor``.
+        """
+        with self._lock:
+            if not self.missing:
+                return None
+            uids = self.missing[-size:]
+            if recent_only:
+                if not self.has_recent:
+                    return None
+                uids = [uid for uid in uids if uid >= (self.recent_floor or 0)]
+            unit = WorkUnit(self.folder, uids)
+            del self.missing[-len(uids) :]
+            self._outstanding.append(unit)
+            return unit
+
+    def complete(self, unit: WorkUnit) -> tuple[int, int]:
+        """Mark a unit as stored and advance the backfill window.
+
+        Returns the new ``(lo, hi)`` window to persist.
+        """
+        with self._lock:
+            self._outstanding.remove(unit)
+            self._advance()
+            return self.lo, self.hi
+
+    def release(self, unit: WorkUnit) -> None:
+        """Return a unit that failed so it is handed out again.
+
+        A unit that already completed (its rows are stored, but something
+        after ``complete`` failed) is left alone.
+        """
+        with self._lock:
+            if unit not in self._outstanding:
+                return
+            self._outstanding.remove(unit)
+            self.missing = sorted(self.missing + unit.uids)
+
+    def _advance(self) -> None:
+        lows = [u.lo for u in self._outstanding]
+        highs = [u.hi for u in self._outstanding]
+        if self.missing:
+            lows.append(self.missing[0])
+            highs.append(self.missing[-1])
+        if lows:
+            self.lo, self.hi = min(lows), max(highs)
+        else:
+            self.lo = self.hi + 1
+
+
+class SyncScheduler:
+    """Hands out work units across folders, highest-priority folder first.
+
+    Units are not tied to a connection: whichever pooled connection is free
+    takes the next one, so a large folder is spread over every connection
+    instead of holding one for hours while the others sit idle.
+    """
+
+    def __init__(self, plans: list[FolderSyncPlan]):
+        self.plans = sorted(plans, key=lambda plan: folder_sync_priority(plan.folder))
+
+    @property
+    def done(self) -> bool:
+        return all(plan.done for plan in self.plans)
+
+    def next_unit(
+        self, size: int, recent_only: bool = False
+    ) -> Optional[tuple[FolderSyncPlan, WorkUnit]]:
+        """Take the next unit from the first plan that still has one."""
+        for plan in self.plans:
+            unit = plan.next_unit(size, recent_only=recent_only)
+            if unit is not None:
+                return plan, unit
+        return None
+
+
+def extend_window_for_new_mail(
+    database: "DatabaseInterface", folder: str, stored_uidnext: int, uidnext: int
+) -> None:
+    """Widen the backfill window to cover UIDs delivered since the last sync.
+
+    New mail is then synced by the same resumable work units as the backfill.
+    """
+    if uidnext <= stored_uidnext:
+        return
+    folder_state = database.get_folder_state(folder) or {}
+    lo = folder_state.get("backfill_lo")
+    hi = folder_state.get("backfill_hi")
+    if lo is None or hi is None or lo > hi:
+        lo = stored_uidnext
+    database.save_sync_cursor(folder, min(lo, stored_uidnext), uidnext - 1)
+
+
+def match_uids(
+    cached: list[dict[str, Any]], server: dict[int, dict[str, Any]]
+) -> dict[int, int]:
+    """Pair cached emails with the server's UIDs for the same messages.
+
+    Messages are matched by X-GM-MSGID, or else by Message-ID. A Message-ID
+    held by more than one message on either side is ambiguous and not used.
+
+    Args:
+        cached: Rows with uid, message_id and gmail_msgid.
+        server: UID -> dict with message_id and gmail_msgid.
+
+    Returns:
+        Cached UID -> server UID, each server UID used at most once.
+    """
+    by_msgid: dict[int, int] = {}
+    by_message_id: dict[str, Optional[int]] = {}
+    for uid, message in server.items():
+        if message.get("gmail_msgid") is not None:
+            by_msgid[message["gmail_msgid"]] = uid
+        if message.get("message_id"):
+            key = message["message_id"]
+            by_message_id[key] = None if key in by_message_id else uid
+
+    cached_message_ids: dict[str, int] = {}
+    for row in cached:
+        if row.get("message_id"):
+            key = row["message_id"]
+            cached_message_ids[key] = cached_message_ids.get(key, 0) + 1
+
+    uid_map: dict[int, int] = {}
+    taken: set[int] = set()
+    for row in cached:
+        gmail_msgid = row.get("gmail_msgid")
+        new_uid = by_msgid.get(gmail_msgid) if gmail_msgid is not None else None
+        message_id = row.get("message_id")
+        if new_uid is None and message_id and cached_message_ids[message_id] == 1:
+            new_uid = by_message_id.get(message_id)
+        if new_uid is not None and new_uid not in taken:
+            uid_map[row["uid"]] = new_uid
+            taken.add(new_uid)
+    return uid_map
+
+
+def remap_folder(
+    client: "ImapClient", database: "DatabaseInterface", folder: str
+) -> int:
+    """Renumber a folder's cache after its UIDVALIDITY changed.
+
+    Only UIDs, message IDs and flags are fetched. Cached emails matched to a
+    new UID keep their rows and embeddings; the rest are dropped, so the
+    following sync downloads only messages that could not be matched.
+
+    Returns:
+        Number of cached emails kept.
+    """
+    server = client.fetch_message_ids(folder)
+    cached = database.get_message_ids(folder)
+    uid_map = match_uids(cached, server)
+    remapped = database.remap_folder_uids(folder, uid_map)
+    database.update_flags_batch(
+        [
+            {
+                "uid": uid,
+                "folder": folder,
+                "flags": ",".join(server[uid]["flags"]),
+                "is_unread": "\\Seen" not in server[uid]["flags"],
+                "modseq": server[uid]["modseq"],
+                "gmail_labels": server[uid]["gmail_labels"],
+            }
+            for uid in uid_map.values()
+        ]
+    )
+    logger.info(
+        f"[{folder}] Remapped {remapped} cached emails to new UIDs, "
+        f"dropped {len(cached) - len(uid_map)}"
+    )
+    return remapped
+
+
+def plan_folder_sync(
+    client: "ImapClient",
+    database: "DatabaseInterface",
+    folder: str,
+    recent_days: Optional[int] = None,
+) -> FolderSyncPlan:
+    """Build the sync plan for ``folder``, resuming a persisted window if any.
+
+    A folder seen for the first time gets the window ``[1, UIDNEXT - 1]`` and
+    its folder_state row is written immediately, so incremental sync takes
+    over everything at or above UIDNEXT while the backfill runs.
+
+    Args:
+        client: Connected IMAP client.
+        database: Local cache.
+        folder: Folder to plan.
+        recent_days: If set, mark UIDs delivered in the last ``recent_days``
+            days as recent so they can be synced before older mail.
+
+    Returns:
+        The plan; ``plan.done`` is True when nothing is missing.
+    """
+    info = client.select_folder(folder, readonly=True)
+    uidvalidity = info.get("uidvalidity", 0)
+    uidnext = info.get("uidnext", 1)
+    highestmodseq = info.get("highestmodseq", 0)
+
+    folder_state = database.get_folder_state(folder)
+
+    if folder_state and folder_state.get("uidvalidity") == uidvalidity:
+        lo = folder_state.get("backfill_lo")
+        hi = folder_state.get("backfill_hi")
+        if lo is None or hi is None:
+            # Synced before backfill windows were tracked: nothing to resume.
+            return FolderSyncPlan(folder, uidvalidity, lo=1, hi=0)
+        if lo <= hi:
+            logger.info(f"[{folder}] Resuming backfill window UID {lo}:{hi}")
+    else:
+        if folder_state:
+            logger.warning(f"UIDVALIDITY changed for {folder}, remapping cache")
+            try:
+                remap_folder(client, database, folder)
+            except Exception as e:
+                logger.error(f"[{folder}] Remapping failed, clearing cache: {e}")
+                database.clear_folder(folder)
+        lo, hi = 1, uidnext - 1
+        database.save_folder_state(
+            folder=folder,
+            uidvalidity=uidvalidity,
+            uidnext=uidnext,
+            highestmodseq=highestmodseq,
+        )
+        database.save_sync_cursor(folder, lo, hi)
+
+    plan = FolderSyncPlan(folder, uidvalidity, lo=lo, hi=hi)
+    if lo > hi:
+        return plan
+
+    server_uids = client.search(f"UID {lo}:{hi}", folder=folder)
+    synced = set(database.get_synced_uids(folder, uid_min=lo, uid_max=hi))
+    plan.missing = sorted(
+        uid for uid in server_uids if lo <= uid <= hi and uid not in synced
+    )
+    plan._advance()
+    if (plan.lo, plan.hi) != (lo, hi):
+        database.save_sync_cursor(folder, plan.lo, plan.hi)
+
+    if recent_days and plan.missing:
+        since = (datetime.now() - timedelta(days=recent_days)).strftime("%Y-%m-%d")
+        recent_uids = client.search({"since": since}, folder=folder)
+        plan.recent_floor = min(recent_uids) if recent_uids else plan.hi + 1
+
+    return plan
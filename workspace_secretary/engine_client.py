@@ -67,6 +67,13 @@ class EngineClient:
             json={"uid": uid, "folder": folder, "destination": destination},
         )
 
+    def hydrate_email(self, uid: int, folder: str) -> dict[str, Any]:
+        return self._request(
+            "POST",
+            "/api/email/hydrate",
+            json={"uid": uid, "folder": folder},
+        )
+
     def mark_read(self, uid: int, folder: str) -> dict[str, Any]:
         return self._request(
             "POST",
@@ -90,6 +97,15 @@ class EngineClient:
             json={"uid": uid, "folder": folder, "labels": labels, "action": action},
         )
 
+    def batch_emails(
+        self, emails: list[dict[str, Any]], operations: list[dict[str, Any]]
+    ) -> dict[str, Any]:
+        return self._request(
+            "POST",
+            "/api/email/batch",
+            json={"emails": emails, "operations": operations},
+        )
+
     def create_calendar_event(
         self,
         summary: str,
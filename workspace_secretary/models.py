@@ -178,6 +178,7 @@ class Email:
     gmail_labels: List[str] = field(default_factory=list)
     has_attachments: bool = False
     attachment_filenames: List[str] = field(default_factory=list)
+    attachment_info: List[Dict[str, Any]] = field(default_factory=list)
 
     @classmethod
     def from_message(
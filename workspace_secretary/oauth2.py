@@ -12,6 +12,14 @@ from google.oauth2.credentials import Credentials
 
 from workspace_secretary.config import OAuth2Config
 
+# Token refresh is shared with the engine so every client in the process uses
+# the same cached token.
+from workspace_secretary.engine.oauth2 import (  # noqa: F401
+    TokenProvider,
+    get_access_token,
+    token_provider,
+)
+
 logger = logging.getLogger(__name__)
 
 GMAIL_TOKEN_URI = "https://oauth2.googleapis.com/token"
@@ -75,44 +83,6 @@ def _parse_token_expiry(token_expiry) -> int:
             return 0
 
 
-def get_access_token(oauth2_config: OAuth2Config) -> Tuple[str, int]:
-    """Get a valid access token, refreshing if needed."""
-    current_time = int(time.time())
-    token_expiry = _parse_token_expiry(oauth2_config.token_expiry)
-
-    if oauth2_config.access_token and token_expiry > current_time + 300:
-        return oauth2_config.access_token, token_expiry
-
-    if not oauth2_config.refresh_token:
-        raise ValueError("Refresh token is required for OAuth2 authentication")
-
-    logger.info("Refreshing Gmail access token")
-
-    data = {
-        "client_id": oauth2_config.client_id,
-        "client_secret": oauth2_config.client_secret,
-        "refresh_token": oauth2_config.refresh_token,
-        "grant_type": "refresh_token",
-    }
-
-    response = requests.post(GMAIL_TOKEN_URI, data=data)
-    if response.status_code != 200:
-        logger.error(f"Failed to refresh token: {response.text}")
-        raise ValueError(
-            f"Failed to refresh token: {response.status_code} - {response.text}"
-        )
-
-    token_data = response.json()
-    access_token = token_data["access_token"]
-    expires_in = token_data.get("expires_in", 3600)
-    expiry = int(time.time()) + expires_in
-
-    oauth2_config.access_token = access_token
-    oauth2_config.token_expiry = expiry
-
-    return access_token, expiry
-
-
 def generate_oauth2_string(username: str, access_token: str) -> str:
     """Generate the SASL XOAUTH2 string for IMAP authentication.
 
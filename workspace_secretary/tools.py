@@ -310,6 +310,14 @@ def register_tools(
             email = db.get_email_by_uid(uid, folder)
             if not email:
                 return json.dumps({"error": f"Email {uid} not found in {folder}"})
+            if not email.get("body_hydrated", True):
+                # Only headers are cached so far; fetch the body now.
+                try:
+                    result = _get_engine(ctx).hydrate_email(uid, folder)
+                    if result.get("status") == "ok":
+                        email = db.get_email_by_uid(uid, folder) or email
+                except Exception as e:
+                    logger.warning(f"Could not hydrate email {uid}: {e}")
             return json.dumps(_format_email_detail(email), indent=2, default=str)
         except Exception as e:
             logger.error(f"Error getting email details: {e}")
@@ -1345,6 +1353,11 @@ def register_tools(
 
             # Fetch batch of emails
             emails = db.search_emails(folder="INBOX", limit=100)
+            stats = db.get_recipient_stats(
+                "INBOX",
+                [email["uid"] for email in emails],
+                [identity.email, *identity.aliases],
+            )
 
             candidates = []
             new_processed = []
@@ -1377,11 +1390,9 @@ def register_tools(
                 new_processed.append(uid)
 
                 # Check if user is in To/CC
-                to_addr = (email.get("to_addr") or "").lower()
-                cc_addr = (email.get("cc_addr") or "").lower()
-
-                user_in_to = identity.matches_email(to_addr)
-                user_in_cc = identity.matches_email(cc_addr)
+                recipients = stats.get(uid, {})
+                user_in_to = recipients.get("to_me", False)
+                user_in_cc = recipients.get("cc_me", False)
 
                 if user_in_to or user_in_cc:
                     continue  # Skip - user is directly addressed
@@ -1439,28 +1450,32 @@ def register_tools(
         try:
             engine = _get_engine(ctx)
 
-            results = {"success": 0, "failed": 0, "errors": []}
-
-            for uid in uids:
-                try:
-                    if action == "archive":
-                        # Mark read and apply label
-                        engine.mark_read(uid, "INBOX")
-                        engine.modify_labels(
-                            uid, "INBOX", ["Secretary/Auto-Cleaned"], "add"
-                        )
-                        engine.move_email(uid, "INBOX", "[Gmail]/All Mail")
-                    elif action == "mark_read":
-                        engine.mark_read(uid, "INBOX")
-                    elif action == "label":
-                        engine.modify_labels(
-                            uid, "INBOX", ["Secretary/Auto-Cleaned"], "add"
-                        )
+            label = {
+                "action": "labels",
+                "labels": ["Secretary/Auto-Cleaned"],
+                "label_action": "add",
+            }
+            operations = {
+                "archive": [
+                    {"action": "mark_read"},
+                    label,
+                    {"action": "move", "destination": "[Gmail]/All Mail"},
+                ],
+                "mark_read": [{"action": "mark_read"}],
+                "label": [label],
+            }.get(action)
+            if operations is None:
+                return json.dumps({"error": f"Unknown action: {action}"})
+
+            # One engine call; the engine applies the operations to the cache
+            # at once and to Gmail in the background, one command per operation.
+            result = engine.batch_emails(
+                [{"uid": uid, "folder": "INBOX"} for uid in uids], operations
+            )
+            if result.get("status") != "ok":
+                return json.dumps({"error": result.get("message")})
 
-                    results["success"] += 1
-                except Exception as e:
-                    results["failed"] += 1
-                    results["errors"].append(f"UID {uid}: {e}")
+            results = {"success": result.get("count", 0), "failed": 0, "errors": []}
 
             return json.dumps(results, indent=2)
 
@@ -1512,6 +1527,11 @@ def register_tools(
             processed_uids = set(state.get("processed_uids", []))
 
             emails = db.search_emails(folder="INBOX", is_unread=True, limit=100)
+            stats = db.get_recipient_stats(
+                "INBOX",
+                [email["uid"] for email in emails],
+                [identity.email, *identity.aliases],
+            )
 
             priority_emails = []
             new_processed = []
@@ -1541,20 +1561,14 @@ def register_tools(
 
                 new_processed.append(uid)
 
-                to_addr = (email.get("to_addr") or "").lower()
-                cc_addr = (email.get("cc_addr") or "").lower()
                 sender = (email.get("from_addr") or "").lower()
                 body = email.get("body_text") or ""
+                recipients = stats.get(uid, {})
 
-                user_in_to = identity.matches_email(to_addr)
-
-                if not user_in_to:
+                if not recipients.get("to_me"):
                     continue  # Must be in To: field
 
-                # Count recipients
-                to_count = len([a for a in to_addr.split(",") if a.strip()])
-                cc_count = len([a for a in cc_addr.split(",") if a.strip()])
-                total_recipients = to_count + cc_count
+                total_recipients = recipients["recipients"]
 
                 name_mentioned = identity.matches_name(body)
                 is_vip = any(vip in sender for vip in vip_senders)
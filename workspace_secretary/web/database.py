@@ -8,11 +8,26 @@ import logging
 import psycopg_pool
 from psycopg.rows import dict_row
 
+from workspace_secretary.engine.database import (
+    PG_HEADLINE_OPTIONS,
+    like_pattern,
+    pg_address_filter,
+    pg_search_rank,
+)
+
 logger = logging.getLogger(__name__)
 
 _pool = None
 _vector_type = None  # Cached vector type (vector or halfvec)
 
+# Wrap search hits in previews; the search page escapes the text, then turns
+# these into <mark> tags.
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+HEADLINE_OPTIONS = (
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_END}", {PG_HEADLINE_OPTIONS}'
+)
+
 
 def get_pool():
     global _pool
@@ -172,22 +187,7 @@ def get_thread(uid: int, folder: str) -> list[dict]:
 
 
 def search_emails(query: str, folder: str, limit: int) -> list[dict]:
-    with get_conn() as conn:
-        with conn.cursor(row_factory=dict_row) as cur:
-            cur.execute(
-                """
-                SELECT uid, folder, from_addr, subject, 
-                       LEFT(body_text, 200) as preview, date, is_unread
-                FROM emails 
-                WHERE folder = %s AND (
-                    to_tsvector('english', COALESCE(subject, '') || ' ' || COALESCE(body_text, '')) 
-                    @@ plainto_tsquery('english', %s)
-                )
-                ORDER BY date DESC LIMIT %s
-            """,
-                (folder, query, limit),
-            )
-            return cur.fetchall()
+    return search_emails_advanced(query, folder, limit, {})
 
 
 def semantic_search(
@@ -241,63 +241,81 @@ def search_emails_advanced(
     query: str, folder: str, limit: int, filters: dict
 ) -> list[dict]:
     """Search emails with advanced filters."""
-    conditions = ["folder = %s"]
-    params: list = [folder]
-
-    if query.strip():
-        conditions.append(
-            """(
-                to_tsvector('english', COALESCE(subject, '') || ' ' || COALESCE(body_text, '')) 
-                @@ plainto_tsquery('english', %s)
-            )"""
-        )
-        params.append(query)
+    ranked = bool(query.strip())
+    conditions = ["e.folder = %s"]
+    params: list = [query, folder] if ranked else [folder]
+
+    if ranked:
+        conditions.append("e.search_vector @@ q")
 
     if filters.get("from_addr"):
-        conditions.append("from_addr ILIKE %s")
-        params.append(f"%{filters['from_addr']}%")
+        condition, param = pg_address_filter("from_addr", filters["from_addr"], "e.")
+        conditions.append(condition)
+        params.append(param)
 
     if filters.get("date_from"):
-        conditions.append("date >= %s")
+        conditions.append("e.date >= %s")
         params.append(filters["date_from"])
 
     if filters.get("date_to"):
-        conditions.append("date <= %s")
+        conditions.append("e.date <= %s")
         params.append(filters["date_to"])
 
     if filters.get("has_attachments") is not None:
-        conditions.append("has_attachments = %s")
+        conditions.append("e.has_attachments = %s")
         params.append(filters["has_attachments"])
 
     if filters.get("is_unread") is not None:
-        conditions.append("is_unread = %s")
+        conditions.append("e.is_unread = %s")
         params.append(filters["is_unread"])
 
     if filters.get("to_addr"):
-        conditions.append("to_addr ILIKE %s")
-        params.append(f"%{filters['to_addr']}%")
+        condition, param = pg_address_filter("to_addr", filters["to_addr"], "e.")
+        conditions.append(condition)
+        params.append(param)
 
     if filters.get("subject_contains"):
-        conditions.append("subject ILIKE %s")
-        params.append(f"%{filters['subject_contains']}%")
+        conditions.append("e.subject ILIKE %s")
+        params.append(like_pattern(filters["subject_contains"]))
 
     if filters.get("is_starred") is not None:
         if filters["is_starred"]:
-            conditions.append("gmail_labels ? '\\\\Starred'")
+            conditions.append("e.gmail_labels ? '\\\\Starred'")
 
     if filters.get("attachment_filename"):
-        conditions.append("attachment_filenames::text ILIKE %s")
+        conditions.append("e.attachment_filenames::text ILIKE %s")
         params.append(f"%{filters['attachment_filename']}%")
 
-    params.append(limit)
-
-    sql = f"""
-        SELECT uid, folder, from_addr, subject, 
-               LEFT(body_text, 200) as preview, date, is_unread, has_attachments
-        FROM emails 
-        WHERE {" AND ".join(conditions)}
-        ORDER BY date DESC LIMIT %s
-    """
+    where = " AND ".join(conditions)
+    if ranked:
+        # Best matches first; previews are built for the returned rows only.
+        params.extend([limit, HEADLINE_OPTIONS, query])
+        sql = f"""
+            WITH ranked AS (
+                SELECT e.uid, e.folder, {pg_search_rank("e", "q")} AS rank
+                FROM emails e, websearch_to_tsquery('english', %s) q
+                WHERE {where}
+                ORDER BY rank DESC LIMIT %s
+            )
+            SELECT e.uid, e.folder, e.from_addr, e.subject,
+                   ts_headline('english', COALESCE(e.body_text, ''), q, %s)
+                       as preview,
+                   e.date, e.is_unread, e.has_attachments
+            FROM ranked r
+            JOIN emails e ON e.uid = r.uid AND e.folder = r.folder,
+                websearch_to_tsquery('english', %s) q
+            ORDER BY r.rank DESC
+        """
+    else:
+        params.append(limit)
+        sql = f"""
+            SELECT e.uid, e.folder, e.from_addr, e.subject,
+                   LEFT(e.body_text, 200) as preview, e.date, e.is_unread,
+                   e.has_attachments
+            FROM emails e
+            WHERE {where}
+            ORDER BY e.date DESC LIMIT %s
+        """
 
     with get_conn() as conn:
         with conn.cursor(row_factory=dict_row) as cur:
@@ -318,8 +336,9 @@ def semantic_search_advanced(
     params: list = [folder, query_embedding, threshold]
 
     if filters.get("from_addr"):
-        conditions.append("e.from_addr ILIKE %s")
-        params.append(f"%{filters['from_addr']}%")
+        condition, param = pg_address_filter("from_addr", filters["from_addr"], "e.")
+        conditions.append(condition)
+        params.append(param)
 
     if filters.get("date_from"):
         conditions.append("e.date >= %s")
@@ -338,12 +357,13 @@ def semantic_search_advanced(
         params.append(filters["is_unread"])
 
     if filters.get("to_addr"):
-        conditions.append("e.to_addr ILIKE %s")
-        params.append(f"%{filters['to_addr']}%")
+        condition, param = pg_address_filter("to_addr", filters["to_addr"], "e.")
+        conditions.append(condition)
+        params.append(param)
 
     if filters.get("subject_contains"):
         conditions.append("e.subject ILIKE %s")
-        params.append(f"%{filters['subject_contains']}%")
+        params.append(like_pattern(filters["subject_contains"]))
 
     if filters.get("is_starred") is not None:
         if filters["is_starred"]:
@@ -385,7 +405,7 @@ def get_search_suggestions(query: str, limit: int = 5) -> list[dict]:
                 GROUP BY from_addr
                 ORDER BY cnt DESC LIMIT %s
                 """,
-                (f"%{query}%", limit),
+                (like_pattern(query), limit),
             )
             for row in cur.fetchall():
                 suggestions.append({"type": "sender", "value": row["from_addr"]})
@@ -398,7 +418,7 @@ def get_search_suggestions(query: str, limit: int = 5) -> list[dict]:
                 WHERE subject ILIKE %s
                 ORDER BY date DESC LIMIT %s
                 """,
-                (f"%{query}%", limit),
+                (like_pattern(query), limit),
             )
             for row in cur.fetchall():
                 if row["subject"]:
@@ -48,6 +48,12 @@ async def _request(method: str, path: str, json: Optional[dict] = None) -> dict:
         raise HTTPException(status_code=503, detail="Engine API unavailable")
 
 
+async def hydrate_email(uid: int, folder: str) -> dict:
+    return await _request(
+        "POST", "/api/email/hydrate", {"uid": uid, "folder": folder}
+    )
+
+
 async def mark_read(uid: int, folder: str) -> dict:
     return await _request(
         "POST", "/api/email/mark-read", {"uid": uid, "folder": folder}
@@ -82,6 +88,12 @@ async def modify_labels(uid: int, folder: str, labels: list[str], action: str) -
     )
 
 
+async def batch_emails(emails: list[dict], operations: list[dict]) -> dict:
+    return await _request(
+        "POST", "/api/email/batch", {"emails": emails, "operations": operations}
+    )
+
+
 async def send_email(
     to: str,
     subject: str,
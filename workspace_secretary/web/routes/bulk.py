@@ -9,6 +9,18 @@ from workspace_secretary.web.auth import require_auth, Session
 router = APIRouter()
 
 
+async def _batch(emails: List[dict], operations: List[dict]) -> dict:
+    """Queue operations on the selection with one engine call.
+
+    Returns the engine's result, with a count of 0 if the call failed.
+    """
+    refs = [{"uid": int(email["uid"]), "folder": email["folder"]} for email in emails]
+    try:
+        return await engine_client.batch_emails(refs, operations)
+    except Exception as e:
+        return {"count": 0, "message": str(e)}
+
+
 @router.post("/api/bulk/mark-read")
 async def bulk_mark_read(request: Request, session: Session = Depends(require_auth)):
     data = await request.json()
@@ -19,13 +31,8 @@ async def bulk_mark_read(request: Request, session: Session = Depends(require_au
             {"status": "error", "message": "No emails selected"}, status_code=400
         )
 
-    success_count = 0
-    for email in uids:
-        try:
-            await engine_client.mark_read(int(email["uid"]), email["folder"])
-            success_count += 1
-        except Exception:
-            pass
+    result = await _batch(uids, [{"action": "mark_read"}])
+    success_count = result.get("count", 0)
 
     return JSONResponse(
         {
@@ -46,13 +53,8 @@ async def bulk_mark_unread(request: Request, session: Session = Depends(require_
             {"status": "error", "message": "No emails selected"}, status_code=400
         )
 
-    success_count = 0
-    for email in uids:
-        try:
-            await engine_client.mark_unread(int(email["uid"]), email["folder"])
-            success_count += 1
-        except Exception:
-            pass
+    result = await _batch(uids, [{"action": "mark_unread"}])
+    success_count = result.get("count", 0)
 
     return JSONResponse(
         {
@@ -73,15 +75,8 @@ async def bulk_archive(request: Request, session: Session = Depends(require_auth
             {"status": "error", "message": "No emails selected"}, status_code=400
         )
 
-    success_count = 0
-    for email in uids:
-        try:
-            await engine_client.move_email(
-                int(email["uid"]), email["folder"], "[Gmail]/All Mail"
-            )
-            success_count += 1
-        except Exception:
-            pass
+    result = await _batch(uids, [{"action": "move", "destination": "[Gmail]/All Mail"}])
+    success_count = result.get("count", 0)
 
     return JSONResponse(
         {
@@ -102,22 +97,15 @@ async def bulk_delete(request: Request, session: Session = Depends(require_auth)
             {"status": "error", "message": "No emails selected"}, status_code=400
         )
 
-    success_count = 0
-    for email in uids:
-        try:
-            await engine_client.move_email(
-                int(email["uid"]), email["folder"], "[Gmail]/Trash"
-            )
-            success_count += 1
-        except Exception:
-            pass
+    result = await _batch(uids, [{"action": "move", "destination": "[Gmail]/Trash"}])
+    success_count = result.get("count", 0)
 
     return JSONResponse(
         {
             "status": "success",
             "message": f"Deleted {success_count} emails",
             "count": success_count,
-            "deleted": uids,
+            "deleted": uids if success_count else [],
         }
     )
 
@@ -137,15 +125,8 @@ async def bulk_move(request: Request, session: Session = Depends(require_auth)):
             {"status": "error", "message": "No destination folder"}, status_code=400
         )
 
-    success_count = 0
-    for email in uids:
-        try:
-            await engine_client.move_email(
-                int(email["uid"]), email["folder"], destination
-            )
-            success_count += 1
-        except Exception:
-            pass
+    result = await _batch(uids, [{"action": "move", "destination": destination}])
+    success_count = result.get("count", 0)
 
     return JSONResponse(
         {
@@ -195,15 +176,10 @@ async def bulk_label(request: Request, session: Session = Depends(require_auth))
             {"status": "error", "message": "No label specified"}, status_code=400
         )
 
-    success_count = 0
-    for email in uids:
-        try:
-            await engine_client.modify_labels(
-                int(email["uid"]), email["folder"], [label], "add"
-            )
-            success_count += 1
-        except Exception:
-            pass
+    result = await _batch(
+        uids, [{"action": "labels", "labels": [label], "label_action": "add"}]
+    )
+    success_count = result.get("count", 0)
 
     return JSONResponse(
         {
@@ -22,7 +22,6 @@ from workspace_secretary.web.database import (
     get_email,
     get_pool,
 )
-import re
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,21 +30,6 @@ router = APIRouter()
 templates = Jinja2Templates(directory=str(Path(__file__).parent.parent / "templates"))
 
 
-def parse_email_address(addr_str: str):
-    """Parse 'Name <email@example.com>' or 'email@example.com' format."""
-    if not addr_str:
-        return None, None
-
-    match = re.match(r"^(.*?)\s*<(.+?)>$", addr_str.strip())
-    if match:
-        display_name = match.group(1).strip().strip('"')
-        email = match.group(2).strip().lower()
-        return display_name, email
-
-    email = addr_str.strip().lower()
-    return None, email
-
-
 def extract_name_parts(display_name: str):
     """Extract first and last name from display name."""
     if not display_name:
@@ -60,6 +44,10 @@ def extract_name_parts(display_name: str):
         return parts[0], parts[-1]
 
 
+# Interaction direction for each participants.role.
+_DIRECTIONS = {"from": "received", "to": "sent", "cc": "cc"}
+
+
 @router.post("/api/contacts/sync")
 async def sync_contacts_from_emails(
     session: Session = Depends(require_auth),
@@ -77,73 +65,56 @@ async def sync_contacts_from_emails(
             with conn.cursor(row_factory=dict_row) as cur:
                 cur.execute(
                     """
-                    SELECT uid, folder, from_addr, to_addr, cc_addr, subject, date, message_id
-                    FROM emails
-                    ORDER BY date DESC
-                    LIMIT %s
+                    SELECT e.uid, e.folder, e.subject, e.date, e.message_id,
+                           p.role, p.address, p.display_name
+                    FROM (
+                        SELECT uid, folder, subject, date, message_id
+                        FROM emails
+                        ORDER BY date DESC
+                        LIMIT %s
+                    ) e
+                    JOIN participants p
+                        ON p.email_uid = e.uid AND p.email_folder = e.folder
                     """,
                     (limit,),
                 )
-                emails = cur.fetchall()
-
-        for email in emails:
-            for addr_str in [
-                email.get("from_addr"),
-                email.get("to_addr"),
-                email.get("cc_addr"),
-            ]:
-                if not addr_str:
-                    continue
-
-                for single_addr in addr_str.split(","):
-                    display_name, email_addr = parse_email_address(single_addr)
-                    if not email_addr:
-                        continue
-
-                    # Extract name parts (handle None)
-                    first_name, last_name = (
-                        extract_name_parts(display_name)
-                        if display_name
-                        else (None, None)
-                    )
-
-                    # Upsert contact
-                    contact_id = upsert_contact(
-                        email=email_addr,
-                        display_name=display_name or email_addr,
-                        first_name=first_name,
-                        last_name=last_name,
-                    )
-
-                    # Skip if contact creation failed
-                    if contact_id is None:
-                        continue
-
-                    # Determine direction
-                    direction = "received"
-                    from_addr = email.get("from_addr")
-                    to_addr = email.get("to_addr")
-                    cc_addr = email.get("cc_addr")
-
-                    if from_addr and email_addr in from_addr:
-                        direction = "received"
-                    elif to_addr and email_addr in to_addr:
-                        direction = "sent"
-                    elif cc_addr and email_addr in cc_addr:
-                        direction = "cc"
-
-                    # Add interaction
-                    add_contact_interaction(
-                        contact_id=contact_id,
-                        email_uid=email["uid"],
-                        email_folder=email["folder"],
-                        direction=direction,
-                        subject=email.get("subject") or "(No subject)",
-                        email_date=email["date"],
-                        message_id=email.get("message_id") or "",
-                    )
-
-                    contact_count += 1
+                participants = cur.fetchall()
+
+        emails = set()
+        for participant in participants:
+            emails.add((participant["uid"], participant["folder"]))
+            email_addr = participant["address"]
+            display_name = participant["display_name"] or None
+
+            # Extract name parts (handle None)
+            first_name, last_name = (
+                extract_name_parts(display_name) if display_name else (None, None)
+            )
+
+            # Upsert contact
+            contact_id = upsert_contact(
+                email=email_addr,
+                display_name=display_name or email_addr,
+                first_name=first_name,
+                last_name=last_name,
+            )
+
+            # Skip if contact creation failed
+            if contact_id is None:
+                continue
+
+            # Add interaction
+            add_contact_interaction(
+                contact_id=contact_id,
+                email_uid=participant["uid"],
+                email_folder=participant["folder"],
+                direction=_DIRECTIONS[participant["role"]],
+                subject=participant.get("subject") or "(No subject)",
+                email_date=participant["date"],
+                message_id=participant.get("message_id") or "",
+            )
+
+            contact_count += 1
 
         return JSONResponse(
             {
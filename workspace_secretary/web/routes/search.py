@@ -41,6 +41,16 @@ def truncate(text: str, length: int = 100) -> str:
     return text[:length].rsplit(" ", 1)[0] + "..."
 
 
+def format_preview(text: Optional[str]) -> str:
+    """Escaped preview; hits in ranked search previews become <mark> tags."""
+    if not text or db.HIGHLIGHT_START not in text:
+        return truncate(text or "", 150)
+    text = html.escape(text.strip())
+    return text.replace(db.HIGHLIGHT_START, "<mark>").replace(
+        db.HIGHLIGHT_END, "</mark>"
+    )
+
+
 def extract_name(addr: str) -> str:
     if not addr:
         return ""
@@ -242,7 +252,7 @@ async def search(
             "from_name": extract_name(e.get("from_addr", "")),
             "from_addr": e.get("from_addr", ""),
             "subject": e.get("subject", "(no subject)"),
-            "preview": truncate(e.get("preview") or "", 150),
+            "preview": format_preview(e.get("preview")),
             "date": format_date(e.get("date")),
             "similarity": e.get("similarity"),
             "is_unread": e.get("is_unread", False),
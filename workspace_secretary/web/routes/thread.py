@@ -9,6 +9,7 @@ import httpx
 
 from workspace_secretary.web import database as db
 from workspace_secretary.web.auth import require_auth, Session
+from workspace_secretary.web import engine_client as engine
 from workspace_secretary.web.engine_client import ENGINE_URL, get_engine_url
 
 router = APIRouter()
@@ -157,6 +158,15 @@ async def thread_view(
     if not thread_emails:
         thread_emails = [email]
 
+    # Header-only emails from initial sync: fetch their bodies before rendering.
+    for i, e in enumerate(thread_emails):
+        if not e.get("body_hydrated", True):
+            try:
+                await engine.hydrate_email(e["uid"], e["folder"])
+                thread_emails[i] = db.get_email(e["uid"], e["folder"]) or e
+            except HTTPException:
+                pass
+
     # Get neighbors for navigation
     neighbors = db.get_neighbor_uids(folder, uid, unread_only)
 